@@ -0,0 +1,316 @@
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import plotly.io as pio
+from carregamento import ler_dados
+from leitores import campos_disponiveis
+from esbocos import resumir_exportacao
+from analises_avancadas import (
+    criar_grafico_top,
+    criar_heatmap_dia_semana_hora,
+    criar_heatmap_detalhado,
+    criar_paleta_horarios,
+    criar_comparativo_anos,
+    criar_graficos_evolucao,
+    gerar_recomendacoes,
+    calcular_matrizes_horario,
+    calcular_resumo_paises
+)
+
+# Formatos de figura aceitos (png e svg dependem do pacote opcional kaleido)
+FORMATOS_FIGURA = ('json', 'html', 'png', 'svg')
+
+# Figuras geradas para cada usuário: nome do arquivo -> (construtor, parâmetros)
+FIGURAS = {
+    'top_artistas': (criar_grafico_top, {'coluna': 'artist', 'rotulo': 'Artista', 'escala_cores': 'Viridis'}),
+    'top_musicas': (criar_grafico_top, {'coluna': 'track', 'rotulo': 'Música', 'escala_cores': 'Plasma'}),
+    'top_albuns': (criar_grafico_top, {'coluna': 'album', 'rotulo': 'Álbum', 'escala_cores': 'Cividis'}),
+    'paleta_horarios': (criar_paleta_horarios, {}),
+    'heatmap_dia_hora': (criar_heatmap_dia_semana_hora, {}),
+    'heatmap_detalhado': (criar_heatmap_detalhado, {}),
+    'comparativo_anos': (criar_comparativo_anos, {}),
+    'evolucao': (criar_graficos_evolucao, {}),
+}
+
+# Função para iniciar os processos do lote
+def _iniciar_processo():
+    """
+    Configura cada processo do lote (executada pelo ProcessPoolExecutor, não na importação)
+    """
+    # Os agrupamentos por período descartam o fuso de 'ts' de propósito; o aviso só polui a saída do lote
+    warnings.filterwarnings('ignore', message='Converting to PeriodArray/Index representation will drop timezone information')
+
+# Função para verificar se uma pasta é uma exportação
+def _eh_exportacao(pasta):
+    """
+    Verifica se uma pasta tem o formato lido pelo carregamento (subpasta 'data' com JSONs)
+
+    Args:
+        pasta: Caminho da pasta
+
+    Returns:
+        True se a pasta contém arquivos JSON em 'data'
+    """
+    caminho_dados = os.path.join(pasta, 'data')
+    return os.path.isdir(caminho_dados) and any(arquivo.endswith('.json') for arquivo in os.listdir(caminho_dados))
+
+# Função para encontrar as exportações de usuários
+def encontrar_exportacoes(entradas):
+    """
+    Encontra as pastas de exportação a partir das entradas da linha de comando
+
+    Cada entrada pode ser a pasta de um usuário ou uma pasta cujas subpastas são usuários.
+
+    Args:
+        entradas: Lista de caminhos
+
+    Returns:
+        Lista de (nome do usuário, pasta da exportação)
+    """
+    exportacoes = []
+    for entrada in entradas:
+        if _eh_exportacao(entrada):
+            exportacoes.append((os.path.basename(os.path.normpath(entrada)), entrada))
+        elif os.path.isdir(entrada):
+            for nome in sorted(os.listdir(entrada)):
+                pasta = os.path.join(entrada, nome)
+                if _eh_exportacao(pasta):
+                    exportacoes.append((nome, pasta))
+    return exportacoes
+
+# Função para calcular os agregados de um usuário
+def calcular_agregados(df, n_top=50):
+    """
+    Calcula os agregados tabulares de um usuário
+
+    Args:
+        df: DataFrame processado pelo carregamento
+        n_top: Número de itens nos rankings
+
+    Returns:
+        (dict, dict): Resumo numérico e DataFrames de agregados por nome de arquivo
+    """
+    resumo = {
+        'reproducoes': int(len(df)),
+        'minutos': round(float(df['minutos'].sum()), 2),
+        'artistas': int(df['artist_id'].max() + 1) if len(df) else 0,
+        'musicas': int(df['track_id'].max() + 1) if len(df) else 0,
+        'albuns': int(df['album_id'].max() + 1) if len(df) else 0,
+        'taxa_pulos': (round(float(df['foi_pulado'].mean()), 4) if len(df) else 0.0) if 'skipped' in campos_disponiveis(df) else None,
+        'inicio': df['ts'].min().isoformat() if len(df) else None,
+        'fim': df['ts'].max().isoformat() if len(df) else None,
+    }
+
+    agregados = {}
+    for nome, coluna in (('top_artistas', 'artist'), ('top_musicas', 'track'), ('top_albuns', 'album')):
+        agregados[nome] = (
+            df.groupby(coluna, observed=True)
+            .agg(minutos=('minutos', 'sum'), reproducoes=('minutos', 'size'))
+            .sort_values('minutos', ascending=False)
+            .head(n_top)
+            .reset_index()
+        )
+
+    agregados['minutos_por_mes'] = (
+        df.groupby(df['ts'].dt.to_period('M'))['minutos'].sum()
+        .rename_axis('mes')
+        .reset_index()
+    )
+
+    # Escuta por país de conexão
+    agregados['paises'] = calcular_resumo_paises(df)
+
+    # Matriz dia da semana x hora (7 x 24)
+    matrizes, _ = calcular_matrizes_horario(df, intervalo=60)
+    agregados['dia_semana_hora'] = pd.DataFrame(
+        matrizes[0],
+        index=['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo'],
+        columns=[f"{hora}h" for hora in range(24)]
+    ).rename_axis('dia').reset_index()
+
+    return resumo, agregados
+
+# Função para salvar uma figura
+def salvar_figura(fig, caminho_base, formato):
+    """
+    Salva uma figura do Plotly no formato escolhido
+
+    Args:
+        fig: Figura do Plotly
+        caminho_base: Caminho do arquivo sem extensão
+        formato: Um dos FORMATOS_FIGURA
+    """
+    caminho = f"{caminho_base}.{formato}"
+    if formato == 'json':
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(pio.to_json(fig, validate=False))
+    elif formato == 'html':
+        # plotly.js carregado da CDN para não repetir ~3 MB em cada arquivo
+        pio.write_html(fig, caminho, include_plotlyjs='cdn', validate=False)
+    else:
+        pio.write_image(fig, caminho, format=formato, validate=False)
+
+# Função para processar um usuário
+def processar_usuario(nome, pasta, pasta_saida, formato_figuras):
+    """
+    Carrega a exportação de um usuário e grava agregados, recomendações e figuras
+
+    Executada nos processos do pool, então recebe e retorna apenas valores simples.
+
+    Args:
+        nome: Nome do usuário (subpasta de saída)
+        pasta: Pasta da exportação
+        pasta_saida: Pasta raiz dos resultados
+        formato_figuras: Um dos FORMATOS_FIGURA
+
+    Returns:
+        Dicionário com o nome, o número de reproduções, o tempo gasto e o erro (se houver)
+    """
+    inicio = time.perf_counter()
+    try:
+        df = ler_dados(pasta)
+
+        destino = os.path.join(pasta_saida, nome)
+        pasta_figuras = os.path.join(destino, 'figuras')
+        os.makedirs(pasta_figuras, exist_ok=True)
+
+        # 1. Agregados
+        resumo, agregados = calcular_agregados(df)
+        for nome_agregado, tabela in agregados.items():
+            tabela.to_csv(os.path.join(destino, f"{nome_agregado}.csv"), index=False, float_format='%.2f')
+
+        # 2. Recomendações
+        resumo['recomendacoes'] = gerar_recomendacoes(df)
+        with open(os.path.join(destino, 'resumo.json'), 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2, default=str)
+
+        # 3. Figuras
+        for nome_figura, (construtor, parametros) in FIGURAS.items():
+            fig = construtor(df, **parametros)
+            if fig is not None:
+                salvar_figura(fig, os.path.join(pasta_figuras, nome_figura), formato_figuras)
+
+        return {'usuario': nome, 'reproducoes': len(df), 'segundos': time.perf_counter() - inicio, 'erro': None}
+
+    except Exception as e:
+        return {'usuario': nome, 'reproducoes': 0, 'segundos': time.perf_counter() - inicio, 'erro': str(e)}
+
+# Função para processar um usuário no modo aproximado
+def processar_usuario_aproximado(nome, pasta, pasta_saida, formato_figuras=None):
+    """
+    Resume a exportação de um usuário com esboços de memória fixa, sem montar o DataFrame
+
+    Grava resumo_aproximado.json, os rankings com o intervalo garantido de minutos e os
+    artistas e músicas distintos por mês com a margem de erro. Não gera figuras.
+
+    Args:
+        nome: Nome do usuário (subpasta de saída)
+        pasta: Pasta da exportação
+        pasta_saida: Pasta raiz dos resultados
+        formato_figuras: Ignorado (mesma assinatura de processar_usuario)
+
+    Returns:
+        Dicionário com o nome, o número de reproduções, o tempo gasto e o erro (se houver)
+    """
+    inicio = time.perf_counter()
+    try:
+        resumo = resumir_exportacao(pasta)
+
+        destino = os.path.join(pasta_saida, nome)
+        os.makedirs(destino, exist_ok=True)
+
+        artistas, erro_artistas = resumo.distintos_totais('artist')
+        musicas, erro_musicas = resumo.distintos_totais('track')
+        dados_resumo = {
+            'reproducoes': resumo.reproducoes,
+            'minutos': round(resumo.ms_total / 60000, 2),
+            # Sem o campo skipped no formato lido (histórico básico), a taxa fica nula em vez de zero
+            'taxa_pulos': (round(resumo.puladas / resumo.reproducoes, 4) if resumo.reproducoes else 0.0) if 'skipped' in resumo.campos else None,
+            'artistas': round(artistas),
+            'artistas_erro': round(erro_artistas),
+            'musicas': round(musicas),
+            'musicas_erro': round(erro_musicas),
+            'memoria_esbocos_bytes': resumo.memoria_bytes()
+        }
+        with open(os.path.join(destino, 'resumo_aproximado.json'), 'w', encoding='utf-8') as f:
+            json.dump(dados_resumo, f, ensure_ascii=False, indent=2)
+
+        resumo.top('artist', 50).to_csv(os.path.join(destino, 'top_artistas.csv'), index=False, float_format='%.2f')
+        resumo.top('track', 50).to_csv(os.path.join(destino, 'top_musicas.csv'), index=False, float_format='%.2f')
+        resumo.distintos_por_mes().to_csv(os.path.join(destino, 'distintos_por_mes.csv'), index=False, float_format='%.1f')
+
+        return {'usuario': nome, 'reproducoes': resumo.reproducoes, 'segundos': time.perf_counter() - inicio, 'erro': None}
+
+    except Exception as e:
+        return {'usuario': nome, 'reproducoes': 0, 'segundos': time.perf_counter() - inicio, 'erro': str(e)}
+
+# Função principal
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera agregados e figuras das exportações do Spotify de vários usuários, sem o Streamlit"
+    )
+    parser.add_argument('entradas', nargs='+', help="Pastas de usuários (com subpasta 'data') ou pastas que as contêm")
+    parser.add_argument('--saida', default='resultados', help="Pasta onde gravar os resultados (padrão: resultados)")
+    parser.add_argument('--processos', type=int, default=os.cpu_count(), help="Número de processos (padrão: número de CPUs)")
+    parser.add_argument('--figuras', choices=FORMATOS_FIGURA, default='json', help="Formato das figuras (png e svg exigem kaleido)")
+    parser.add_argument('--aproximado', action='store_true', help="Só resumos por esboços de memória fixa (distintos e rankings com margem de erro), sem figuras")
+    args = parser.parse_args()
+
+    if args.figuras in ('png', 'svg'):
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            parser.error(f"o formato {args.figuras} exige o pacote kaleido (pip install kaleido)")
+
+    exportacoes = encontrar_exportacoes(args.entradas)
+    if not exportacoes:
+        parser.error("nenhuma exportação encontrada (esperado: pastas com arquivos JSON em 'data')")
+
+    os.makedirs(args.saida, exist_ok=True)
+    print(f"{len(exportacoes)} usuários, {args.processos} processos")
+
+    resultados = []
+    inicio = time.perf_counter()
+
+    processar = processar_usuario_aproximado if args.aproximado else processar_usuario
+    with ProcessPoolExecutor(max_workers=args.processos, initializer=_iniciar_processo) as executor:
+        futuros = [
+            executor.submit(processar, nome, pasta, args.saida, args.figuras)
+            for nome, pasta in exportacoes
+        ]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            resultados.append(resultado)
+            situacao = f"ERRO: {resultado['erro']}" if resultado['erro'] else f"{resultado['reproducoes']:,} reproduções"
+            print(f"[{len(resultados)}/{len(exportacoes)}] {resultado['usuario']}: {situacao} ({resultado['segundos']:.2f} s)")
+
+    duracao = time.perf_counter() - inicio
+    falhas = sum(1 for resultado in resultados if resultado['erro'])
+    usuarios_por_minuto = len(resultados) / duracao * 60 if duracao > 0 else 0.0
+
+    # Relatório da execução, incluindo a vazão em usuários por minuto
+    relatorio = {
+        'usuarios': len(resultados),
+        'falhas': falhas,
+        'processos': args.processos,
+        'aproximado': args.aproximado,
+        'segundos': round(duracao, 3),
+        'usuarios_por_minuto': round(usuarios_por_minuto, 1),
+        'resultados': sorted(resultados, key=lambda resultado: resultado['usuario'])
+    }
+    with open(os.path.join(args.saida, 'execucao.json'), 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{len(resultados) - falhas}/{len(resultados)} usuários em {duracao:.1f} s "
+          f"→ {usuarios_por_minuto:.1f} usuários/minuto")
+
+    if falhas:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
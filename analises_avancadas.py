@@ -1,16 +1,282 @@
 import pandas as pd
 import numpy as np
-import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
 import random
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 from collections import Counter
+from identidades import artistas_das_faixas
+from geografia import nome_pais
+from leitores import campos_disponiveis
+
+# Complemento dos títulos e avisos de análises cujo campo o formato lido não traz
+AVISO_INDISPONIVEL = "indisponível no formato básico"
+
+# Função para marcar um subgráfico sem dados no formato lido
+def _marcar_indisponivel(fig, indice):
+    """
+    Acrescenta o aviso ao título de um subgráfico que fica vazio
+
+    Args:
+        fig: Figura criada por make_subplots com subplot_titles
+        indice: Posição do subgráfico na ordem dos títulos
+    """
+    titulo = fig.layout.annotations[indice]
+    titulo.text = f"{titulo.text} ({AVISO_INDISPONIVEL})"
+
+# Função para criar gráfico de barras com os itens mais ouvidos
+def criar_grafico_top(df, coluna, rotulo, escala_cores, n=10):
+    """
+    Cria um gráfico de barras horizontais com os itens mais ouvidos de uma coluna
+    
+    Args:
+        df: DataFrame com os dados do Spotify
+        coluna: Coluna a agrupar ('artist', 'track' ou 'album')
+        rotulo: Rótulo do eixo dos itens
+        escala_cores: Escala de cores contínua do Plotly
+        n: Número de itens a exibir
+        
+    Returns:
+        Figura do Plotly com o ranking, ou None se a coluna não tiver itens (por exemplo,
+        álbuns no histórico básico)
+    """
+    top = df.groupby(coluna, observed=True)['minutos'].sum().sort_values(ascending=False).head(n)
+    if top.empty:
+        return None
+    top.index = top.index.astype(object)
+    
+    fig = px.bar(top, x=top.values, y=top.index, orientation='h', 
+                 labels={'x':'Minutos', 'y':rotulo}, 
+                 color=top.values, color_continuous_scale=escala_cores,
+                 template="plotly_dark")
+    fig.update_layout(height=500)
+    
+    return fig
+
+# Função para criar gráfico de itens mais ouvidos estimados por esboços
+def criar_grafico_top_aproximado(top, rotulo, escala_cores):
+    """
+    Cria um gráfico de barras horizontais com os itens mais ouvidos estimados pelo modo aproximado
+
+    Args:
+        top: DataFrame de ResumoAproximado.top (nome, minutos, minutos_min, minutos_max)
+        rotulo: Rótulo do eixo dos itens
+        escala_cores: Escala de cores contínua do Plotly
+
+    Returns:
+        Figura do Plotly com o ranking e o intervalo garantido de cada item
+    """
+    top = top.assign(
+        erro_mais=top['minutos_max'] - top['minutos'],
+        erro_menos=top['minutos'] - top['minutos_min']
+    )
+
+    fig = px.bar(top, x='minutos', y='nome', orientation='h',
+                 error_x='erro_mais', error_x_minus='erro_menos',
+                 labels={'minutos': 'Minutos (estimativa)', 'nome': rotulo},
+                 color='minutos', color_continuous_scale=escala_cores,
+                 hover_data={'minutos_min': ':.1f', 'minutos_max': ':.1f', 'erro_mais': False, 'erro_menos': False},
+                 template="plotly_dark")
+    fig.update_layout(height=500)
+
+    return fig
+
+# Função para criar gráfico de artistas e músicas distintos por mês estimados por esboços
+def criar_grafico_distintos_por_mes(distintos):
+    """
+    Cria um gráfico com os artistas e músicas distintos de cada mês estimados pelo modo aproximado
+
+    Args:
+        distintos: DataFrame de ResumoAproximado.distintos_por_mes
+
+    Returns:
+        Figura do Plotly com as estimativas e as margens de erro
+    """
+    fig = make_subplots(
+        rows=2, cols=1,
+        subplot_titles=("Artistas distintos por mês", "Músicas distintas por mês"),
+        vertical_spacing=0.15,
+        shared_xaxes=True
+    )
+
+    for linha, (coluna, nome, cor) in enumerate((('artistas', 'Artistas', '#1DB954'), ('musicas', 'Músicas', '#FF6B6B')), start=1):
+        fig.add_trace(
+            go.Scatter(
+                x=distintos['mes'],
+                y=distintos[coluna],
+                mode='lines+markers',
+                line=dict(color=cor),
+                error_y=dict(type='data', array=distintos[f'{coluna}_erro'], visible=True),
+                customdata=distintos[f'{coluna}_erro'],
+                hovertemplate='Mês: %{x}<br>' + nome + ': %{y:.0f} ± %{customdata:.0f}<extra></extra>',
+                name=nome
+            ),
+            row=linha, col=1
+        )
+
+    fig.update_layout(height=600, template="plotly_dark", showlegend=False)
+
+    return fig
+
+# Função para criar gráfico de faixas puladas vs completas
+def criar_grafico_pulos(df):
+    """
+    Cria um gráfico de rosca com a proporção de faixas puladas e completas
+    
+    Args:
+        df: DataFrame com os dados do Spotify
+        
+    Returns:
+        Figura do Plotly com a proporção, ou None se o formato lido não informa os pulos
+    """
+    if 'skipped' not in campos_disponiveis(df):
+        return None
+    qtd_puladas = df['foi_pulado'].sum()
+    qtd_completas = len(df) - qtd_puladas
+    fig = px.pie(values=[qtd_completas, qtd_puladas],
+                 names=['Completas', 'Puladas'],
+                 title='Proporção de faixas puladas',
+                 color_discrete_sequence=px.colors.qualitative.Set2,
+                 template="plotly_dark",
+                 hole=0.4)
+    fig.update_layout(height=400)
+    
+    return fig
+
+# Função para criar gráfico de dispositivos mais utilizados
+def criar_grafico_dispositivos(df, n=10):
+    """
+    Cria um gráfico de barras com os dispositivos mais utilizados
+    
+    Args:
+        df: DataFrame com os dados do Spotify
+        n: Número de dispositivos a exibir
+        
+    Returns:
+        Figura do Plotly com os dispositivos, ou None se não houver platform
+    """
+    if 'platform' not in campos_disponiveis(df):
+        return None
+    dispositivos = df['platform'].value_counts().head(n)
+    if dispositivos.empty:
+        return None
+    fig = px.bar(dispositivos, x=dispositivos.index, y=dispositivos.values,
+                 labels={'x': 'Dispositivo', 'y': 'Execuções'},
+                 color=dispositivos.values, color_continuous_scale='Viridis',
+                 template="plotly_dark")
+    fig.update_layout(height=400)
+    
+    return fig
+
+# Função para resumir a escuta por país de conexão
+def calcular_resumo_paises(df, n_artistas=3):
+    """
+    Calcula minutos, reproduções, período e artistas mais ouvidos em cada país de conexão
+
+    A agregação usa os códigos categóricos de conn_country e artist_id; os nomes dos
+    países são resolvidos só no resultado, uma vez por país.
+
+    Args:
+        df: DataFrame com os dados do Spotify
+        n_artistas: Número de artistas listados por país
+
+    Returns:
+        DataFrame com codigo, pais, minutos, reproducoes, participacao, primeira,
+        ultima e top_artistas, do país mais ouvido para o menos ouvido
+    """
+    colunas = ['codigo', 'pais', 'minutos', 'reproducoes', 'participacao', 'primeira', 'ultima', 'top_artistas']
+    if 'conn_country' not in df.columns or 'conn_country' not in campos_disponiveis(df) or df['conn_country'].isna().all():
+        return pd.DataFrame(columns=colunas)
+
+    resumo = df.groupby('conn_country', observed=True).agg(
+        minutos=('minutos', 'sum'),
+        reproducoes=('minutos', 'size'),
+        primeira=('ts', 'min'),
+        ultima=('ts', 'max')
+    ).sort_values('minutos', ascending=False)
+    resumo['participacao'] = resumo['minutos'] / resumo['minutos'].sum()
+
+    # Artistas mais ouvidos de cada país (pares país/artista, sem montar nomes por linha)
+    com_artista = df.loc[df['artist_id'] >= 0, ['conn_country', 'artist_id', 'minutos']]
+    por_artista = com_artista.groupby(['conn_country', 'artist_id'], observed=True)['minutos'].sum()
+    por_artista = por_artista.sort_values(ascending=False).groupby(level=0, observed=True).head(n_artistas)
+    nomes_artistas = df['artist'].cat.categories
+    top_artistas = {
+        pais: ', '.join(nomes_artistas[grupo.index.get_level_values(1)])
+        for pais, grupo in por_artista.groupby(level=0, observed=True)
+    }
+
+    codigos = resumo.index.astype(object)
+    resumo = resumo.reset_index(drop=True)
+    resumo.insert(0, 'codigo', codigos)
+    resumo.insert(1, 'pais', [nome_pais(codigo) for codigo in codigos])
+    resumo['top_artistas'] = [top_artistas.get(codigo, '') for codigo in codigos]
+    return resumo[colunas]
+
+# Função para criar gráfico dos países mais ouvidos
+def criar_grafico_paises(df, n=10):
+    """
+    Cria um gráfico de barras com os minutos ouvidos em cada país de conexão
+
+    Args:
+        df: DataFrame com os dados do Spotify
+        n: Número de países a exibir
+
+    Returns:
+        Figura do Plotly com os países, ou None se não houver conn_country
+    """
+    resumo = calcular_resumo_paises(df, n_artistas=1).head(n)
+    if resumo.empty:
+        return None
+
+    fig = px.bar(resumo, x='pais', y='minutos',
+                 labels={'pais': 'País', 'minutos': 'Minutos'},
+                 color='minutos', color_continuous_scale='Viridis',
+                 custom_data=['reproducoes', 'participacao', 'top_artistas'],
+                 template="plotly_dark")
+    fig.update_traces(hovertemplate=(
+        "<b>%{x}</b><br>Minutos: %{y:,.0f}<br>Reproduções: %{customdata[0]:,}"
+        "<br>Participação: %{customdata[1]:.1%}<br>Mais ouvido: %{customdata[2]}<extra></extra>"
+    ))
+    fig.update_layout(height=400)
+
+    return fig
+
+# Função para criar gráfico da escuta por país ao longo do tempo
+def criar_grafico_paises_tempo(df, n=6):
+    """
+    Cria um gráfico de barras empilhadas com os minutos mensais em cada país de conexão
+
+    Os países fora dos n mais ouvidos são somados em "Outros", então o número de
+    traços não cresce com o número de países visitados.
+
+    Args:
+        df: DataFrame com os dados do Spotify
+        n: Número de países exibidos separadamente
+
+    Returns:
+        Figura do Plotly com a evolução por país, ou None se não houver conn_country
+    """
+    if 'conn_country' not in df.columns or 'conn_country' not in campos_disponiveis(df) or df['conn_country'].isna().all():
+        return None
+
+    mensal = df.groupby(['ano', 'mes', 'conn_country'], observed=True)['minutos'].sum().reset_index()
+    principais = mensal.groupby('conn_country', observed=True)['minutos'].sum().nlargest(n).index
+    codigos = mensal['conn_country'].astype(object)
+    mensal['pais'] = [nome_pais(codigo) for codigo in codigos.where(codigos.isin(principais))]
+    mensal.loc[~codigos.isin(principais), 'pais'] = "Outros"
+    mensal['periodo'] = pd.to_datetime({'year': mensal['ano'], 'month': mensal['mes'], 'day': 1})
+    mensal = mensal.groupby(['periodo', 'pais'], as_index=False)['minutos'].sum()
+
+    ordem = [nome_pais(codigo) for codigo in principais] + ["Outros"]
+    fig = px.bar(mensal, x='periodo', y='minutos', color='pais',
+                 labels={'periodo': 'Mês', 'minutos': 'Minutos', 'pais': 'País'},
+                 category_orders={'pais': ordem},
+                 template="plotly_dark")
+    fig.update_layout(height=450, barmode='stack', bargap=0.1)
+
+    return fig
 
 # Função para criar heatmap de dia da semana vs hora
 def criar_heatmap_dia_semana_hora(df):
@@ -18,39 +284,21 @@ def criar_heatmap_dia_semana_hora(df):
     Cria um heatmap que mostra a intensidade de escuta por dia da semana e hora do dia
     
     Args:
-        df: DataFrame com os dados do Spotify
+        df: DataFrame com os dados do Spotify (não é modificado)
         
     Returns:
         Figura do Plotly com o heatmap
     """
-    # Mapear dias da semana para ordem correta (começando segunda)
-    mapa_dias = {
-        'Monday': 'Segunda',
-        'Tuesday': 'Terça',
-        'Wednesday': 'Quarta',
-        'Thursday': 'Quinta',
-        'Friday': 'Sexta',
-        'Saturday': 'Sábado',
-        'Sunday': 'Domingo'
-    }
-    
     ordem_dias = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
     
-    # Criar DataFrame para o heatmap
-    df['dia_pt'] = df['diaSemana'].map(mapa_dias)
-    heatmap_data = df.groupby(['dia_pt', 'hora'])['minutos'].sum().reset_index()
-    
-    # Criar matriz para o heatmap
-    heatmap_matrix = pd.pivot_table(
-        heatmap_data, 
-        values='minutos', 
-        index='dia_pt',
-        columns='hora',
-        fill_value=0
-    )
-    
-    # Reordenar os dias da semana
-    heatmap_matrix = heatmap_matrix.reindex(ordem_dias)
+    # Somar minutos por célula (dia da semana, hora) com um único bincount
+    # O código da célula é dia * 24 + hora, obtido do minuto da semana pré-calculado
+    codigos = df['minuto_semana'].to_numpy() // 60
+    heatmap_matrix = np.bincount(
+        codigos,
+        weights=df['minutos'].to_numpy(dtype=float),
+        minlength=7 * 24
+    ).reshape(7, 24)
     
     # Criar heatmap com Plotly
     fig = px.imshow(
@@ -70,18 +318,145 @@ def criar_heatmap_dia_semana_hora(df):
         height=500
     )
     
-    # Adicionar anotações para destacar os períodos de maior atividade
-    max_valor = heatmap_matrix.max().max()
-    for i, dia in enumerate(ordem_dias):
-        for j in range(24):
-            valor = heatmap_matrix.loc[dia, j]
-            if valor > 0.7 * max_valor:
-                fig.add_annotation(
-                    x=j, y=dia,
-                    text="🔥",
-                    showarrow=False,
-                    font=dict(size=16)
-                )
+    # Destacar os períodos de maior atividade numa única camada de texto
+    linhas, colunas = np.nonzero(heatmap_matrix > 0.7 * heatmap_matrix.max())
+    fig.add_trace(
+        go.Scatter(
+            x=colunas,
+            y=[ordem_dias[i] for i in linhas],
+            mode='text',
+            text=['🔥'] * len(linhas),
+            textfont=dict(size=16),
+            hoverinfo='skip',
+            showlegend=False
+        )
+    )
+    
+    return fig
+
+# Métricas disponíveis no heatmap detalhado: (rótulo, formato do hover)
+METRICAS_HEATMAP = {
+    'minutos': ('Minutos', '%{z:.1f}'),
+    'reproducoes': ('Reproduções', '%{z:.0f}'),
+    'taxa_pulos': ('Taxa de pulos (%)', '%{z:.1f}%')
+}
+
+# Função para calcular as matrizes do heatmap detalhado
+def calcular_matrizes_horario(df, intervalo=15, metrica='minutos', faceta=None, max_facetas=10):
+    """
+    Calcula matrizes dia da semana x faixa de horário com kernels np.bincount
+    
+    Cada reprodução recebe um código inteiro (faceta, dia, faixa) a partir do minuto da
+    semana pré-calculado, e todas as células de todas as facetas são somadas de uma vez.
+    
+    Args:
+        df: DataFrame com os dados do Spotify
+        intervalo: Tamanho da faixa de horário em minutos (divisor de 1440: 5, 15, 30 ou 60)
+        metrica: 'minutos', 'reproducoes' ou 'taxa_pulos'
+        faceta: None, 'ano' ou 'artista' (top artistas por minutos)
+        max_facetas: Número máximo de facetas (anos mais recentes ou top artistas)
+        
+    Returns:
+        (ndarray, list): Matriz (facetas, 7, faixas) e os nomes das facetas (nenhuma faceta
+        quando não há reproduções)
+    """
+    faixas_por_dia = 1440 // intervalo
+    n_celulas = 7 * faixas_por_dia
+    codigos = df['minuto_semana'].to_numpy() // intervalo
+    
+    # Código da faceta de cada reprodução (-1 para reproduções fora das facetas exibidas)
+    if faceta == 'ano':
+        # Anos mais recentes; os anteriores ficam fora das facetas
+        anos_reproducoes = df['ano'].to_numpy()
+        anos = np.unique(anos_reproducoes)[-max_facetas:]
+        if len(anos) == 0:
+            return np.zeros((0, 7, faixas_por_dia)), []
+        nomes_facetas = [str(int(ano)) for ano in anos]
+        codigos_faceta = np.where(anos_reproducoes >= anos[0], np.searchsorted(anos, anos_reproducoes), -1)
+    elif faceta == 'artista':
+        # Top artistas por minutos ouvidos
+        artist_ids = df['artist_id'].to_numpy()
+        com_artista = artist_ids >= 0
+        minutos_artista = np.bincount(artist_ids[com_artista], weights=df['minutos'].to_numpy(dtype=float)[com_artista])
+        top_ids = np.argsort(-minutos_artista, kind='stable')[:max_facetas]
+        top_ids = top_ids[minutos_artista[top_ids] > 0]
+        nomes_facetas = df['artist'].cat.categories[top_ids].tolist()
+        mapa_faceta = np.full(len(minutos_artista) + 1, -1)
+        mapa_faceta[top_ids] = np.arange(len(top_ids))
+        codigos_faceta = mapa_faceta[artist_ids]  # artist_id -1 cai na última posição (-1)
+    else:
+        nomes_facetas = ['']
+        codigos_faceta = np.zeros(len(df), dtype=np.int64)
+    
+    # Descartar reproduções fora das facetas e combinar faceta e célula num só código
+    validos = codigos_faceta >= 0
+    codigos = codigos_faceta[validos] * n_celulas + codigos[validos]
+    total_celulas = len(nomes_facetas) * n_celulas
+    
+    # Somar a métrica por célula
+    if metrica == 'reproducoes':
+        valores = np.bincount(codigos, minlength=total_celulas).astype(float)
+    elif metrica == 'minutos':
+        valores = np.bincount(codigos, weights=df['minutos'].to_numpy(dtype=float)[validos], minlength=total_celulas)
+    else:
+        reproducoes = np.bincount(codigos, minlength=total_celulas)
+        puladas = np.bincount(codigos, weights=df['foi_pulado'].to_numpy(dtype=float)[validos], minlength=total_celulas)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valores = np.where(reproducoes > 0, puladas / reproducoes * 100, np.nan)
+    
+    return valores.reshape(len(nomes_facetas), 7, faixas_por_dia), nomes_facetas
+
+# Função para criar o heatmap detalhado (faixas finas e facetas)
+def criar_heatmap_detalhado(df, intervalo=15, metrica='minutos', faceta=None):
+    """
+    Cria heatmaps dia da semana x faixa de horário com granularidade e facetas configuráveis
+    
+    Args:
+        df: DataFrame com os dados do Spotify
+        intervalo: Tamanho da faixa de horário em minutos (5, 15, 30 ou 60)
+        metrica: 'minutos', 'reproducoes' ou 'taxa_pulos'
+        faceta: None, 'ano' ou 'artista'
+        
+    Returns:
+        Figura do Plotly com um heatmap por faceta, ou None se não houver dados (ou pulos,
+        para a taxa de pulos)
+    """
+    if metrica == 'taxa_pulos' and 'skipped' not in campos_disponiveis(df):
+        return None
+    matrizes, nomes_facetas = calcular_matrizes_horario(df, intervalo, metrica, faceta)
+    if len(nomes_facetas) == 0:
+        return None
+    
+    ordem_dias = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+    faixas = [f"{minuto // 60:02d}:{minuto % 60:02d}" for minuto in range(0, 1440, intervalo)]
+    rotulo_metrica, formato_hover = METRICAS_HEATMAP[metrica]
+    
+    # Uma faceta por linha de até duas colunas
+    colunas_facetas = 1 if len(nomes_facetas) == 1 else 2
+    linhas_facetas = -(-len(nomes_facetas) // colunas_facetas)
+    
+    fig = px.imshow(
+        matrizes,
+        facet_col=0,
+        facet_col_wrap=colunas_facetas,
+        facet_row_spacing=min(0.08, 0.5 / linhas_facetas),
+        labels=dict(x="Horário", y="Dia da semana", color=rotulo_metrica),
+        x=faixas,
+        y=ordem_dias,
+        color_continuous_scale='viridis',
+        aspect="auto"
+    )
+    
+    # Substituir os títulos padrão das facetas ("facet_col=0") pelos nomes
+    fig.for_each_annotation(lambda anotacao: anotacao.update(text=nomes_facetas[int(anotacao.text.split('=')[1])]))
+    fig.update_traces(hovertemplate='%{y} %{x}<br>' + rotulo_metrica + ': ' + formato_hover + '<extra></extra>')
+    
+    fig.update_layout(
+        title=f"{rotulo_metrica} por dia da semana e faixa de {intervalo} minutos",
+        coloraxis_colorbar=dict(title=rotulo_metrica),
+        height=max(400, 300 * linhas_facetas),
+        template="plotly_dark"
+    )
     
     return fig
 
@@ -258,11 +633,11 @@ def criar_comparativo_anos(df):
         penultimo_ano = anos[-2]
         
         # Top 5 artistas do último ano
-        top_artistas_ultimo = df[df['ano'] == ultimo_ano].groupby('artist')['minutos'].sum().nlargest(5).reset_index()
+        top_artistas_ultimo = df[df['ano'] == ultimo_ano].groupby('artist', observed=True)['minutos'].sum().nlargest(5).reset_index()
         top_artistas_ultimo['ano'] = ultimo_ano
         
         # Top 5 artistas do penúltimo ano
-        top_artistas_penultimo = df[df['ano'] == penultimo_ano].groupby('artist')['minutos'].sum().nlargest(5).reset_index()
+        top_artistas_penultimo = df[df['ano'] == penultimo_ano].groupby('artist', observed=True)['minutos'].sum().nlargest(5).reset_index()
         top_artistas_penultimo['ano'] = penultimo_ano
         
         # Combinar os dados
@@ -298,7 +673,7 @@ def criar_comparativo_anos(df):
     # 4. Proporção de músicas puladas (comparativo entre anos)
     dados_pie = []
     
-    for ano in anos[-2:]:  # Últimos dois anos
+    for ano in anos[-2:] if 'skipped' in campos_disponiveis(df) else []:  # Últimos dois anos
         df_ano = df[df['ano'] == ano]
         puladas = df_ano['foi_pulado'].sum()
         completas = len(df_ano) - puladas
@@ -315,18 +690,21 @@ def criar_comparativo_anos(df):
             'quantidade': completas
         })
     
-    df_pie = pd.DataFrame(dados_pie)
-    
-    fig.add_trace(
-        go.Pie(
-            labels=df_pie['status'] + ' (' + df_pie['ano'].astype(str) + ')',
-            values=df_pie['quantidade'],
-            textinfo='percent+label',
-            hole=0.4,
-            hovertemplate='%{label}<br>Quantidade: %{value}<br>Porcentagem: %{percent}<extra></extra>'
-        ),
-        row=2, col=2
-    )
+    if dados_pie:
+        df_pie = pd.DataFrame(dados_pie)
+        
+        fig.add_trace(
+            go.Pie(
+                labels=df_pie['status'] + ' (' + df_pie['ano'].astype(str) + ')',
+                values=df_pie['quantidade'],
+                textinfo='percent+label',
+                hole=0.4,
+                hovertemplate='%{label}<br>Quantidade: %{value}<br>Porcentagem: %{percent}<extra></extra>'
+            ),
+            row=2, col=2
+        )
+    else:
+        _marcar_indisponivel(fig, 3)
     
     # Atualizar layout
     fig.update_layout(
@@ -354,22 +732,115 @@ def criar_comparativo_anos(df):
     
     return fig
 
+# Granularidades das séries temporais: (nome no singular, nome no plural, formato da data)
+FREQUENCIAS_SERIE = {
+    'D': ('dia', 'dias', '%d %b %Y'),
+    'W': ('semana', 'semanas', '%d %b %Y'),
+    'M': ('mês', 'meses', '%b %Y')
+}
+
+# Número máximo de pontos enviados por série; acima disso a série é reduzida e desenhada com WebGL
+ORCAMENTO_PONTOS_SERIE = 1000
+
+# Função para reduzir a resolução de uma série preservando sua forma
+def reduzir_lttb(x, y, n_pontos):
+    """
+    Seleciona pontos de uma série com o algoritmo Largest-Triangle-Three-Buckets (LTTB)
+    
+    Args:
+        x: Array numérico crescente com as posições dos pontos
+        y: Array numérico com os valores dos pontos
+        n_pontos: Número de pontos a manter
+        
+    Returns:
+        Array com os índices dos pontos selecionados (sempre inclui o primeiro e o último)
+    """
+    n = len(x)
+    if n_pontos >= n or n_pontos < 3:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    
+    # Dividir os pontos internos em n_pontos - 2 faixas
+    limites = np.linspace(1, n - 1, n_pontos - 1).astype(np.int64)
+    
+    indices = np.empty(n_pontos, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    
+    anterior = 0
+    for i in range(n_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        
+        # Média da próxima faixa (ou o último ponto, na última faixa)
+        proximo_fim = limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[fim:proximo_fim].mean()
+        media_y = y[fim:proximo_fim].mean()
+        
+        # Escolher o ponto da faixa que forma o maior triângulo com o anterior e a média seguinte
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    
+    return indices
+
+# Função para criar o traço de uma série temporal
+def criar_traco_serie(x, y, orcamento=ORCAMENTO_PONTOS_SERIE, **kwargs):
+    """
+    Cria o traço de uma série temporal respeitando um orçamento de pontos
+    
+    Até o orçamento, usa go.Scatter com todos os pontos. Acima dele, reduz a série com
+    LTTB e usa go.Scattergl (WebGL), mantendo limitados o JSON da figura e o tempo de
+    desenho no navegador.
+    
+    Args:
+        x: Datas (ou posições) dos pontos
+        y: Valores dos pontos
+        orcamento: Número máximo de pontos enviados
+        **kwargs: Demais argumentos do traço (mode, name, line, hovertemplate...)
+        
+    Returns:
+        Traço go.Scatter ou go.Scattergl
+    """
+    x = pd.Series(x).reset_index(drop=True)
+    y = pd.Series(y).reset_index(drop=True)
+    
+    if len(x) <= orcamento:
+        return go.Scatter(x=x, y=y, **kwargs)
+    
+    # Converter datas em segundos para o cálculo das áreas
+    if pd.api.types.is_datetime64_any_dtype(x):
+        posicoes = (x - x.iloc[0]).dt.total_seconds().to_numpy()
+    else:
+        posicoes = x.to_numpy(dtype=float)
+    
+    indices = reduzir_lttb(posicoes, y.to_numpy(dtype=float), orcamento)
+    return go.Scattergl(x=x.iloc[indices], y=y.iloc[indices], **kwargs)
+
 # Função para criar gráficos de evolução comparativos
-def criar_graficos_evolucao(df):
+def criar_graficos_evolucao(df, frequencia='M', orcamento_pontos=ORCAMENTO_PONTOS_SERIE):
     """
     Cria gráficos de evolução comparativos ao longo do tempo
     
     Args:
         df: DataFrame com os dados do Spotify
+        frequencia: Granularidade das séries ('D', 'W' ou 'M')
+        orcamento_pontos: Número máximo de pontos por série antes de reduzir a resolução
         
     Returns:
         Figura do Plotly com os gráficos de evolução
     """
+    singular, plural, formato_data = FREQUENCIAS_SERIE[frequencia]
+    
     # Criar figura com subplots
     fig = make_subplots(
         rows=2, cols=2,
         subplot_titles=(
-            "Evolução mensal de escuta",
+            f"Evolução de escuta por {singular}",
             "Evolução de artistas favoritos",
             "Evolução da proporção online/offline",
             "Evolução de músicas puladas vs. completas"
@@ -382,44 +853,46 @@ def criar_graficos_evolucao(df):
         horizontal_spacing=0.1
     )
     
-    # 1. Evolução mensal de escuta
-    df_mensal = df.groupby(df['ts'].dt.to_period('M')).agg({'minutos':'sum'}).reset_index()
-    df_mensal['ts'] = df_mensal['ts'].dt.to_timestamp()
+    # 1. Evolução de escuta por período
+    df_periodo = df.groupby(df['ts'].dt.to_period(frequencia)).agg({'minutos':'sum'}).reset_index()
+    df_periodo['ts'] = df_periodo['ts'].dt.to_timestamp()
     
-    # Adicionar média móvel de 3 meses
-    df_mensal['media_movel'] = df_mensal['minutos'].rolling(window=3, min_periods=1).mean()
+    # Adicionar média móvel de 3 períodos
+    df_periodo['media_movel'] = df_periodo['minutos'].rolling(window=3, min_periods=1).mean()
     
     fig.add_trace(
-        go.Scatter(
-            x=df_mensal['ts'],
-            y=df_mensal['minutos'],
+        criar_traco_serie(
+            x=df_periodo['ts'],
+            y=df_periodo['minutos'],
             mode='lines+markers',
-            name='Minutos por mês',
+            name=f'Minutos por {singular}',
             line=dict(color='rgba(0, 180, 216, 0.8)', width=1),
             marker=dict(size=6, color='rgba(0, 180, 216, 1)'),
-            hovertemplate='Data: %{x|%b %Y}<br>Minutos: %{y:.1f}<extra></extra>'
+            hovertemplate='Data: %{x|' + formato_data + '}<br>Minutos: %{y:.1f}<extra></extra>',
+            orcamento=orcamento_pontos
         ),
         row=1, col=1
     )
     
     fig.add_trace(
-        go.Scatter(
-            x=df_mensal['ts'],
-            y=df_mensal['media_movel'],
+        criar_traco_serie(
+            x=df_periodo['ts'],
+            y=df_periodo['media_movel'],
             mode='lines',
-            name='Média móvel (3 meses)',
+            name=f'Média móvel (3 {plural})',
             line=dict(color='rgba(255, 209, 102, 1)', width=3),
-            hovertemplate='Data: %{x|%b %Y}<br>Média: %{y:.1f}<extra></extra>'
+            hovertemplate='Data: %{x|' + formato_data + '}<br>Média: %{y:.1f}<extra></extra>',
+            orcamento=orcamento_pontos
         ),
         row=1, col=1
     )
     
     # 2. Evolução de artistas favoritos
     # Identificar top 3 artistas de todos os tempos
-    top_artistas = df.groupby('artist')['minutos'].sum().nlargest(3).index.tolist()
+    top_artistas = df.groupby('artist', observed=True)['minutos'].sum().nlargest(3).index.tolist()
     
     # Agrupar por mês e artista
-    df_artistas_mes = df[df['artist'].isin(top_artistas)].groupby([df['ts'].dt.to_period('M'), 'artist']).agg({'minutos':'sum'}).reset_index()
+    df_artistas_mes = df[df['artist'].isin(top_artistas)].groupby([df['ts'].dt.to_period(frequencia), 'artist'], observed=True).agg({'minutos':'sum'}).reset_index()
     df_artistas_mes['ts'] = df_artistas_mes['ts'].dt.to_timestamp()
     
     # Adicionar linhas para cada artista
@@ -427,99 +900,112 @@ def criar_graficos_evolucao(df):
         df_artista = df_artistas_mes[df_artistas_mes['artist'] == artista]
         
         fig.add_trace(
-            go.Scatter(
+            criar_traco_serie(
                 x=df_artista['ts'],
                 y=df_artista['minutos'],
                 mode='lines+markers',
                 name=artista,
-                hovertemplate='Data: %{x|%b %Y}<br>Artista: ' + artista + '<br>Minutos: %{y:.1f}<extra></extra>'
+                hovertemplate='Data: %{x|' + formato_data + '}<br>Artista: ' + artista + '<br>Minutos: %{y:.1f}<extra></extra>',
+                orcamento=orcamento_pontos
             ),
             row=1, col=2
         )
     
-    # 3. Evolução da proporção online/offline
-    df_online_mes = df.groupby([df['ts'].dt.to_period('M'), 'offline']).size().reset_index()
-    df_online_mes['ts'] = df_online_mes['ts'].dt.to_timestamp()
-    df_online_mes.columns = ['ts', 'offline', 'contagem']
+    disponiveis = campos_disponiveis(df)
     
-    # Calcular proporção
-    total_por_mes = df_online_mes.groupby('ts')['contagem'].sum().reset_index()
-    df_online_mes = pd.merge(df_online_mes, total_por_mes, on='ts', suffixes=('', '_total'))
-    df_online_mes['proporcao'] = df_online_mes['contagem'] / df_online_mes['contagem_total']
-    
-    # Filtrar apenas offline=True
-    df_offline = df_online_mes[df_online_mes['offline'] == True]
-    
-    fig.add_trace(
-        go.Scatter(
-            x=df_offline['ts'],
-            y=df_offline['proporcao'] * 100,
-            mode='lines+markers',
-            name='% Offline',
-            line=dict(color='rgba(255, 99, 132, 0.8)', width=2),
-            marker=dict(size=6, color='rgba(255, 99, 132, 1)'),
-            hovertemplate='Data: %{x|%b %Y}<br>Offline: %{y:.1f}%<extra></extra>'
-        ),
-        row=2, col=1
-    )
-    
-    # Adicionar linha para online (complemento)
-    df_online = df_online_mes[df_online_mes['offline'] == False]
-    
-    fig.add_trace(
-        go.Scatter(
-            x=df_online['ts'],
-            y=df_online['proporcao'] * 100,
-            mode='lines+markers',
-            name='% Online',
-            line=dict(color='rgba(54, 162, 235, 0.8)', width=2),
-            marker=dict(size=6, color='rgba(54, 162, 235, 1)'),
-            hovertemplate='Data: %{x|%b %Y}<br>Online: %{y:.1f}%<extra></extra>'
-        ),
-        row=2, col=1
-    )
+    # 3. Evolução da proporção online/offline
+    if 'offline' in disponiveis:
+        df_online_mes = df.groupby([df['ts'].dt.to_period(frequencia), 'offline']).size().reset_index()
+        df_online_mes['ts'] = df_online_mes['ts'].dt.to_timestamp()
+        df_online_mes.columns = ['ts', 'offline', 'contagem']
+        
+        # Calcular proporção
+        total_por_mes = df_online_mes.groupby('ts')['contagem'].sum().reset_index()
+        df_online_mes = pd.merge(df_online_mes, total_por_mes, on='ts', suffixes=('', '_total'))
+        df_online_mes['proporcao'] = df_online_mes['contagem'] / df_online_mes['contagem_total']
+        
+        # Filtrar apenas offline=True
+        df_offline = df_online_mes[df_online_mes['offline'] == True]
+        
+        fig.add_trace(
+            criar_traco_serie(
+                x=df_offline['ts'],
+                y=df_offline['proporcao'] * 100,
+                mode='lines+markers',
+                name='% Offline',
+                line=dict(color='rgba(255, 99, 132, 0.8)', width=2),
+                marker=dict(size=6, color='rgba(255, 99, 132, 1)'),
+                hovertemplate='Data: %{x|' + formato_data + '}<br>Offline: %{y:.1f}%<extra></extra>',
+                orcamento=orcamento_pontos
+            ),
+            row=2, col=1
+        )
+        
+        # Adicionar linha para online (complemento)
+        df_online = df_online_mes[df_online_mes['offline'] == False]
+        
+        fig.add_trace(
+            criar_traco_serie(
+                x=df_online['ts'],
+                y=df_online['proporcao'] * 100,
+                mode='lines+markers',
+                name='% Online',
+                line=dict(color='rgba(54, 162, 235, 0.8)', width=2),
+                marker=dict(size=6, color='rgba(54, 162, 235, 1)'),
+                hovertemplate='Data: %{x|' + formato_data + '}<br>Online: %{y:.1f}%<extra></extra>',
+                orcamento=orcamento_pontos
+            ),
+            row=2, col=1
+        )
+    else:
+        _marcar_indisponivel(fig, 2)
     
     # 4. Evolução de músicas puladas vs. completas
-    df_puladas_mes = df.groupby([df['ts'].dt.to_period('M'), 'foi_pulado']).size().reset_index()
-    df_puladas_mes['ts'] = df_puladas_mes['ts'].dt.to_timestamp()
-    df_puladas_mes.columns = ['ts', 'foi_pulado', 'contagem']
-    
-    # Calcular proporção
-    total_por_mes = df_puladas_mes.groupby('ts')['contagem'].sum().reset_index()
-    df_puladas_mes = pd.merge(df_puladas_mes, total_por_mes, on='ts', suffixes=('', '_total'))
-    df_puladas_mes['proporcao'] = df_puladas_mes['contagem'] / df_puladas_mes['contagem_total']
-    
-    # Filtrar apenas puladas=True
-    df_puladas = df_puladas_mes[df_puladas_mes['foi_pulado'] == True]
-    
-    fig.add_trace(
-        go.Scatter(
-            x=df_puladas['ts'],
-            y=df_puladas['proporcao'] * 100,
-            mode='lines+markers',
-            name='% Puladas',
-            line=dict(color='rgba(255, 159, 64, 0.8)', width=2),
-            marker=dict(size=6, color='rgba(255, 159, 64, 1)'),
-            hovertemplate='Data: %{x|%b %Y}<br>Puladas: %{y:.1f}%<extra></extra>'
-        ),
-        row=2, col=2
-    )
-    
-    # Adicionar linha para completas (complemento)
-    df_completas = df_puladas_mes[df_puladas_mes['foi_pulado'] == False]
-    
-    fig.add_trace(
-        go.Scatter(
-            x=df_completas['ts'],
-            y=df_completas['proporcao'] * 100,
-            mode='lines+markers',
-            name='% Completas',
-            line=dict(color='rgba(75, 192, 192, 0.8)', width=2),
-            marker=dict(size=6, color='rgba(75, 192, 192, 1)'),
-            hovertemplate='Data: %{x|%b %Y}<br>Completas: %{y:.1f}%<extra></extra>'
-        ),
-        row=2, col=2
-    )
+    if 'skipped' in disponiveis:
+        df_puladas_mes = df.groupby([df['ts'].dt.to_period(frequencia), 'foi_pulado']).size().reset_index()
+        df_puladas_mes['ts'] = df_puladas_mes['ts'].dt.to_timestamp()
+        df_puladas_mes.columns = ['ts', 'foi_pulado', 'contagem']
+        
+        # Calcular proporção
+        total_por_mes = df_puladas_mes.groupby('ts')['contagem'].sum().reset_index()
+        df_puladas_mes = pd.merge(df_puladas_mes, total_por_mes, on='ts', suffixes=('', '_total'))
+        df_puladas_mes['proporcao'] = df_puladas_mes['contagem'] / df_puladas_mes['contagem_total']
+        
+        # Filtrar apenas puladas=True
+        df_puladas = df_puladas_mes[df_puladas_mes['foi_pulado'] == True]
+        
+        fig.add_trace(
+            criar_traco_serie(
+                x=df_puladas['ts'],
+                y=df_puladas['proporcao'] * 100,
+                mode='lines+markers',
+                name='% Puladas',
+                line=dict(color='rgba(255, 159, 64, 0.8)', width=2),
+                marker=dict(size=6, color='rgba(255, 159, 64, 1)'),
+                hovertemplate='Data: %{x|' + formato_data + '}<br>Puladas: %{y:.1f}%<extra></extra>',
+                orcamento=orcamento_pontos
+            ),
+            row=2, col=2
+        )
+        
+        # Adicionar linha para completas (complemento)
+        df_completas = df_puladas_mes[df_puladas_mes['foi_pulado'] == False]
+        
+        fig.add_trace(
+            criar_traco_serie(
+                x=df_completas['ts'],
+                y=df_completas['proporcao'] * 100,
+                mode='lines+markers',
+                name='% Completas',
+                line=dict(color='rgba(75, 192, 192, 0.8)', width=2),
+                marker=dict(size=6, color='rgba(75, 192, 192, 1)'),
+                hovertemplate='Data: %{x|' + formato_data + '}<br>Completas: %{y:.1f}%<extra></extra>',
+                orcamento=orcamento_pontos
+            ),
+            row=2, col=2
+        )
+    else:
+        _marcar_indisponivel(fig, 3)
     
     # Atualizar layout
     fig.update_layout(
@@ -550,6 +1036,78 @@ def criar_graficos_evolucao(df):
     
     return fig
 
+# Função para encontrar músicas tocadas antes/depois
+def encontrar_musicas_sequencia(df, musica_selecionada, direcao='depois', top_n=10):
+    """
+    Encontra as músicas mais tocadas antes ou depois de uma música específica
+    
+    Args:
+        df: DataFrame com os dados
+        musica_selecionada: Nome da música selecionada
+        direcao: 'antes' ou 'depois'
+        top_n: Número de músicas a retornar
+        
+    Returns:
+        DataFrame com as músicas mais frequentes na sequência
+    """
+    # Ordenar por timestamp e trabalhar com os códigos inteiros das faixas
+    df_ordenado = df.sort_values('ts', kind='stable')
+    codigos = df_ordenado['track_id'].to_numpy()
+    
+    categorias = df_ordenado['track'].cat.categories
+    if musica_selecionada not in categorias:
+        return pd.DataFrame(columns=['track', 'artist', 'contagem'])
+    
+    # Encontrar posições da música selecionada
+    posicoes = np.flatnonzero(codigos == categorias.get_loc(musica_selecionada))
+    
+    # Encontrar posições da próxima ou anterior música
+    if direcao == 'depois':
+        vizinhas = posicoes + 1
+        vizinhas = vizinhas[vizinhas < len(codigos)]
+    else:
+        vizinhas = posicoes - 1
+        vizinhas = vizinhas[vizinhas >= 0]
+    
+    # Ignorar reproduções sem faixa (podcasts, por exemplo)
+    codigos_sequencia = codigos[vizinhas]
+    codigos_sequencia = codigos_sequencia[codigos_sequencia >= 0]
+    
+    if len(codigos_sequencia) == 0:
+        return pd.DataFrame(columns=['track', 'artist', 'contagem'])
+    
+    # Contar frequência de cada faixa e ordenar por contagem
+    contagem = np.bincount(codigos_sequencia)
+    top_codigos = np.argsort(-contagem, kind='stable')[:top_n]
+    top_codigos = top_codigos[contagem[top_codigos] > 0]
+    
+    return pd.DataFrame({
+        'track': categorias[top_codigos].tolist(),
+        'artist': artistas_das_faixas(df_ordenado, top_codigos),
+        'contagem': contagem[top_codigos]
+    })
+
+# Função para buscar músicas por artista
+def buscar_musicas_por_artista(df, artista):
+    """
+    Busca músicas de um artista específico
+    
+    Args:
+        df: DataFrame com os dados
+        artista: Nome do artista
+        
+    Returns:
+        DataFrame com as músicas do artista ordenadas por tempo de escuta
+    """
+    # Filtrar por artista
+    df_artista = df[df['artist'] == artista]
+    
+    # Agrupar por música e somar minutos
+    musicas_artista = df_artista.groupby(['track', 'artist'], observed=True)['minutos'].sum().reset_index()
+    
+    # Ordenar por tempo de escuta
+    return musicas_artista.sort_values('minutos', ascending=False)
+
 # Função para gerar recomendações baseadas em padrões
 def gerar_recomendacoes(df):
     """
@@ -559,54 +1117,56 @@ def gerar_recomendacoes(df):
         df: DataFrame com os dados do Spotify
         
     Returns:
-        Dicionário com recomendações de artistas e músicas
+        Dicionário com recomendações de artistas e músicas (as baseadas em pulos ficam
+        vazias quando o formato lido não informa os pulos)
     """
     recomendacoes = {}
+    com_pulos = 'skipped' in campos_disponiveis(df)
     
     # 1. Artistas que você ouve pouco, mas gosta (alta taxa de conclusão)
     # Filtrar artistas com pelo menos 5 reproduções
-    contagem_por_artista = df.groupby('artist').size()
+    contagem_por_artista = df.groupby('artist', observed=True).size()
     artistas_validos = contagem_por_artista[contagem_por_artista >= 5].index
     
     # Calcular taxa de conclusão por artista
-    df_artistas = df[df['artist'].isin(artistas_validos)].copy()
-    taxa_conclusao = df_artistas.groupby('artist')['foi_pulado'].apply(lambda x: 1 - x.mean()).reset_index()
+    df_artistas = df[df['artist'].isin(artistas_validos)]
+    taxa_conclusao = df_artistas.groupby('artist', observed=True)['foi_pulado'].apply(lambda x: 1 - x.mean()).reset_index()
     taxa_conclusao.columns = ['artist', 'taxa_conclusao']
     
     # Adicionar contagem de reproduções
-    taxa_conclusao['reproducoes'] = df_artistas.groupby('artist').size().values
+    taxa_conclusao['reproducoes'] = df_artistas.groupby('artist', observed=True).size().values
     
     # Ordenar por taxa de conclusão (decrescente) e reproduções (crescente)
     taxa_conclusao = taxa_conclusao.sort_values(['taxa_conclusao', 'reproducoes'], ascending=[False, True])
     
     # Selecionar top 5 artistas com alta taxa de conclusão e poucas reproduções
-    artistas_recomendados = taxa_conclusao.head(5)['artist'].tolist()
+    artistas_recomendados = taxa_conclusao.head(5)['artist'].tolist() if com_pulos else []
     recomendacoes['artistas_pouco_ouvidos'] = artistas_recomendados
     
     # 2. Músicas que você sempre ouve até o fim
     # Filtrar músicas com pelo menos 3 reproduções
-    contagem_por_musica = df.groupby('track').size()
+    contagem_por_musica = df.groupby('track', observed=True).size()
     musicas_validas = contagem_por_musica[contagem_por_musica >= 3].index
     
     # Calcular taxa de conclusão por música
-    df_musicas = df[df['track'].isin(musicas_validas)].copy()
-    taxa_conclusao_musica = df_musicas.groupby('track')['foi_pulado'].apply(lambda x: 1 - x.mean()).reset_index()
+    df_musicas = df[df['track'].isin(musicas_validas)]
+    taxa_conclusao_musica = df_musicas.groupby('track', observed=True)['foi_pulado'].apply(lambda x: 1 - x.mean()).reset_index()
     taxa_conclusao_musica.columns = ['track', 'taxa_conclusao']
     
     # Adicionar artista
-    df_musicas_artistas = df_musicas.groupby('track')['artist'].first().reset_index()
+    df_musicas_artistas = df_musicas.groupby('track', observed=True)['artist'].first().reset_index()
     taxa_conclusao_musica = pd.merge(taxa_conclusao_musica, df_musicas_artistas, on='track')
     
     # Ordenar por taxa de conclusão (decrescente)
     taxa_conclusao_musica = taxa_conclusao_musica.sort_values('taxa_conclusao', ascending=False)
     
     # Selecionar top 5 músicas com alta taxa de conclusão
-    musicas_recomendadas = taxa_conclusao_musica.head(5)[['track', 'artist']].values.tolist()
+    musicas_recomendadas = taxa_conclusao_musica.head(5)[['track', 'artist']].values.tolist() if com_pulos else []
     recomendacoes['musicas_favoritas'] = musicas_recomendadas
     
     # 3. Artistas similares aos seus favoritos
     # Identificar top 3 artistas
-    top_artistas = df.groupby('artist')['minutos'].sum().nlargest(3).index.tolist()
+    top_artistas = df.groupby('artist', observed=True)['minutos'].sum().nlargest(3).index.tolist()
     
     # Simular recomendações de artistas similares (em um sistema real, usaríamos dados de similaridade)
     artistas_similares = {
@@ -621,7 +1181,7 @@ def gerar_recomendacoes(df):
     horario_favorito = df.groupby('hora')['minutos'].sum().idxmax()
     
     # Identificar artistas mais ouvidos nesse horário
-    artistas_horario = df[df['hora'] == horario_favorito].groupby('artist')['minutos'].sum().nlargest(3).index.tolist()
+    artistas_horario = df[df['hora'] == horario_favorito].groupby('artist', observed=True)['minutos'].sum().nlargest(3).index.tolist()
     
     recomendacoes['artistas_horario_favorito'] = {
         'horario': int(horario_favorito),
@@ -633,7 +1193,7 @@ def gerar_recomendacoes(df):
     dia_favorito = df.groupby('diaSemana')['minutos'].sum().idxmax()
     
     # Identificar artistas mais ouvidos nesse dia
-    artistas_dia = df[df['diaSemana'] == dia_favorito].groupby('artist')['minutos'].sum().nlargest(3).index.tolist()
+    artistas_dia = df[df['diaSemana'] == dia_favorito].groupby('artist', observed=True)['minutos'].sum().nlargest(3).index.tolist()
     
     recomendacoes['artistas_dia_favorito'] = {
         'dia': dia_favorito,
@@ -653,6 +1213,9 @@ def visualizar_recomendacoes(recomendacoes):
     Returns:
         None (exibe diretamente no Streamlit)
     """
+    # Importado aqui para que as análises possam rodar sem o Streamlit (análise em lote)
+    import streamlit as st
+    
     st.subheader("🎯 Recomendações Personalizadas")
     
     # Criar abas para diferentes tipos de recomendações
@@ -663,7 +1226,9 @@ def visualizar_recomendacoes(recomendacoes):
         st.markdown("Você parece gostar destes artistas, mas os ouve pouco:")
         
         # Exibir artistas pouco ouvidos em cards
-        cols = st.columns(len(recomendacoes['artistas_pouco_ouvidos']))
+        if not recomendacoes['artistas_pouco_ouvidos']:
+            st.info(f"Baseado nos pulos: {AVISO_INDISPONIVEL}.")
+        cols = st.columns(max(len(recomendacoes['artistas_pouco_ouvidos']), 1))
         for i, artista in enumerate(recomendacoes['artistas_pouco_ouvidos']):
             with cols[i]:
                 st.markdown(f"""
@@ -694,6 +1259,8 @@ def visualizar_recomendacoes(recomendacoes):
         st.markdown("Estas músicas parecem ser suas favoritas, pois você raramente as pula:")
         
         # Exibir músicas favoritas em uma tabela estilizada
+        if not recomendacoes['musicas_favoritas']:
+            st.info(f"Baseado nos pulos: {AVISO_INDISPONIVEL}.")
         for i, (musica, artista) in enumerate(recomendacoes['musicas_favoritas']):
             st.markdown(f"""
             <div style="padding: 10px; margin-bottom: 10px; border-radius: 10px; background-color: rgba(75, 192, 192, 0.1); border: 1px solid rgba(75, 192, 192, 0.3);">
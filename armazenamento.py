@@ -0,0 +1,265 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Tempo sem acesso após o qual a pasta de uma sessão é removida (2 horas)
+TTL_PADRAO_SEGUNDOS = 2 * 60 * 60
+
+# Espaço máximo ocupado por todas as pastas de envio (2 GB)
+COTA_PADRAO_BYTES = 2 * 1024 ** 3
+
+# Intervalo entre as varreduras em segundo plano
+INTERVALO_VARREDURA_SEGUNDOS = 60
+
+# Prefixo das pastas criadas pelo armazenamento
+PREFIXO_PASTA = 'envio_'
+
+# Função para calcular o tamanho de uma pasta
+def _tamanho_pasta(pasta):
+    """
+    Calcula o espaço ocupado pelos arquivos de uma pasta (recursivamente)
+
+    Args:
+        pasta: Caminho da pasta
+
+    Returns:
+        Tamanho em bytes (0 se a pasta não existir)
+    """
+    total = 0
+    for raiz, _, arquivos in os.walk(pasta):
+        for arquivo in arquivos:
+            try:
+                total += os.path.getsize(os.path.join(raiz, arquivo))
+            except OSError:
+                pass
+    return total
+
+class ArmazenamentoEnvios:
+    """
+    Pastas temporárias dos dados enviados, com dono, validade e cota de disco
+
+    Cada sessão tem no máximo uma pasta. Pastas sem acesso há mais de ttl_segundos são
+    removidas por uma thread em segundo plano e, quando o espaço total passa da cota,
+    as pastas usadas há mais tempo são removidas primeiro (LRU). Pastas deixadas por
+    execuções anteriores do servidor também são removidas quando expiram.
+    """
+
+    def __init__(self, raiz=None, ttl_segundos=TTL_PADRAO_SEGUNDOS, cota_bytes=COTA_PADRAO_BYTES,
+                 intervalo_varredura=INTERVALO_VARREDURA_SEGUNDOS):
+        """
+        Args:
+            raiz: Pasta onde as pastas de envio são criadas (padrão: subpasta do diretório temporário)
+            ttl_segundos: Tempo sem acesso após o qual uma pasta é removida
+            cota_bytes: Espaço máximo ocupado por todas as pastas
+            intervalo_varredura: Intervalo entre as varreduras (None para não iniciar a thread)
+        """
+        self.raiz = raiz or os.path.join(tempfile.gettempdir(), 'spotify_analytics_envios')
+        self.ttl_segundos = ttl_segundos
+        self.cota_bytes = cota_bytes
+        os.makedirs(self.raiz, exist_ok=True)
+
+        self._trava = threading.RLock()
+        # id da sessão -> {'pasta', 'bytes', 'ultimo_acesso'}, do uso mais antigo ao mais recente
+        self._pastas = OrderedDict()
+        self._metricas = {
+            'pastas_criadas': 0,
+            'removidas_pelo_usuario': 0,
+            'removidas_por_validade': 0,
+            'removidas_por_cota': 0,
+            'removidas_orfas': 0,
+            'bytes_recuperados': 0,
+            'varreduras': 0
+        }
+
+        self._parar = threading.Event()
+        if intervalo_varredura:
+            self._thread = threading.Thread(
+                target=self._varrer_periodicamente,
+                args=(intervalo_varredura,),
+                name='varredura-envios',
+                daemon=True
+            )
+            self._thread.start()
+
+    def criar_pasta(self, id_sessao, bytes_previstos=0):
+        """
+        Cria a pasta de envio de uma sessão, removendo a anterior se houver
+
+        O espaço previsto é reservado antes de qualquer arquivo ser gravado: se não cabe
+        na cota, a pasta não é criada; se cabe, as pastas de outras sessões usadas há mais
+        tempo são removidas até sobrar espaço. registrar_tamanho troca a reserva pelo
+        tamanho real depois da gravação.
+
+        Args:
+            id_sessao: Identificador da sessão dona da pasta
+            bytes_previstos: Limite superior do espaço que os arquivos vão ocupar
+
+        Returns:
+            Caminho da nova pasta, ou None se o espaço previsto passa da cota
+        """
+        with self._trava:
+            self._remover(id_sessao, 'removidas_pelo_usuario')
+            if bytes_previstos > self.cota_bytes:
+                return None
+
+            # Remover as pastas menos usadas recentemente até a reserva caber na cota
+            while self._pastas and self.bytes_em_uso() + bytes_previstos > self.cota_bytes:
+                self._remover(next(iter(self._pastas)), 'removidas_por_cota')
+
+            pasta = tempfile.mkdtemp(prefix=PREFIXO_PASTA, dir=self.raiz)
+            self._pastas[id_sessao] = {'pasta': pasta, 'bytes': bytes_previstos, 'ultimo_acesso': time.time()}
+            self._metricas['pastas_criadas'] += 1
+            return pasta
+
+    def registrar_tamanho(self, id_sessao):
+        """
+        Atualiza o tamanho da pasta de uma sessão e aplica a cota de disco
+
+        Deve ser chamada depois que os arquivos forem gravados. Se a cota for excedida,
+        as pastas de outras sessões usadas há mais tempo são removidas.
+
+        Args:
+            id_sessao: Identificador da sessão
+
+        Returns:
+            True se a pasta cabe na cota; False se ela sozinha passa da cota (e foi removida)
+        """
+        with self._trava:
+            registro = self._pastas.get(id_sessao)
+            if registro is None:
+                return False
+            registro['bytes'] = _tamanho_pasta(registro['pasta'])
+
+            if registro['bytes'] > self.cota_bytes:
+                self._remover(id_sessao, 'removidas_por_cota')
+                return False
+
+            # Remover as pastas menos usadas recentemente até caber na cota
+            while self.bytes_em_uso() > self.cota_bytes:
+                mais_antiga = next(chave for chave in self._pastas if chave != id_sessao)
+                self._remover(mais_antiga, 'removidas_por_cota')
+
+            return True
+
+    def acessar(self, id_sessao):
+        """
+        Registra um acesso à pasta de uma sessão, renovando a validade
+
+        Args:
+            id_sessao: Identificador da sessão
+
+        Returns:
+            Caminho da pasta, ou None se ela não existir mais (expirada ou removida pela cota)
+        """
+        with self._trava:
+            registro = self._pastas.get(id_sessao)
+            if registro is None or not os.path.isdir(registro['pasta']):
+                self._pastas.pop(id_sessao, None)
+                return None
+            registro['ultimo_acesso'] = time.time()
+            self._pastas.move_to_end(id_sessao)
+            return registro['pasta']
+
+    def liberar(self, id_sessao):
+        """
+        Remove a pasta de uma sessão a pedido do usuário
+
+        Args:
+            id_sessao: Identificador da sessão
+        """
+        with self._trava:
+            self._remover(id_sessao, 'removidas_pelo_usuario')
+
+    def varrer(self):
+        """
+        Remove as pastas expiradas e as pastas órfãs (sem dono) mais antigas que a validade
+        """
+        limite = time.time() - self.ttl_segundos
+        with self._trava:
+            for id_sessao in [chave for chave, registro in self._pastas.items() if registro['ultimo_acesso'] < limite]:
+                self._remover(id_sessao, 'removidas_por_validade')
+
+            # Pastas deixadas por execuções anteriores do servidor
+            conhecidas = {registro['pasta'] for registro in self._pastas.values()}
+            for nome in os.listdir(self.raiz):
+                pasta = os.path.join(self.raiz, nome)
+                if not nome.startswith(PREFIXO_PASTA) or pasta in conhecidas:
+                    continue
+                try:
+                    if os.path.getmtime(pasta) < limite:
+                        self._apagar(pasta, 'removidas_orfas')
+                except OSError:
+                    pass
+
+            self._metricas['varreduras'] += 1
+
+    def bytes_em_uso(self):
+        """
+        Returns:
+            Espaço ocupado pelas pastas registradas, em bytes
+        """
+        with self._trava:
+            return sum(registro['bytes'] for registro in self._pastas.values())
+
+    def obter_metricas(self):
+        """
+        Obtém as métricas do armazenamento
+
+        Returns:
+            Dicionário com contadores de pastas criadas e removidas, bytes recuperados e uso atual
+        """
+        with self._trava:
+            return dict(
+                self._metricas,
+                pastas_ativas=len(self._pastas),
+                bytes_em_uso=self.bytes_em_uso(),
+                cota_bytes=self.cota_bytes
+            )
+
+    def encerrar(self):
+        """
+        Interrompe a thread de varredura
+        """
+        self._parar.set()
+
+    def _remover(self, id_sessao, motivo):
+        """
+        Remove a pasta registrada de uma sessão (chamada com a trava adquirida)
+
+        Args:
+            id_sessao: Identificador da sessão
+            motivo: Nome do contador de remoções a incrementar
+        """
+        registro = self._pastas.pop(id_sessao, None)
+        if registro is not None:
+            self._apagar(registro['pasta'], motivo)
+
+    def _apagar(self, pasta, motivo):
+        """
+        Apaga uma pasta do disco e contabiliza o espaço recuperado
+
+        Args:
+            pasta: Caminho da pasta
+            motivo: Nome do contador de remoções a incrementar
+        """
+        tamanho = _tamanho_pasta(pasta)
+        shutil.rmtree(pasta, ignore_errors=True)
+        self._metricas[motivo] += 1
+        self._metricas['bytes_recuperados'] += tamanho
+
+    def _varrer_periodicamente(self, intervalo):
+        """
+        Laço da thread de varredura
+
+        Args:
+            intervalo: Segundos entre as varreduras
+        """
+        while not self._parar.wait(intervalo):
+            try:
+                self.varrer()
+            except Exception:
+                # A varredura nunca deve derrubar a thread; a próxima tenta de novo
+                pass
@@ -0,0 +1,256 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+from carregamento import ler_dados
+from leitores import ler_arquivo, decodificador_tipado_disponivel
+from esbocos import resumir_exportacao
+from gerador_sintetico import gravar_exportacao
+from analises_avancadas import (
+    criar_grafico_top,
+    criar_grafico_pulos,
+    criar_grafico_dispositivos,
+    criar_heatmap_dia_semana_hora,
+    calcular_matrizes_horario,
+    criar_heatmap_detalhado,
+    criar_paleta_horarios,
+    criar_comparativo_anos,
+    criar_graficos_evolucao,
+    reduzir_lttb,
+    gerar_recomendacoes,
+    encontrar_musicas_sequencia,
+    buscar_musicas_por_artista
+)
+
+# Os agrupamentos por período descartam o fuso de 'ts' de propósito; o aviso só polui a saída
+warnings.filterwarnings('ignore', message='Converting to PeriodArray/Index representation will drop timezone information')
+
+# Escalas dos conjuntos sintéticos (número de reproduções)
+ESCALAS = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000
+}
+
+# Versão do gerador: mudar sempre que os dados sintéticos mudarem, para não comparar conjuntos diferentes
+VERSAO_DADOS = 2
+
+# Reproduções por arquivo JSON gerado
+REPRODUCOES_POR_ARQUIVO = 500_000
+
+# Tolerância padrão antes de considerar uma medição como regressão (20% mais lenta)
+TOLERANCIA_PADRAO = 0.2
+
+# Função para preparar a pasta de uma escala
+def preparar_conjunto(pasta_raiz, escala):
+    """
+    Gera (uma única vez) os arquivos JSON de uma escala no formato lido pelo carregamento
+
+    Args:
+        pasta_raiz: Pasta onde os conjuntos sintéticos são guardados
+        escala: Chave de ESCALAS
+
+    Returns:
+        Caminho da pasta do conjunto (com a subpasta 'data')
+    """
+    pasta = os.path.join(pasta_raiz, f"{escala}_v{VERSAO_DADOS}")
+    marcador = os.path.join(pasta, 'completo')
+    if os.path.exists(marcador):
+        return pasta
+
+    print(f"Gerando conjunto {escala} em {pasta}...", flush=True)
+    gravar_exportacao(pasta, ESCALAS[escala], REPRODUCOES_POR_ARQUIVO)
+
+    # Só marcar como completo depois de gravar todos os arquivos
+    open(marcador, 'w').close()
+    return pasta
+
+# Funções medidas em cada escala: nome -> função que recebe o DataFrame carregado
+def _funcoes_medidas(df):
+    """
+    Monta as chamadas medidas para um conjunto carregado
+
+    Args:
+        df: DataFrame processado pelo carregamento
+
+    Returns:
+        Dicionário nome -> função sem argumentos
+    """
+    musica_mais_tocada = df['track'].value_counts().index[0]
+    artista_mais_tocado = df['artist'].value_counts().index[0]
+    serie = df['minutos'].to_numpy()
+
+    return {
+        'criar_grafico_top': lambda: criar_grafico_top(df, 'artist', 'Artista', 'viridis'),
+        'criar_grafico_pulos': lambda: criar_grafico_pulos(df),
+        'criar_grafico_dispositivos': lambda: criar_grafico_dispositivos(df),
+        'criar_heatmap_dia_semana_hora': lambda: criar_heatmap_dia_semana_hora(df),
+        'calcular_matrizes_horario': lambda: calcular_matrizes_horario(df, intervalo=15, faceta='artista'),
+        'criar_heatmap_detalhado': lambda: criar_heatmap_detalhado(df, intervalo=15),
+        'criar_paleta_horarios': lambda: criar_paleta_horarios(df),
+        'criar_comparativo_anos': lambda: criar_comparativo_anos(df),
+        'criar_graficos_evolucao': lambda: criar_graficos_evolucao(df),
+        'criar_graficos_evolucao_diaria': lambda: criar_graficos_evolucao(df, frequencia='D'),
+        'reduzir_lttb': lambda: reduzir_lttb(np.arange(len(serie)), serie, 1000),
+        'gerar_recomendacoes': lambda: gerar_recomendacoes(df),
+        'encontrar_musicas_sequencia': lambda: encontrar_musicas_sequencia(df, musica_mais_tocada),
+        'buscar_musicas_por_artista': lambda: buscar_musicas_por_artista(df, artista_mais_tocado)
+    }
+
+# Função para medir uma chamada
+def medir(funcao, repeticoes):
+    """
+    Mede o tempo e o pico de memória de uma chamada
+
+    O tempo é medido sem o tracemalloc (que deixa a execução mais lenta); o pico de
+    memória vem de uma execução separada, descontando o que já estava alocado antes.
+
+    Args:
+        funcao: Função sem argumentos
+        repeticoes: Número de execuções cronometradas
+
+    Returns:
+        (dict, object): Medições (mediana, mínimo e pico de memória) e o resultado da última execução
+    """
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    antes, _ = tracemalloc.get_traced_memory()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'mediana_s': round(statistics.median(tempos), 6),
+        'minimo_s': round(min(tempos), 6),
+        'pico_memoria_mb': round((pico - antes) / 1024 ** 2, 2)
+    }, resultado
+
+# Função para comparar com a linha de base
+def comparar_com_baseline(medicoes, baseline, tolerancia):
+    """
+    Compara as medições com a linha de base e marca as regressões
+
+    Args:
+        medicoes: Lista de medições (dicionários com escala, funcao e mediana_s)
+        baseline: Relatório anterior (ou None)
+        tolerancia: Aumento relativo tolerado (0.2 = 20% mais lento)
+
+    Returns:
+        Lista das medições que regrediram
+    """
+    if not baseline:
+        return []
+
+    referencia = {(item['escala'], item['funcao']): item for item in baseline['medicoes']}
+    regressoes = []
+    for medicao in medicoes:
+        anterior = referencia.get((medicao['escala'], medicao['funcao']))
+        if anterior is None or anterior['mediana_s'] <= 0:
+            continue
+        variacao = medicao['mediana_s'] / anterior['mediana_s'] - 1
+        medicao['baseline_s'] = anterior['mediana_s']
+        medicao['variacao'] = round(variacao, 4)
+        medicao['regressao'] = variacao > tolerancia
+        if medicao['regressao']:
+            regressoes.append(medicao)
+    return regressoes
+
+# Função principal
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede o carregamento e as funções de análise em conjuntos sintéticos de 10 mil, 1 milhão e 10 milhões de reproduções"
+    )
+    parser.add_argument('--escalas', nargs='+', choices=list(ESCALAS), default=list(ESCALAS), help="Escalas medidas (padrão: todas)")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Execuções cronometradas por função (usa a mediana)")
+    parser.add_argument('--pasta-dados', default=os.path.join(tempfile.gettempdir(), 'spotify_benchmark'), help="Onde guardar os conjuntos sintéticos")
+    parser.add_argument('--saida', default='benchmark_resultado.json', help="Relatório JSON gerado")
+    parser.add_argument('--baseline', help="Relatório anterior usado como linha de base")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO, help="Aumento relativo tolerado antes de acusar regressão")
+    parser.add_argument('--funcoes', nargs='+', help="Medir apenas estas funções ('ler_dados' para o carregamento, 'decodificar_json'/'decodificar_msgspec' para a decodificação, 'resumir_exportacao' para os esboços)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    medicoes = []
+
+    for escala in args.escalas:
+        pasta = preparar_conjunto(args.pasta_dados, escala)
+
+        # 1. Carregamento (leitura dos JSONs, colunas derivadas e identidades)
+        estatisticas, df = medir(lambda: ler_dados(pasta), 1 if escala == '10m' else args.repeticoes)
+        if not args.funcoes or 'ler_dados' in args.funcoes:
+            medicoes.append(dict(escala=escala, funcao='ler_dados', **estatisticas))
+            print(f"[{escala}] {'ler_dados':<32} {estatisticas['mediana_s']:9.3f} s  pico {estatisticas['pico_memoria_mb']:9.1f} MB", flush=True)
+
+        # 1b. Decodificação dos arquivos (json da biblioteca padrão x msgspec tipado), em MB/s por núcleo
+        caminhos = sorted(os.path.join(pasta, 'data', arquivo) for arquivo in os.listdir(os.path.join(pasta, 'data')) if arquivo.endswith('.json'))
+        megabytes = sum(os.path.getsize(caminho) for caminho in caminhos) / 1024 ** 2
+        decodificadores = {'json': False, 'msgspec': True} if decodificador_tipado_disponivel() else {'json': False}
+        for nome_decodificador, usar_msgspec in decodificadores.items():
+            nome = f"decodificar_{nome_decodificador}"
+            if args.funcoes and nome not in args.funcoes:
+                continue
+            estatisticas, _ = medir(lambda: [ler_arquivo(caminho, usar_msgspec) for caminho in caminhos], 1 if escala == '10m' else args.repeticoes)
+            estatisticas['mb_por_s'] = round(megabytes / estatisticas['mediana_s'], 1)
+            medicoes.append(dict(escala=escala, funcao=nome, **estatisticas))
+            print(f"[{escala}] {nome:<32} {estatisticas['mediana_s']:9.3f} s  pico {estatisticas['pico_memoria_mb']:9.1f} MB  {estatisticas['mb_por_s']:7.1f} MB/s", flush=True)
+
+        # 2. Passagem em fluxo do modo aproximado (esboços, sem montar o DataFrame)
+        if not args.funcoes or 'resumir_exportacao' in args.funcoes:
+            estatisticas, _ = medir(lambda: resumir_exportacao(pasta), 1 if escala == '10m' else args.repeticoes)
+            medicoes.append(dict(escala=escala, funcao='resumir_exportacao', **estatisticas))
+            print(f"[{escala}] {'resumir_exportacao':<32} {estatisticas['mediana_s']:9.3f} s  pico {estatisticas['pico_memoria_mb']:9.1f} MB", flush=True)
+
+        # 3. Funções de análise
+        for nome, funcao in _funcoes_medidas(df).items():
+            if args.funcoes and nome not in args.funcoes:
+                continue
+            estatisticas, _ = medir(funcao, args.repeticoes)
+            medicoes.append(dict(escala=escala, funcao=nome, **estatisticas))
+            print(f"[{escala}] {nome:<32} {estatisticas['mediana_s']:9.3f} s  pico {estatisticas['pico_memoria_mb']:9.1f} MB", flush=True)
+
+        del df
+
+    regressoes = comparar_com_baseline(medicoes, baseline, args.tolerancia)
+
+    relatorio = {
+        'versao_dados': VERSAO_DADOS,
+        'repeticoes': args.repeticoes,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'maquina': platform.platform(),
+        'baseline': args.baseline,
+        'tolerancia': args.tolerancia,
+        'medicoes': medicoes,
+        'regressoes': [f"{item['escala']}/{item['funcao']}" for item in regressoes]
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"\nRelatório gravado em {args.saida}")
+
+    if regressoes:
+        print("\nRegressões em relação à linha de base:")
+        for item in regressoes:
+            print(f"  {item['escala']}/{item['funcao']}: {item['baseline_s']:.3f} s → {item['mediana_s']:.3f} s ({item['variacao']:+.0%})")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import os
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Dependências que o próprio Streamlit já carrega em qualquer execução (não entram no custo dos módulos)
+DEPENDENCIAS_BASE = ['pandas', 'numpy', 'streamlit', 'plotly.express', 'plotly.graph_objects']
+
+# Módulos do painel medidos e orçamento de importação de cada um, em milissegundos
+ORCAMENTO_MODULOS_MS = {
+    'analises_avancadas': 250,
+    'comparacoes_criativas_interativas': 100,
+    'identidades': 50,
+    'componentes': 50,
+    'cache_figuras': 100,
+    'conjunto_dados': 50,
+    'carregamento': 50,
+    'analise_em_lote': 100,
+    'relatorio_html': 50,
+    'armazenamento': 50,
+    'perfil': 50,
+    'metricas': 50,
+    'geografia': 50,
+    'esbocos': 50,
+    'gerador_sintetico': 50,
+    'leitores': 50,
+}
+
+# Orçamento para carregar as dependências base (início a frio do Python + Streamlit)
+ORCAMENTO_BASE_MS = 4000
+
+# Linha gerada por python -X importtime: "import time: self [us] | cumulative | imported package"
+PADRAO_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+# Função para medir o custo de importação de um módulo
+def medir_importacao(modulo, pre_importar=()):
+    """
+    Mede o custo de importação de um módulo em um processo Python novo
+
+    Os módulos de pre_importar são carregados antes e, por isso, não entram na medição:
+    o resultado é o custo adicional que o módulo acrescenta ao início a frio.
+
+    Args:
+        modulo: Nome do módulo a importar
+        pre_importar: Módulos carregados antes da medição
+
+    Returns:
+        (float, list): Tempo cumulativo em milissegundos e as 5 dependências mais caras [(módulo, ms)]
+    """
+    codigo = ''.join(f'import {nome}\n' for nome in pre_importar) + f'import {modulo}\n'
+    ambiente = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=ambiente
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{resultado.stderr[-2000:]}")
+
+    # Cada importação aparece depois das que ela disparou; as dependências diretas têm recuo de um nível
+    total_us = None
+    dependencias = []
+    for linha in resultado.stderr.splitlines():
+        encontrado = PADRAO_IMPORTTIME.match(linha)
+        if not encontrado:
+            continue
+        _, cumulativo, recuo, nome = encontrado.groups()
+        if len(recuo) <= 1:
+            if nome == modulo:
+                total_us = int(cumulativo)
+                break
+            dependencias = []
+        elif len(recuo) == 3:
+            dependencias.append((nome, int(cumulativo) / 1000))
+
+    if total_us is None:
+        # O módulo já havia sido carregado por uma dependência base
+        return 0.0, []
+
+    dependencias.sort(key=lambda item: item[1], reverse=True)
+    return total_us / 1000, dependencias[:5]
+
+# Função para medir a mediana de várias repetições
+def medir_mediana(modulo, pre_importar=(), repeticoes=3):
+    """
+    Mede o custo de importação de um módulo várias vezes e retorna a mediana
+
+    Args:
+        modulo: Nome do módulo a importar
+        pre_importar: Módulos carregados antes da medição
+        repeticoes: Número de processos medidos
+
+    Returns:
+        (float, list): Mediana em milissegundos e as dependências mais caras da última medição
+    """
+    tempos = []
+    dependencias = []
+    for _ in range(repeticoes):
+        tempo, dependencias = medir_importacao(modulo, pre_importar)
+        tempos.append(tempo)
+    return statistics.median(tempos), dependencias
+
+# Função principal
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede o custo de importação dos módulos do painel e falha se algum passar do orçamento"
+    )
+    parser.add_argument('--repeticoes', type=int, default=3, help="Processos medidos por módulo (usa a mediana)")
+    parser.add_argument('--fator', type=float, default=1.0, help="Multiplica todos os orçamentos (máquinas mais lentas)")
+    parser.add_argument('--saida', help="Arquivo JSON onde gravar os resultados")
+    args = parser.parse_args()
+
+    resultados = {}
+    estourados = []
+
+    # 1. Dependências base, cada uma medida sobre as anteriores
+    base_ms = 0.0
+    for dependencia in DEPENDENCIAS_BASE:
+        tempo, _ = medir_mediana(dependencia, DEPENDENCIAS_BASE[:DEPENDENCIAS_BASE.index(dependencia)], args.repeticoes)
+        base_ms += tempo
+    orcamento_base = ORCAMENTO_BASE_MS * args.fator
+    resultados['(base)'] = {'ms': round(base_ms, 1), 'orcamento_ms': orcamento_base}
+    print(f"{'(base: ' + ', '.join(DEPENDENCIAS_BASE) + ')':<45} {base_ms:8.1f} ms  (orçamento {orcamento_base:.0f} ms)")
+    if base_ms > orcamento_base:
+        estourados.append('(base)')
+
+    # 2. Custo adicional de cada módulo do painel
+    for modulo, orcamento in ORCAMENTO_MODULOS_MS.items():
+        orcamento *= args.fator
+        tempo, dependencias = medir_mediana(modulo, DEPENDENCIAS_BASE, args.repeticoes)
+        resultados[modulo] = {
+            'ms': round(tempo, 1),
+            'orcamento_ms': orcamento,
+            'dependencias_mais_caras': [{'modulo': nome, 'ms': round(ms, 1)} for nome, ms in dependencias]
+        }
+        estourou = tempo > orcamento
+        print(f"{modulo:<45} {tempo:8.1f} ms  (orçamento {orcamento:.0f} ms){'  ⚠️ ACIMA DO ORÇAMENTO' if estourou else ''}")
+        if estourou:
+            estourados.append(modulo)
+            for nome, ms in dependencias:
+                print(f"    {nome:<41} {ms:8.1f} ms")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+
+    if estourados:
+        print(f"\nImportação acima do orçamento: {', '.join(estourados)}")
+        sys.exit(1)
+
+    print("\nTodos os módulos dentro do orçamento.")
+
+if __name__ == "__main__":
+    main()
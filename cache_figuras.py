@@ -0,0 +1,104 @@
+import os
+import json
+import hashlib
+import plotly.io as pio
+import plotly.graph_objects as go
+import streamlit as st
+from perfil import medir_etapa
+from metricas import METRICAS
+
+# Número máximo de figuras serializadas mantidas em cache
+MAX_FIGURAS_CACHE = 128
+
+# Função para calcular a impressão digital de um conjunto de dados
+def calcular_impressao_digital(pasta_dados):
+    """
+    Calcula uma impressão digital do conjunto de dados a partir dos arquivos JSON da pasta
+
+    Usa nome, tamanho e data de modificação de cada arquivo, então é barata o bastante
+    para ser recalculada a cada execução.
+
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON (subpasta 'data')
+
+    Returns:
+        String hexadecimal que identifica o conjunto de dados
+    """
+    caminho_pasta = os.path.join(pasta_dados, 'data')
+    resumo = hashlib.blake2b(digest_size=16)
+
+    for arquivo in sorted(os.listdir(caminho_pasta)):
+        if arquivo.endswith('.json'):
+            info = os.stat(os.path.join(caminho_pasta, arquivo))
+            resumo.update(f"{arquivo}:{info.st_size}:{info.st_mtime_ns};".encode('utf-8'))
+
+    return resumo.hexdigest()
+
+# Função que gera (uma única vez) o JSON de uma figura
+@st.cache_data(show_spinner=False, max_entries=MAX_FIGURAS_CACHE)
+def _gerar_payload(nome, chave_dados, parametros, _construtor, _df):
+    """
+    Constrói a figura e a serializa em JSON, com cache por nome, dados e parâmetros
+
+    Args:
+        nome: Nome da figura (identifica o construtor na chave do cache)
+        chave_dados: Impressão digital do conjunto de dados
+        parametros: Tupla ordenada de pares (parâmetro, valor) repassados ao construtor
+        _construtor: Função que recebe o DataFrame e os parâmetros e retorna a figura (não entra no hash)
+        _df: DataFrame com os dados (não entra no hash)
+
+    Returns:
+        JSON da figura, ou None se o construtor não gerar figura
+    """
+    METRICAS.incrementar('spotify_cache_falhas_total', cache='figuras')
+    with medir_etapa("construção", linhas=len(_df)), METRICAS.cronometrar('spotify_figura_construcao_segundos', figura=nome):
+        fig = _construtor(_df, **dict(parametros))
+    if fig is None:
+        return None
+    with medir_etapa("serialização"), METRICAS.cronometrar('spotify_figura_serializacao_segundos', figura=nome):
+        return pio.to_json(fig, validate=False)
+
+# Função para obter o JSON de uma figura a partir do cache
+def obter_payload(nome, chave_dados, df, construtor, **parametros):
+    """
+    Obtém o JSON de uma figura do cache, construindo-a apenas na primeira vez
+
+    Útil quando a figura não precisa voltar a ser um objeto do Plotly (por exemplo, no
+    relatório HTML, que usa o JSON diretamente).
+
+    Args:
+        nome: Nome da figura (por exemplo, 'heatmap' ou 'evolucao')
+        chave_dados: Impressão digital do conjunto de dados
+        df: DataFrame com os dados
+        construtor: Função que recebe df e os parâmetros e retorna a figura
+        **parametros: Parâmetros do construtor (fazem parte da chave do cache)
+
+    Returns:
+        JSON da figura, ou None se o construtor não gerar figura
+    """
+    METRICAS.incrementar('spotify_cache_consultas_total', cache='figuras')
+    with medir_etapa(f"figura: {nome}"):
+        return _gerar_payload(nome, chave_dados, tuple(sorted(parametros.items())), construtor, df)
+
+# Função para obter uma figura a partir do cache
+def obter_figura(nome, chave_dados, df, construtor, **parametros):
+    """
+    Obtém uma figura do cache de payloads serializados, construindo-a apenas na primeira vez
+
+    O JSON em cache é convertido de volta em figura sem validação, o que custa poucos
+    milissegundos mesmo para figuras com muitos traços.
+
+    Args:
+        nome: Nome da figura (por exemplo, 'heatmap' ou 'evolucao')
+        chave_dados: Impressão digital do conjunto de dados
+        df: DataFrame com os dados
+        construtor: Função que recebe df e os parâmetros e retorna a figura
+        **parametros: Parâmetros do construtor (fazem parte da chave do cache)
+
+    Returns:
+        Figura do Plotly, ou None se o construtor não gerar figura
+    """
+    payload = obter_payload(nome, chave_dados, df, construtor, **parametros)
+    if payload is None:
+        return None
+    return go.Figure(json.loads(payload), _validate=False)
@@ -0,0 +1,321 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+from identidades import codificar_identidades
+from leitores import CAMPOS_UTILIZADOS, detectar_formato_arquivo, registrar_campos_disponiveis
+
+# Número de reproduções sorteadas para a prévia
+TAMANHO_AMOSTRA = 5000
+
+# Bytes lidos antes e depois de cada posição sorteada (um registro da exportação tem ~400 bytes)
+JANELA_AMOSTRA_BYTES = 4096
+
+class CarregamentoCancelado(Exception):
+    """Leitura interrompida pelo usuário (ver ProgressoCarregamento.cancelar)"""
+
+class ProgressoCarregamento:
+    """
+    Progresso de uma leitura de ler_dados, atualizado a cada arquivo lido
+
+    A leitura roda em outra thread: ela registra os arquivos concluídos e a interface
+    consulta o progresso (bytes, reproduções, tempo restante) e os totais exatos dos
+    arquivos já lidos. Também leva o pedido de cancelamento, verificado entre os arquivos.
+    """
+
+    def __init__(self, pasta_dados):
+        """
+        Args:
+            pasta_dados: Caminho da pasta com os arquivos JSON (subpasta 'data')
+        """
+        caminho_pasta = os.path.join(pasta_dados, 'data')
+        tamanhos = [
+            os.path.getsize(os.path.join(caminho_pasta, arquivo))
+            for arquivo in os.listdir(caminho_pasta) if arquivo.endswith('.json')
+        ]
+        self.total_bytes = sum(tamanhos)
+        self.total_arquivos = len(tamanhos)
+        self.inicio = time.time()
+        self.bytes_lidos = 0
+        self.arquivos_lidos = 0
+        self.reproducoes = 0
+        self.ms_total = 0
+        self.etapa = "leitura"
+        self._artistas = set()
+        self._minutos_artistas = pd.Series(dtype='float64')
+        self._trava = threading.Lock()
+        self._cancelamento = threading.Event()
+
+    def registrar_arquivo(self, tamanho_bytes, parte=None):
+        """
+        Soma um arquivo lido ao progresso e aos totais parciais
+
+        Args:
+            tamanho_bytes: Tamanho do arquivo
+            parte: DataFrame do arquivo no esquema comum (None se o formato foi ignorado)
+        """
+        with self._trava:
+            self.bytes_lidos += tamanho_bytes
+            self.arquivos_lidos += 1
+            if parte is None or not len(parte):
+                return
+            artistas = parte['master_metadata_album_artist_name']
+            self.reproducoes += len(parte)
+            self.ms_total += int(parte['ms_played'].sum())
+            self._artistas.update(artistas.dropna().unique())
+            minutos = (parte['ms_played'] / 60000).groupby(artistas).sum()
+            self._minutos_artistas = self._minutos_artistas.add(minutos, fill_value=0)
+
+    def fracao(self):
+        """
+        Returns:
+            Fração dos bytes já lidos, entre 0 e 1
+        """
+        return min(self.bytes_lidos / self.total_bytes, 1.0) if self.total_bytes else 1.0
+
+    def segundos_restantes(self):
+        """
+        Estima o tempo restante da leitura pela vazão (bytes por segundo) até agora
+
+        Returns:
+            Segundos restantes, ou None antes do primeiro arquivo ou depois da leitura
+        """
+        if not self.bytes_lidos or self.etapa != "leitura":
+            return None
+        decorrido = time.time() - self.inicio
+        return decorrido * (self.total_bytes - self.bytes_lidos) / self.bytes_lidos
+
+    def totais(self, n_artistas=5):
+        """
+        Totais exatos dos arquivos já lidos
+
+        Args:
+            n_artistas: Número de artistas no ranking parcial
+
+        Returns:
+            Dicionário com minutos, reproducoes, artistas (distintos) e top_artistas (Series)
+        """
+        with self._trava:
+            return {
+                'minutos': self.ms_total / 60000,
+                'reproducoes': self.reproducoes,
+                'artistas': len(self._artistas),
+                'top_artistas': self._minutos_artistas.nlargest(n_artistas)
+            }
+
+    def cancelar(self):
+        """Pede a interrupção da leitura (atendida ao fim do arquivo em andamento)"""
+        self._cancelamento.set()
+
+    @property
+    def cancelado(self):
+        """True se o cancelamento foi pedido"""
+        return self._cancelamento.is_set()
+
+    def verificar_cancelamento(self):
+        """
+        Raises:
+            CarregamentoCancelado: Se o cancelamento foi pedido
+        """
+        if self.cancelado:
+            raise CarregamentoCancelado()
+
+# Função para ler e processar os dados de uma pasta
+def ler_dados(pasta_dados, progresso=None):
+    """
+    Lê os arquivos JSON de uma pasta e calcula as colunas derivadas usadas nas análises
+
+    Não depende do Streamlit: é usada pelo painel (que guarda o resultado em cache) e
+    pela análise em lote. O formato de cada arquivo é reconhecido pelos primeiros bytes
+    e o leitor do formato monta só as colunas do esquema comum (ver leitores.ler_arquivo).
+    Arquivos de formato desconhecido (outros JSON da exportação da conta) são ignorados.
+    Os arquivos são lidos em ordem de nome (a ordem do tempo nas exportações). As colunas
+    preenchidas pelos formatos lidos ficam em df.attrs (ver leitores.campos_disponiveis).
+
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON (subpasta 'data')
+        progresso: ProgressoCarregamento opcional, atualizado a cada arquivo
+
+    Returns:
+        DataFrame com os dados processados
+
+    Raises:
+        CarregamentoCancelado: Se o cancelamento foi pedido pelo progresso
+    """
+    caminho_pasta = os.path.join(pasta_dados, 'data')
+    partes = []
+    leitores = []
+
+    for arquivo in sorted(os.listdir(caminho_pasta)):
+        if arquivo.endswith('.json'):
+            if progresso is not None:
+                progresso.verificar_cancelamento()
+            caminho = os.path.join(caminho_pasta, arquivo)
+            tamanho_bytes = os.path.getsize(caminho)
+            leitor = detectar_formato_arquivo(caminho)
+            parte = leitor.ler_arquivo(caminho) if leitor is not None else None
+            if parte is not None:
+                partes.append(parte)
+                leitores.append(leitor)
+            if progresso is not None:
+                progresso.registrar_arquivo(tamanho_bytes, parte)
+
+    if progresso is not None:
+        progresso.verificar_cancelamento()
+        progresso.etapa = "preparação"
+    if not partes:
+        df = pd.DataFrame(columns=list(CAMPOS_UTILIZADOS))
+    else:
+        df = partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+    return registrar_campos_disponiveis(preparar_dataframe(df), leitores)
+
+# Função para projetar registros nos campos utilizados
+def projetar_registros(registros, campos=CAMPOS_UTILIZADOS):
+    """
+    Mantém só os campos utilizados de cada registro (para gravar envios sem dados sensíveis)
+
+    Args:
+        registros: Lista de dicionários no formato da exportação do Spotify
+        campos: Campos mantidos
+
+    Returns:
+        Lista de dicionários apenas com os campos projetados presentes em cada registro
+    """
+    return [{campo: registro[campo] for campo in campos if campo in registro} for registro in registros]
+
+# Função para calcular as colunas derivadas
+def preparar_dataframe(df):
+    """
+    Calcula as colunas derivadas usadas nas análises a partir dos registros brutos
+
+    Args:
+        df: DataFrame com os campos da exportação do Spotify (um registro por linha)
+
+    Returns:
+        DataFrame com os dados processados
+    """
+    df['ts'] = pd.to_datetime(df['ts'])
+    df['ano'] = df['ts'].dt.year
+    df['mes'] = df['ts'].dt.month
+    df['dia'] = df['ts'].dt.day
+    df['hora'] = df['ts'].dt.hour
+    df['diaSemana'] = df['ts'].dt.day_name()
+    
+    # Minuto da semana (segunda 00:00 = 0), base dos heatmaps por faixa de horário
+    df['minuto_semana'] = (df['ts'].dt.dayofweek * 1440 + df['hora'] * 60 + df['ts'].dt.minute).astype('int16')
+
+    df['segundos'] = df['ms_played'] / 1000
+    df['minutos'] = df['segundos'] / 60
+    df['horas'] = df['minutos'] / 60
+
+    df['foi_pulado'] = df['skipped'] == True
+
+    # Poucos países distintos: categórico para agrupar por códigos inteiros
+    df['conn_country'] = df['conn_country'].astype('category')
+
+    # Codificar faixas, artistas e álbuns em identificadores inteiros
+    df = codificar_identidades(df)
+
+    return df
+
+# Função para ler um registro a partir de uma posição do arquivo
+def _ler_registro_na_posicao(arquivo, posicao):
+    """
+    Lê o registro completo que contém uma posição de um arquivo JSON
+
+    Os registros da exportação são objetos sem aninhamento: o registro que contém a
+    posição começa no último '{' antes dela, se não houver um '}' entre os dois; se a
+    posição cai entre dois registros, vale o seguinte. Assim cada registro é sorteado
+    com probabilidade proporcional ao próprio tamanho (inclusive o primeiro do arquivo).
+
+    Args:
+        arquivo: Arquivo aberto em modo binário
+        posicao: Posição em bytes
+
+    Returns:
+        (dict, int, int): Registro, posição onde ele começa e distância até o próximo
+        registro (None quando não há registro completo na janela)
+    """
+    inicio_janela = max(0, posicao - JANELA_AMOSTRA_BYTES)
+    arquivo.seek(inicio_janela)
+    bloco = arquivo.read(posicao - inicio_janela + JANELA_AMOSTRA_BYTES)
+    relativa = posicao - inicio_janela
+    inicio = bloco.rfind(b'{', 0, relativa + 1)
+    if inicio < 0 or bloco.find(b'}', inicio, relativa) >= 0:
+        inicio = bloco.find(b'{', relativa)
+    fim = bloco.find(b'}', inicio + 1)
+    if inicio < 0 or fim < 0:
+        return None
+    try:
+        registro = json.loads(bloco[inicio:fim + 1])
+    except ValueError:
+        # A janela começou dentro de um texto com '{'; a posição é descartada
+        return None
+    proximo = bloco.find(b'{', fim + 1)
+    return registro, inicio_janela + inicio, (proximo - inicio if proximo >= 0 else fim + 2 - inicio)
+
+# Função para ler uma amostra estratificada no tempo
+def ler_amostra(pasta_dados, tamanho=TAMANHO_AMOSTRA, semente=0):
+    """
+    Lê uma amostra estratificada das reproduções sem decodificar os arquivos inteiros
+
+    Os arquivos da exportação (em ordem de nome) e os registros dentro deles seguem a
+    ordem do tempo; a soma dos tamanhos é dividida em faixas iguais e um registro é lido
+    de uma posição sorteada em cada faixa. O custo depende só do tamanho da amostra,
+    não do tamanho da exportação.
+
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON (subpasta 'data')
+        tamanho: Número de faixas (registros sorteados)
+        semente: Semente do sorteio
+
+    Returns:
+        (DataFrame, int): Amostra processada e número estimado de reproduções da exportação
+        (None e 0 se nenhum registro puder ser lido)
+    """
+    caminho_pasta = os.path.join(pasta_dados, 'data')
+    arquivos = sorted(arquivo for arquivo in os.listdir(caminho_pasta) if arquivo.endswith('.json'))
+    caminhos = [os.path.join(caminho_pasta, arquivo) for arquivo in arquivos]
+    tamanhos = np.array([os.path.getsize(caminho) for caminho in caminhos], dtype=np.int64)
+    limites = np.concatenate(([0], np.cumsum(tamanhos)))
+    total_bytes = int(limites[-1])
+
+    rng = np.random.default_rng(semente)
+    passo = total_bytes / tamanho
+    posicoes = ((np.arange(tamanho) + rng.random(tamanho)) * passo).astype(np.int64)
+
+    partes = []
+    vistos = set()
+    leitores = []
+    bytes_por_registro = []
+    for indice, caminho in enumerate(caminhos):
+        no_arquivo = posicoes[(posicoes >= limites[indice]) & (posicoes < limites[indice + 1])] - limites[indice]
+        if not len(no_arquivo):
+            continue
+        leitor = detectar_formato_arquivo(caminho)
+        if leitor is None:
+            continue
+        registros = []
+        with open(caminho, 'rb') as f:
+            for posicao in no_arquivo.tolist():
+                lido = _ler_registro_na_posicao(f, posicao)
+                if lido is None:
+                    continue
+                registro, inicio, distancia = lido
+                bytes_por_registro.append(distancia)
+                # Em exportações pequenas várias faixas caem no mesmo registro
+                if (indice, inicio) not in vistos:
+                    vistos.add((indice, inicio))
+                    registros.append(registro)
+        if registros:
+            partes.append(leitor.converter_registros(registros))
+            leitores.append(leitor)
+
+    if not partes:
+        return None, 0
+
+    amostra = pd.concat(partes, ignore_index=True)
+    total_estimado = int(round(total_bytes / np.mean(bytes_por_registro)))
+    return registrar_campos_disponiveis(preparar_dataframe(amostra), leitores), max(total_estimado, len(amostra))
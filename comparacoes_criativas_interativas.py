@@ -2,87 +2,12 @@ import pandas as pd
 import streamlit as st
 import random
 import math
-import pycountry
 import json
 import os
+from geografia import carregar_gazetteer
 
-# Dicionário de cidades por país/região
-def carregar_cidades_por_regiao():
-    """
-    Carrega um dicionário de cidades por país/região.
-    Retorna um dicionário onde as chaves são os países e os valores são listas de tuplas (cidade, distância em km)
-    """
-    cidades = {
-        "Brasil": [
-            ("São Paulo", 960),
-            ("Rio de Janeiro", 1260),
-            ("Brasília", 140),
-            ("Salvador", 1800),
-            ("Fortaleza", 2100),
-            ("Belo Horizonte", 800),
-            ("Manaus", 2500),
-            ("Curitiba", 1200),
-            ("Recife", 2300),
-            ("Porto Alegre", 2000),
-            ("Belém", 2200),
-            ("Goiânia", 70),
-            ("Florianópolis", 1600),
-            ("Natal", 2500),
-            ("Vitória", 1400)
-        ],
-        "Estados Unidos": [
-            ("Nova York", 8500),
-            ("Los Angeles", 9800),
-            ("Chicago", 8900),
-            ("Houston", 8200),
-            ("Phoenix", 9000),
-            ("Filadélfia", 8600),
-            ("San Antonio", 8300),
-            ("San Diego", 9700),
-            ("Dallas", 8100),
-            ("San Jose", 9900),
-            ("Austin", 8200),
-            ("Jacksonville", 8000),
-            ("Fort Worth", 8100),
-            ("Columbus", 8700),
-            ("Charlotte", 8400)
-        ],
-        "Europa": [
-            ("Londres", 9300),
-            ("Paris", 9500),
-            ("Madri", 8800),
-            ("Roma", 9700),
-            ("Berlim", 10200),
-            ("Atenas", 10500),
-            ("Amsterdã", 9800),
-            ("Viena", 10100),
-            ("Bruxelas", 9700),
-            ("Lisboa", 8500),
-            ("Estocolmo", 10800),
-            ("Praga", 10300),
-            ("Budapeste", 10400),
-            ("Varsóvia", 10600),
-            ("Dublin", 9200)
-        ],
-        "Ásia": [
-            ("Tóquio", 18000),
-            ("Pequim", 17500),
-            ("Seul", 17800),
-            ("Mumbai", 14500),
-            ("Xangai", 17300),
-            ("Delhi", 14300),
-            ("Singapura", 16800),
-            ("Bangkok", 16500),
-            ("Hong Kong", 17000),
-            ("Dubai", 12500),
-            ("Kuala Lumpur", 16700),
-            ("Taipei", 17500),
-            ("Jakarta", 16900),
-            ("Manila", 17200),
-            ("Osaka", 18100)
-        ]
-    }
-    return cidades
+# Raio em que as cidades de comparação são sorteadas, em km
+RAIO_COMPARACAO_KM = 2500
 
 # Pool de curiosidades diversas
 def obter_pool_curiosidades():
@@ -137,92 +62,19 @@ def obter_pool_curiosidades():
     ]
     return curiosidades
 
-# Função para identificar a região com base na cidade informada
-def identificar_regiao(cidade):
-    """
-    Identifica a região/país com base na cidade informada pelo usuário.
-    Retorna a região identificada ou "Brasil" como padrão.
-    """
-    # Lista de cidades brasileiras conhecidas
-    cidades_brasil = ["são paulo", "rio de janeiro", "brasília", "brasilia", "salvador", 
-                      "fortaleza", "belo horizonte", "manaus", "curitiba", "recife", 
-                      "porto alegre", "belém", "belem", "goiânia", "goiania", "anápolis", 
-                      "anapolis", "florianópolis", "florianopolis", "natal", "vitória", "vitoria"]
-    
-    # Lista de cidades americanas conhecidas
-    cidades_eua = ["new york", "nova york", "los angeles", "chicago", "houston", "phoenix", 
-                   "philadelphia", "filadélfia", "filadelfia", "san antonio", "san diego", 
-                   "dallas", "san jose", "austin", "jacksonville", "fort worth", "columbus", 
-                   "charlotte", "denver", "seattle", "boston", "las vegas", "miami"]
-    
-    # Lista de cidades europeias conhecidas
-    cidades_europa = ["london", "londres", "paris", "madrid", "madri", "rome", "roma", 
-                      "berlin", "berlim", "athens", "atenas", "amsterdam", "amsterdã", 
-                      "vienna", "viena", "brussels", "bruxelas", "lisbon", "lisboa", 
-                      "stockholm", "estocolmo", "prague", "praga", "budapest", "budapeste", 
-                      "warsaw", "varsóvia", "varsovia", "dublin"]
-    
-    # Lista de cidades asiáticas conhecidas
-    cidades_asia = ["tokyo", "tóquio", "toquio", "beijing", "pequim", "seoul", "seul", 
-                    "mumbai", "shanghai", "xangai", "delhi", "singapore", "singapura", 
-                    "bangkok", "hong kong", "dubai", "kuala lumpur", "taipei", "jakarta", 
-                    "manila", "osaka"]
-    
-    # Normaliza a cidade (remove acentos, converte para minúsculas)
-    cidade_norm = cidade.lower()
-    
-    # Verifica em qual lista a cidade se encontra
-    if cidade_norm in cidades_brasil:
-        return "Brasil"
-    elif cidade_norm in cidades_eua:
-        return "Estados Unidos"
-    elif cidade_norm in cidades_europa:
-        return "Europa"
-    elif cidade_norm in cidades_asia:
-        return "Ásia"
-    else:
-        # Se não encontrar, tenta fazer uma correspondência parcial
-        for c in cidades_brasil:
-            if c in cidade_norm or cidade_norm in c:
-                return "Brasil"
-        for c in cidades_eua:
-            if c in cidade_norm or cidade_norm in c:
-                return "Estados Unidos"
-        for c in cidades_europa:
-            if c in cidade_norm or cidade_norm in c:
-                return "Europa"
-        for c in cidades_asia:
-            if c in cidade_norm or cidade_norm in c:
-                return "Ásia"
-        
-        # Se ainda não encontrar, retorna Brasil como padrão
-        return "Brasil"
-
-# Função para selecionar cidades aleatórias de uma região
-def selecionar_cidades_aleatorias(regiao, num_cidades=3):
+# Função para selecionar cidades de comparação a partir da cidade do usuário
+def selecionar_cidades_aleatorias(indice_origem, num_cidades=3):
     """
-    Seleciona um número específico de cidades aleatórias de uma região.
+    Sorteia cidades próximas à cidade do usuário, com a distância real até cada uma.
     
     Args:
-        regiao: A região/país para selecionar cidades
+        indice_origem: Índice da cidade do usuário no gazetteer
         num_cidades: Número de cidades a selecionar
         
     Returns:
-        Lista de tuplas (cidade, distância)
+        Lista de tuplas (cidade, distância em km)
     """
-    cidades_por_regiao = carregar_cidades_por_regiao()
-    
-    if regiao in cidades_por_regiao:
-        # Seleciona cidades aleatórias da região
-        cidades_disponiveis = cidades_por_regiao[regiao]
-        if len(cidades_disponiveis) <= num_cidades:
-            return cidades_disponiveis
-        else:
-            return random.sample(cidades_disponiveis, num_cidades)
-    else:
-        # Se a região não for reconhecida, usa Brasil como padrão
-        cidades_disponiveis = cidades_por_regiao["Brasil"]
-        return random.sample(cidades_disponiveis, num_cidades)
+    return carregar_gazetteer().sortear_destinos(indice_origem, num_cidades, RAIO_COMPARACAO_KM)
 
 # Função para calcular comparações de viagem
 def calcular_comparacao_viagem(horas_totais, cidade_origem, cidade_destino, distancia):
@@ -316,17 +168,27 @@ def adicionar_comparacoes_ao_painel(df):
         st.session_state.refresh_count = 0
     
     # Se o usuário informou a cidade e não quer apenas curiosidades
+    # Procura a cidade informada no gazetteer offline
+    indice_origem = None
     if cidade_origem and not mostrar_apenas_curiosidades:
-        # Identifica a região com base na cidade informada
-        regiao = identificar_regiao(cidade_origem)
-        
-        # Seleciona cidades aleatórias da região
-        cidades_aleatorias = selecionar_cidades_aleatorias(regiao, 2)
-        
+        gazetteer = carregar_gazetteer()
+        indice_origem = gazetteer.buscar(cidade_origem)
+        if indice_origem is None:
+            sugestoes = gazetteer.sugerir(cidade_origem)
+            mensagem = f"Não encontramos \"{cidade_origem}\" na nossa lista de cidades."
+            if sugestoes:
+                mensagem += f" Você quis dizer: {', '.join(sugestoes)}?"
+            st.warning(mensagem)
+
+    if indice_origem is not None:
+        # Sorteia cidades próximas à cidade informada
+        cidades_aleatorias = selecionar_cidades_aleatorias(indice_origem, 2)
+        nome_origem = gazetteer.nomes[indice_origem]
+
         # Cria comparações de viagem
         comparacoes_viagem = []
         for cidade, distancia in cidades_aleatorias:
-            comparacao = calcular_comparacao_viagem(horas_totais, cidade_origem, cidade, distancia)
+            comparacao = calcular_comparacao_viagem(horas_totais, nome_origem, cidade, distancia)
             comparacoes_viagem.append(comparacao)
         
         # Seleciona curiosidades aleatórias
@@ -0,0 +1,91 @@
+import math
+import streamlit as st
+
+# Função para obter o rótulo de exibição de uma coluna
+def _rotulo_coluna(coluna, column_config):
+    """
+    Obtém o rótulo de exibição de uma coluna a partir do column_config do st.dataframe
+
+    Args:
+        coluna: Nome da coluna
+        column_config: Dicionário de configuração de colunas (ou None)
+
+    Returns:
+        Rótulo da coluna
+    """
+    config = (column_config or {}).get(coluna)
+    if isinstance(config, str):
+        return config
+    if isinstance(config, dict) and config.get('label'):
+        return config['label']
+    return coluna
+
+# Função para exibir uma tabela paginada
+def exibir_tabela_paginada(df, chave, column_config=None, colunas_busca=None, tamanhos_pagina=(25, 50, 100)):
+    """
+    Exibe uma tabela paginada com filtro e ordenação feitos no servidor
+
+    Apenas as linhas da página visível são enviadas ao navegador, então o volume de
+    dados transferido e a memória do navegador não crescem com o tamanho do resultado.
+
+    Args:
+        df: DataFrame com todas as linhas da tabela (por exemplo, um agregado em cache)
+        chave: Prefixo único para as chaves dos widgets da tabela
+        column_config: Configuração de colunas repassada ao st.dataframe
+        colunas_busca: Colunas de texto consideradas no filtro (None para não exibir filtro)
+        tamanhos_pagina: Opções de linhas por página
+    """
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+
+    # Filtro por texto
+    if colunas_busca:
+        termo = col1.text_input(
+            "Filtrar",
+            placeholder="Digite para filtrar...",
+            key=f"{chave}_filtro"
+        )
+        if termo:
+            mascara = None
+            for coluna in colunas_busca:
+                contem = df[coluna].astype(str).str.contains(termo, case=False, regex=False)
+                mascara = contem if mascara is None else mascara | contem
+            df = df[mascara]
+
+    # Ordenação
+    coluna_ordem = col2.selectbox(
+        "Ordenar por",
+        list(df.columns),
+        index=len(df.columns) - 1,
+        format_func=lambda coluna: _rotulo_coluna(coluna, column_config),
+        key=f"{chave}_ordem"
+    )
+    decrescente = col3.toggle("Decrescente", value=True, key=f"{chave}_decrescente")
+    df = df.sort_values(coluna_ordem, ascending=not decrescente, kind='stable')
+
+    # Paginação
+    tamanho_pagina = col4.selectbox("Linhas", tamanhos_pagina, key=f"{chave}_tamanho")
+    total_linhas = len(df)
+    total_paginas = max(1, math.ceil(total_linhas / tamanho_pagina))
+
+    # Manter a página atual dentro do intervalo válido (o filtro pode reduzir o total)
+    chave_pagina = f"{chave}_pagina"
+    if st.session_state.get(chave_pagina, 1) > total_paginas:
+        st.session_state[chave_pagina] = total_paginas
+
+    pagina = st.number_input(
+        f"Página (de {total_paginas})",
+        min_value=1,
+        max_value=total_paginas,
+        step=1,
+        key=chave_pagina
+    )
+
+    # Enviar apenas as linhas da página atual
+    inicio = (pagina - 1) * tamanho_pagina
+    fim = min(inicio + tamanho_pagina, total_linhas)
+    st.dataframe(
+        df.iloc[inicio:fim].reset_index(drop=True),
+        column_config=column_config,
+        hide_index=True
+    )
+    st.caption(f"Mostrando {inicio + 1 if total_linhas else 0}–{fim} de {total_linhas:,} linhas")
@@ -0,0 +1,61 @@
+import weakref
+import pandas as pd
+
+# Copy-on-write é o padrão a partir do pandas 3; nas versões anteriores precisa ser ativado
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# Conjuntos de dados vivos no processo (usado pelas métricas de memória)
+_CONJUNTOS_ATIVOS = weakref.WeakSet()
+
+class ConjuntoDados:
+    """
+    Conjunto de dados somente leitura, compartilhado sem cópias entre execuções e sessões
+
+    O DataFrame original nunca é entregue diretamente: cada acesso recebe uma visão
+    rasa (copy-on-write) que compartilha a memória das colunas. Alterações feitas na
+    visão (novas colunas, atribuições, filtros) copiam apenas o que for modificado e
+    não afetam o conjunto compartilhado.
+    """
+
+    def __init__(self, df, nome=None):
+        """
+        Args:
+            df: DataFrame já processado pelo carregamento
+            nome: Nome do conjunto usado nas métricas (por exemplo, a pasta de origem)
+        """
+        self._df = df
+        self.nome = nome
+        self._memoria_bytes = None
+        _CONJUNTOS_ATIVOS.add(self)
+
+    @property
+    def df(self):
+        """
+        Visão copy-on-write do DataFrame compartilhado
+
+        Returns:
+            DataFrame que compartilha a memória das colunas com o conjunto
+        """
+        return self._df.copy(deep=False)
+
+    def memoria_bytes(self):
+        """
+        Memória ocupada pelo DataFrame compartilhado (calculada uma única vez)
+
+        Returns:
+            Tamanho em bytes, incluindo o conteúdo das colunas de texto
+        """
+        if self._memoria_bytes is None:
+            self._memoria_bytes = int(self._df.memory_usage(deep=True).sum())
+        return self._memoria_bytes
+
+# Função para listar os conjuntos carregados
+def conjuntos_ativos():
+    """
+    Lista os conjuntos de dados ainda em memória no processo
+
+    Returns:
+        Lista de ConjuntoDados
+    """
+    return list(_CONJUNTOS_ATIVOS)
@@ -0,0 +1,474 @@
+import os
+import heapq
+import math
+import numpy as np
+import pandas as pd
+from leitores import campos_disponiveis, detectar_formato_arquivo, registrar_campos_disponiveis
+
+# Precisão padrão do HyperLogLog: 2^12 registradores (erro padrão de ~1,6%)
+PRECISAO_HLL = 12
+
+# Parâmetros padrão do Count-Min: erro de até EPSILON * total com probabilidade 1 - DELTA
+EPSILON_CONTAGEM = 0.0005
+DELTA_CONTAGEM = 0.01
+
+# Número de itens monitorados pelo Space-Saving
+CAPACIDADE_TOP = 1000
+
+# Registros processados de cada vez na passagem em fluxo
+TAMANHO_LOTE = 50_000
+
+# Multiplicador do erro padrão usado nos intervalos exibidos (~95%)
+Z_INTERVALO = 2
+
+# Função para calcular hashes de 64 bits
+def calcular_hashes(valores):
+    """
+    Calcula hashes de 64 bits (vetorizado) para alimentar os esboços
+
+    Args:
+        valores: Series ou array de strings
+
+    Returns:
+        Array uint64 com um hash por valor
+    """
+    return pd.util.hash_array(np.asarray(valores, dtype=object))
+
+# Função para calcular o número de bits significativos
+def _tamanho_em_bits(valores):
+    """
+    Calcula o número de bits significativos de cada inteiro (int.bit_length vetorizado)
+
+    Args:
+        valores: Array uint64
+
+    Returns:
+        Array int64 com o tamanho em bits de cada valor (0 para zero)
+    """
+    valores = valores.copy()
+    tamanhos = np.zeros(len(valores), dtype=np.int64)
+    for deslocamento in (32, 16, 8, 4, 2, 1):
+        grandes = valores >= (np.uint64(1) << np.uint64(deslocamento))
+        tamanhos[grandes] += deslocamento
+        valores[grandes] >>= np.uint64(deslocamento)
+    return tamanhos + (valores > 0)
+
+class HyperLogLog:
+    """
+    Contagem aproximada de valores distintos com memória fixa (2^precisao bytes)
+
+    O erro padrão relativo é 1,04 / sqrt(2^precisao).
+    """
+
+    def __init__(self, precisao=PRECISAO_HLL):
+        """
+        Args:
+            precisao: Número de bits do hash usados para escolher o registrador
+        """
+        self.precisao = precisao
+        self.registradores = np.zeros(1 << precisao, dtype=np.uint8)
+
+    @property
+    def erro_padrao(self):
+        """
+        Returns:
+            Erro padrão relativo da estimativa
+        """
+        return 1.04 / math.sqrt(len(self.registradores))
+
+    def adicionar_hashes(self, hashes):
+        """
+        Adiciona valores já convertidos em hash
+
+        Args:
+            hashes: Array uint64
+        """
+        if len(hashes) == 0:
+            return
+        bits_restantes = 64 - self.precisao
+        indices = (hashes >> np.uint64(bits_restantes)).astype(np.intp)
+        restos = hashes & np.uint64((1 << bits_restantes) - 1)
+        # Posição do primeiro bit 1 nos bits restantes (contando a partir de 1)
+        postos = (bits_restantes - _tamanho_em_bits(restos) + 1).astype(np.uint8)
+        np.maximum.at(self.registradores, indices, postos)
+
+    def unir(self, outro):
+        """
+        Acrescenta os valores de outro HyperLogLog de mesma precisão
+
+        Args:
+            outro: HyperLogLog
+        """
+        np.maximum(self.registradores, outro.registradores, out=self.registradores)
+
+    def estimar(self):
+        """
+        Estima o número de valores distintos
+
+        Returns:
+            Estimativa (float)
+        """
+        m = len(self.registradores)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimativa = alfa * m * m / np.ldexp(1.0, -self.registradores.astype(np.int64)).sum()
+        vazios = int(np.count_nonzero(self.registradores == 0))
+        # Correção para poucos valores: contagem linear dos registradores vazios
+        if estimativa <= 2.5 * m and vazios:
+            estimativa = m * math.log(m / vazios)
+        return float(estimativa)
+
+class ContagemMinima:
+    """
+    Esboço Count-Min: estimativa do peso acumulado de qualquer chave com memória fixa
+
+    A estimativa nunca fica abaixo do valor real e, com probabilidade 1 - delta,
+    passa dele no máximo epsilon * total.
+    """
+
+    def __init__(self, epsilon=EPSILON_CONTAGEM, delta=DELTA_CONTAGEM):
+        """
+        Args:
+            epsilon: Erro máximo relativo ao total
+            delta: Probabilidade de o erro passar do limite
+        """
+        self.epsilon = epsilon
+        self.delta = delta
+        self.largura = math.ceil(math.e / epsilon)
+        self.profundidade = math.ceil(math.log(1 / delta))
+        self.tabela = np.zeros((self.profundidade, self.largura), dtype=np.int64)
+        self.total = 0
+
+    @property
+    def erro_maximo(self):
+        """
+        Returns:
+            Maior excesso esperado de uma estimativa (epsilon * total)
+        """
+        return self.epsilon * self.total
+
+    def _colunas(self, hashes):
+        """
+        Calcula a coluna de cada hash em cada linha (hash duplo: h1 + i * h2)
+
+        Args:
+            hashes: Array uint64
+
+        Returns:
+            Array (profundidade, n) de colunas
+        """
+        h1 = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        h2 = (hashes >> np.uint64(32)).astype(np.int64) | 1
+        linhas = np.arange(self.profundidade, dtype=np.int64)[:, None]
+        return (h1[None, :] + linhas * h2[None, :]) % self.largura
+
+    def adicionar_hashes(self, hashes, pesos):
+        """
+        Soma os pesos às chaves (já convertidas em hash)
+
+        Args:
+            hashes: Array uint64
+            pesos: Array de inteiros, um por hash
+        """
+        if len(hashes) == 0:
+            return
+        pesos = np.asarray(pesos, dtype=np.int64)
+        colunas = self._colunas(hashes)
+        for linha in range(self.profundidade):
+            np.add.at(self.tabela[linha], colunas[linha], pesos)
+        self.total += int(pesos.sum())
+
+    def estimar_hashes(self, hashes):
+        """
+        Estima o peso acumulado das chaves (já convertidas em hash)
+
+        Args:
+            hashes: Array uint64
+
+        Returns:
+            Array int64 com a estimativa de cada chave
+        """
+        colunas = self._colunas(np.asarray(hashes, dtype=np.uint64))
+        return self.tabela[np.arange(self.profundidade)[:, None], colunas].min(axis=0)
+
+class SpaceSaving:
+    """
+    Algoritmo Space-Saving (com pesos): itens mais frequentes com memória fixa
+
+    Cada item monitorado guarda o peso contado e o erro máximo herdado ao substituir
+    outro item; o peso real fica entre (contagem - erro) e contagem. Todo item com peso
+    real acima de total / capacidade está garantidamente entre os monitorados.
+    """
+
+    def __init__(self, capacidade=CAPACIDADE_TOP):
+        """
+        Args:
+            capacidade: Número de itens monitorados
+        """
+        self.capacidade = capacidade
+        self.contagens = {}
+        self.erros = {}
+        self.total = 0
+        # Heap de (contagem, chave) com entradas possivelmente desatualizadas
+        self._heap = []
+
+    @property
+    def erro_maximo(self):
+        """
+        Returns:
+            Maior erro possível de uma contagem (total / capacidade)
+        """
+        return self.total / self.capacidade
+
+    def _remover_minimo(self):
+        """
+        Remove o item monitorado de menor contagem
+
+        Returns:
+            (chave, contagem) do item removido
+        """
+        while True:
+            contagem, chave = heapq.heappop(self._heap)
+            if self.contagens.get(chave) == contagem:
+                del self.contagens[chave]
+                del self.erros[chave]
+                return chave, contagem
+
+    def adicionar(self, chaves, pesos):
+        """
+        Soma os pesos às chaves (de preferência já agregadas por lote)
+
+        Args:
+            chaves: Sequência de chaves (inteiros ou strings)
+            pesos: Sequência de pesos inteiros
+        """
+        contagens, erros, heap = self.contagens, self.erros, self._heap
+        for chave, peso in zip(chaves, pesos):
+            peso = int(peso)
+            self.total += peso
+            if chave in contagens:
+                contagens[chave] += peso
+            elif len(contagens) < self.capacidade:
+                contagens[chave] = peso
+                erros[chave] = 0
+            else:
+                _, minimo = self._remover_minimo()
+                contagens[chave] = minimo + peso
+                erros[chave] = minimo
+            heapq.heappush(heap, (contagens[chave], chave))
+
+        # Descartar as entradas desatualizadas quando o heap cresce demais
+        if len(heap) > 4 * self.capacidade:
+            self._heap = [(contagem, chave) for chave, contagem in contagens.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, n):
+        """
+        Lista os itens de maior contagem
+
+        Args:
+            n: Número de itens
+
+        Returns:
+            Lista de (chave, contagem, erro), da maior para a menor contagem
+        """
+        maiores = heapq.nlargest(n, self.contagens.items(), key=lambda item: item[1])
+        return [(chave, contagem, self.erros[chave]) for chave, contagem in maiores]
+
+class ResumoAproximado:
+    """
+    Esboços de um histórico de escuta, preenchidos em uma única passagem em fluxo
+
+    - Artistas e músicas distintos por mês: HyperLogLog (um por mês e tipo)
+    - Artistas e músicas mais ouvidos (por minutos): Space-Saving, com o Count-Min
+      estreitando o limite superior de cada item
+    - Totais de reproduções, minutos e puladas: contadores exatos
+
+    A memória não depende do número de reproduções; só cresce com o número de meses
+    do histórico (2 x 4 KB por mês).
+    """
+
+    def __init__(self, precisao=PRECISAO_HLL, epsilon=EPSILON_CONTAGEM, delta=DELTA_CONTAGEM,
+                 capacidade=CAPACIDADE_TOP):
+        """
+        Args:
+            precisao: Precisão dos HyperLogLog
+            epsilon: Erro relativo dos Count-Min
+            delta: Probabilidade de falha dos Count-Min
+            capacidade: Itens monitorados pelos Space-Saving
+        """
+        self.precisao = precisao
+        self.reproducoes = 0
+        self.ms_total = 0
+        self.puladas = 0
+        # Colunas do esquema comum preenchidas pelos formatos lidos (ver leitores.campos_disponiveis)
+        self.campos = set()
+        self.distintos_mes = {'artist': {}, 'track': {}}
+        self.contagem_minima = {tipo: ContagemMinima(epsilon, delta) for tipo in ('artist', 'track')}
+        self.mais_ouvidos = {tipo: SpaceSaving(capacidade) for tipo in ('artist', 'track')}
+        # Nome de exibição apenas dos itens monitorados pelo Space-Saving
+        self.rotulos = {'artist': {}, 'track': {}}
+
+    def adicionar_lote(self, lote):
+        """
+        Atualiza os esboços com um lote de reproduções
+
+        Args:
+            lote: DataFrame no esquema comum dos leitores (ts em UTC, ms_played, master_metadata_*)
+        """
+        if not len(lote):
+            return
+        self.reproducoes += len(lote)
+        self.campos |= campos_disponiveis(lote)
+        self.ms_total += int(lote['ms_played'].sum())
+        self.puladas += int((lote['skipped'] == True).sum())
+
+        artista = lote['master_metadata_album_artist_name']
+        faixa = lote['master_metadata_track_name']
+        # Mesma identidade do carregamento exato: URI da faixa, ou o par música/artista
+        chave_faixa = lote['spotify_track_uri'].where(faixa.notna())
+        sem_uri = faixa.notna() & chave_faixa.isna()
+        chave_faixa = chave_faixa.astype(object)
+        chave_faixa[sem_uri] = faixa[sem_uri] + '\x1f' + artista[sem_uri].fillna('')
+
+        # Mês do horário (UTC) como texto "AAAA-MM"
+        mes = pd.Series(np.datetime_as_string(lote['ts'].dt.tz_convert(None).to_numpy().astype('datetime64[M]')))
+
+        for tipo, chave, rotulo in (
+            ('artist', artista, artista),
+            ('track', chave_faixa, faixa + ' - ' + artista.fillna('')),
+        ):
+            validos = chave.notna().to_numpy()
+            if not validos.any():
+                continue
+            hashes = calcular_hashes(chave[validos])
+            meses = mes[validos].to_numpy()
+            pesos = lote['ms_played'][validos].to_numpy(dtype=np.int64)
+
+            # Distintos por mês
+            for valor_mes, posicoes in pd.Series(np.arange(len(meses))).groupby(meses).indices.items():
+                hll = self.distintos_mes[tipo].get(valor_mes)
+                if hll is None:
+                    hll = self.distintos_mes[tipo][valor_mes] = HyperLogLog(self.precisao)
+                hll.adicionar_hashes(hashes[posicoes])
+
+            # Pesos por item: agregados no lote antes de alimentar os esboços
+            agregado = pd.Series(pesos).groupby(hashes).sum()
+            hashes_unicos = agregado.index.to_numpy(dtype=np.uint64)
+            self.contagem_minima[tipo].adicionar_hashes(hashes_unicos, agregado.to_numpy())
+            self.mais_ouvidos[tipo].adicionar(hashes_unicos.tolist(), agregado.to_numpy().tolist())
+
+            # Guardar o nome dos itens que entraram no monitoramento e esquecer os que saíram
+            monitorados = self.mais_ouvidos[tipo].contagens
+            rotulos = self.rotulos[tipo]
+            novos = [h for h in dict.fromkeys(hashes.tolist()) if h in monitorados and h not in rotulos]
+            if novos:
+                primeiros = pd.Series(rotulo[validos].to_numpy(), index=hashes)
+                primeiros = primeiros[~primeiros.index.duplicated()]
+                for h in novos:
+                    rotulos[h] = primeiros[np.uint64(h)]
+            if len(rotulos) > len(monitorados):
+                for h in [h for h in rotulos if h not in monitorados]:
+                    del rotulos[h]
+
+    def distintos_por_mes(self):
+        """
+        Estima os artistas e músicas distintos de cada mês
+
+        Returns:
+            DataFrame com mes, artistas, artistas_erro, musicas e musicas_erro
+            (o erro é a margem de ~95% da estimativa)
+        """
+        linhas = []
+        for mes in sorted(set(self.distintos_mes['artist']) | set(self.distintos_mes['track'])):
+            linha = {'mes': mes}
+            for tipo, nome in (('artist', 'artistas'), ('track', 'musicas')):
+                hll = self.distintos_mes[tipo].get(mes)
+                estimativa = hll.estimar() if hll is not None else 0.0
+                linha[nome] = estimativa
+                linha[f'{nome}_erro'] = Z_INTERVALO * hll.erro_padrao * estimativa if hll is not None else 0.0
+            linhas.append(linha)
+        return pd.DataFrame(linhas, columns=['mes', 'artistas', 'artistas_erro', 'musicas', 'musicas_erro'])
+
+    def distintos_totais(self, tipo):
+        """
+        Estima os itens distintos de todo o histórico (união dos meses)
+
+        Args:
+            tipo: 'artist' ou 'track'
+
+        Returns:
+            (float, float): Estimativa e margem de erro de ~95%
+        """
+        total = HyperLogLog(self.precisao)
+        for hll in self.distintos_mes[tipo].values():
+            total.unir(hll)
+        estimativa = total.estimar()
+        return estimativa, Z_INTERVALO * total.erro_padrao * estimativa
+
+    def top(self, tipo, n=10):
+        """
+        Lista os itens mais ouvidos com o intervalo garantido de minutos
+
+        Args:
+            tipo: 'artist' ou 'track'
+            n: Número de itens
+
+        Returns:
+            DataFrame com nome, minutos (estimativa), minutos_min e minutos_max
+        """
+        itens = self.mais_ouvidos[tipo].top(n)
+        if not itens:
+            return pd.DataFrame(columns=['nome', 'minutos', 'minutos_min', 'minutos_max'])
+        hashes = np.array([chave for chave, _, _ in itens], dtype=np.uint64)
+        # Space-Saving e Count-Min só superestimam: o menor dos dois é o limite superior mais justo
+        superiores = np.minimum([contagem for _, contagem, _ in itens], self.contagem_minima[tipo].estimar_hashes(hashes))
+        inferiores = np.array([contagem - erro for _, contagem, erro in itens])
+        top = pd.DataFrame({
+            'nome': [self.rotulos[tipo].get(chave, '?') for chave, _, _ in itens],
+            'minutos_min': inferiores / 60000,
+            'minutos_max': superiores / 60000,
+        })
+        top['minutos'] = (top['minutos_min'] + top['minutos_max']) / 2
+        return top[['nome', 'minutos', 'minutos_min', 'minutos_max']]
+
+    def memoria_bytes(self):
+        """
+        Returns:
+            Memória ocupada pelos esboços (aproximada), em bytes
+        """
+        total = sum(hll.registradores.nbytes for meses in self.distintos_mes.values() for hll in meses.values())
+        total += sum(contagem.tabela.nbytes for contagem in self.contagem_minima.values())
+        # Estimativa para os dicionários do Space-Saving (chave, contagem, erro e nome)
+        total += sum(len(top.contagens) * 200 for top in self.mais_ouvidos.values())
+        return total
+
+# Função para resumir uma exportação em fluxo
+def resumir_exportacao(pasta_dados, tamanho_lote=TAMANHO_LOTE, **parametros):
+    """
+    Preenche os esboços lendo os arquivos JSON um de cada vez, em lotes
+
+    Só um arquivo da exportação fica em memória por vez (o Spotify divide o histórico
+    em arquivos de tamanho limitado); o DataFrame completo nunca é montado. Cada arquivo
+    passa pelo leitor do seu formato, só com as colunas do esquema comum.
+
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON (subpasta 'data')
+        tamanho_lote: Registros por lote
+        **parametros: Parâmetros repassados a ResumoAproximado
+
+    Returns:
+        ResumoAproximado preenchido
+    """
+    resumo = ResumoAproximado(**parametros)
+    caminho_pasta = os.path.join(pasta_dados, 'data')
+    for arquivo in sorted(os.listdir(caminho_pasta)):
+        if arquivo.endswith('.json'):
+            caminho = os.path.join(caminho_pasta, arquivo)
+            leitor = detectar_formato_arquivo(caminho)
+            if leitor is None:
+                continue
+            reproducoes = registrar_campos_disponiveis(leitor.ler_arquivo(caminho), [leitor])
+            for inicio in range(0, len(reproducoes), tamanho_lote):
+                resumo.adicionar_lote(reproducoes.iloc[inicio:inicio + tamanho_lote])
+            del reproducoes
+    return resumo
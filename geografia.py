@@ -0,0 +1,365 @@
+import os
+import csv
+import bisect
+import gettext
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+
+# Arquivo do gazetteer offline distribuído com o painel
+ARQUIVO_CIDADES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cidades.csv')
+
+# Raio médio da Terra, em km
+RAIO_TERRA_KM = 6371.0088
+
+# Código usado pelo Spotify quando o país da conexão é desconhecido
+PAIS_DESCONHECIDO = 'ZZ'
+
+# Função para normalizar um nome de cidade
+def normalizar_nome(nome):
+    """
+    Normaliza um nome para a busca: sem acentos, minúsculo e com espaços simples
+
+    Args:
+        nome: Nome digitado ou do gazetteer
+
+    Returns:
+        Nome normalizado ("São  Paulo" -> "sao paulo")
+    """
+    decomposto = unicodedata.normalize('NFKD', nome)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().replace('.', ' ').split())
+
+# Função para converter coordenadas em vetores unitários
+def _vetores_unitarios(latitudes, longitudes):
+    """
+    Converte latitude e longitude (graus) em vetores unitários na esfera
+
+    A distância euclidiana entre esses vetores (corda) cresce com a distância
+    sobre a superfície, o que permite usar uma KD-tree comum em 3 dimensões.
+
+    Args:
+        latitudes: Array de latitudes em graus
+        longitudes: Array de longitudes em graus
+
+    Returns:
+        Array (n, 3) de vetores unitários
+    """
+    lat = np.radians(latitudes)
+    lon = np.radians(longitudes)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+# Função para converter uma distância na superfície em corda
+def _corda(distancia_km):
+    """
+    Args:
+        distancia_km: Distância sobre a superfície da Terra
+
+    Returns:
+        Comprimento da corda correspondente entre vetores unitários
+    """
+    return 2 * np.sin(min(distancia_km / RAIO_TERRA_KM, np.pi) / 2)
+
+# Função para calcular distâncias pela fórmula de haversine
+def distancias_haversine(latitude, longitude, latitudes, longitudes):
+    """
+    Calcula as distâncias de um ponto a vários outros (vetorizado)
+
+    Args:
+        latitude: Latitude de origem em graus
+        longitude: Longitude de origem em graus
+        latitudes: Array de latitudes de destino em graus
+        longitudes: Array de longitudes de destino em graus
+
+    Returns:
+        Array de distâncias em km
+    """
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+class _IndiceForcaBruta:
+    """
+    Substituto da cKDTree (mesma interface usada aqui) quando a SciPy não está instalada
+
+    Para alguns milhares de cidades uma varredura vetorizada leva menos de um milissegundo.
+    """
+
+    def __init__(self, vetores):
+        self.vetores = vetores
+
+    def query_ball_point(self, ponto, r):
+        distancias2 = ((self.vetores - ponto) ** 2).sum(axis=1)
+        return np.flatnonzero(distancias2 <= r * r).tolist()
+
+    def query(self, ponto, k):
+        distancias = np.sqrt(((self.vetores - ponto) ** 2).sum(axis=1))
+        k = min(k, len(distancias))
+        indices = np.argpartition(distancias, k - 1)[:k]
+        indices = indices[np.argsort(distancias[indices])]
+        return distancias[indices], indices
+
+# Função para criar o índice espacial
+def _criar_indice_espacial(vetores):
+    """
+    Cria a KD-tree sobre os vetores unitários das cidades
+
+    A SciPy é opcional (comentada em requirements.txt) e importada só aqui
+    (scipy.spatial leva centenas de milissegundos para importar); sem ela, a busca
+    espacial é feita por força bruta em NumPy, com os mesmos resultados.
+
+    Args:
+        vetores: Array (n, 3) de vetores unitários
+
+    Returns:
+        Índice com os métodos query_ball_point e query
+    """
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return _IndiceForcaBruta(vetores)
+    return cKDTree(vetores)
+
+class Gazetteer:
+    """
+    Base offline de cidades com busca por nome e índice espacial
+
+    Os nomes (oficial e alternativos, sem acentos) ficam em um dicionário para busca
+    em tempo constante, e as coordenadas em uma KD-tree sobre vetores unitários para
+    encontrar as cidades dentro de um raio sem percorrer a base inteira.
+    """
+
+    def __init__(self, cidades):
+        """
+        Args:
+            cidades: Lista de dicionários com nome, pais, regiao, latitude, longitude
+                e alternativos (nomes separados por '|')
+        """
+        self.nomes = [cidade['nome'] for cidade in cidades]
+        self.paises = [cidade['pais'] for cidade in cidades]
+        self.regioes = [cidade['regiao'] for cidade in cidades]
+        self.latitudes = np.array([float(cidade['latitude']) for cidade in cidades])
+        self.longitudes = np.array([float(cidade['longitude']) for cidade in cidades])
+
+        # Nome normalizado -> índice da cidade (o primeiro cadastrado vence em caso de homônimos)
+        self._indice_nomes = {}
+        for indice, cidade in enumerate(cidades):
+            alternativos = (cidade.get('alternativos') or '').split('|')
+            for nome in [cidade['nome'], *alternativos]:
+                if nome.strip():
+                    self._indice_nomes.setdefault(normalizar_nome(nome), indice)
+        # Chaves ordenadas para a busca por prefixo
+        self._chaves_ordenadas = sorted(self._indice_nomes)
+
+        vetores = _vetores_unitarios(self.latitudes, self.longitudes)
+        self._arvore = _criar_indice_espacial(vetores)
+        self._vetores = vetores
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def buscar(self, nome):
+        """
+        Encontra uma cidade pelo nome, ignorando acentos e maiúsculas
+
+        Aceita também "Cidade, País" ou "Cidade - UF" e, se o nome não for exato,
+        um prefixo que corresponda a uma única cidade ("florian" -> Florianópolis).
+
+        Args:
+            nome: Nome digitado pelo usuário
+
+        Returns:
+            Índice da cidade no gazetteer, ou None se não encontrada
+        """
+        normalizado = normalizar_nome(nome)
+        if not normalizado:
+            return None
+        candidatos = [normalizado]
+        for separador in (',', ' - ', '/'):
+            if separador in normalizado:
+                candidatos.append(normalizado.split(separador)[0].strip())
+
+        for candidato in candidatos:
+            indice = self._indice_nomes.get(candidato)
+            if indice is not None:
+                return indice
+
+        prefixo = candidatos[-1]
+        encontrados = {self._indice_nomes[chave] for chave in self._chaves_com_prefixo(prefixo)}
+        return encontrados.pop() if len(encontrados) == 1 else None
+
+    def sugerir(self, nome, limite=5):
+        """
+        Sugere cidades cujo nome começa com o texto digitado
+
+        Args:
+            nome: Texto digitado pelo usuário
+            limite: Número máximo de sugestões
+
+        Returns:
+            Lista de nomes oficiais de cidades
+        """
+        normalizado = normalizar_nome(nome)
+        sugestoes = []
+        # Primeiro o texto inteiro, depois só as três primeiras letras
+        for prefixo in dict.fromkeys([normalizado, normalizado[:3]]):
+            if len(prefixo) < 3:
+                continue
+            for chave in self._chaves_com_prefixo(prefixo):
+                nome_oficial = self.nomes[self._indice_nomes[chave]]
+                if nome_oficial not in sugestoes:
+                    sugestoes.append(nome_oficial)
+                if len(sugestoes) == limite:
+                    return sugestoes
+        return sugestoes
+
+    def distancias(self, indice_origem, indices):
+        """
+        Calcula as distâncias de uma cidade a outras
+
+        Args:
+            indice_origem: Índice da cidade de origem
+            indices: Índices das cidades de destino
+
+        Returns:
+            Array de distâncias em km
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        return distancias_haversine(
+            self.latitudes[indice_origem], self.longitudes[indice_origem],
+            self.latitudes[indices], self.longitudes[indices]
+        )
+
+    def cidades_no_raio(self, indice_origem, raio_km):
+        """
+        Lista as cidades a até raio_km de uma cidade (usando o índice espacial)
+
+        Args:
+            indice_origem: Índice da cidade de origem
+            raio_km: Raio de busca em km
+
+        Returns:
+            Array de índices das cidades dentro do raio (inclui a própria origem)
+        """
+        indices = self._arvore.query_ball_point(self._vetores[indice_origem], _corda(raio_km))
+        return np.asarray(indices, dtype=np.intp)
+
+    def mais_proximas(self, indice_origem, quantidade):
+        """
+        Lista as cidades mais próximas de uma cidade
+
+        Args:
+            indice_origem: Índice da cidade de origem
+            quantidade: Número de cidades (a própria origem é a primeira)
+
+        Returns:
+            Array de índices, da mais próxima para a mais distante
+        """
+        _, indices = self._arvore.query(self._vetores[indice_origem], k=min(quantidade, len(self)))
+        return np.atleast_1d(np.asarray(indices, dtype=np.intp))
+
+    def sortear_destinos(self, indice_origem, quantidade, raio_km, distancia_minima_km=30, rng=None):
+        """
+        Sorteia cidades de destino a até raio_km da origem
+
+        Se não houver cidades suficientes no raio, completa com as mais próximas de fora dele.
+
+        Args:
+            indice_origem: Índice da cidade de origem
+            quantidade: Número de cidades a sortear
+            raio_km: Raio de busca em km
+            distancia_minima_km: Cidades mais próximas que isso (a própria origem, vizinhas) são ignoradas
+            rng: numpy.random.Generator (opcional)
+
+        Returns:
+            Lista de tuplas (nome da cidade, distância em km)
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+
+        candidatos = self.cidades_no_raio(indice_origem, raio_km)
+        distancias = self.distancias(indice_origem, candidatos)
+        validos = distancias >= distancia_minima_km
+        candidatos, distancias = candidatos[validos], distancias[validos]
+
+        if len(candidatos) < quantidade:
+            # Poucas cidades no raio (ilhas, regiões pouco povoadas na base): usar as mais próximas
+            proximas = self.mais_proximas(indice_origem, quantidade * 4 + 1)
+            distancias_proximas = self.distancias(indice_origem, proximas)
+            validos = distancias_proximas >= distancia_minima_km
+            candidatos, distancias = proximas[validos][:quantidade], distancias_proximas[validos][:quantidade]
+
+        escolhidos = rng.choice(len(candidatos), size=min(quantidade, len(candidatos)), replace=False)
+        return [(self.nomes[candidatos[i]], float(distancias[i])) for i in escolhidos]
+
+    def _chaves_com_prefixo(self, prefixo):
+        """
+        Percorre os nomes normalizados que começam com um prefixo (busca binária)
+
+        Args:
+            prefixo: Prefixo normalizado
+
+        Yields:
+            Nomes normalizados em ordem alfabética
+        """
+        posicao = bisect.bisect_left(self._chaves_ordenadas, prefixo)
+        while posicao < len(self._chaves_ordenadas) and self._chaves_ordenadas[posicao].startswith(prefixo):
+            yield self._chaves_ordenadas[posicao]
+            posicao += 1
+
+# Função para carregar o gazetteer
+@lru_cache(maxsize=None)
+def carregar_gazetteer(caminho=ARQUIVO_CIDADES):
+    """
+    Carrega o gazetteer do arquivo CSV (uma única vez por processo)
+
+    Args:
+        caminho: Caminho do CSV com as colunas nome, pais, regiao, latitude, longitude e alternativos
+
+    Returns:
+        Gazetteer pronto para consultas
+    """
+    with open(caminho, encoding='utf-8', newline='') as f:
+        return Gazetteer(list(csv.DictReader(f)))
+
+# Função para obter a tradução dos nomes de países
+@lru_cache(maxsize=None)
+def _traducao_paises():
+    """
+    Carrega a tradução para o português dos nomes de países do pycountry
+
+    Returns:
+        Função que traduz um nome (identidade se não houver tradução)
+    """
+    import pycountry
+    try:
+        return gettext.translation('iso3166-1', pycountry.LOCALES_DIR, languages=['pt_BR', 'pt']).gettext
+    except OSError:
+        return lambda nome: nome
+
+# Função para obter o nome de um país pelo código
+@lru_cache(maxsize=None)
+def nome_pais(codigo):
+    """
+    Resolve um código ISO 3166-1 alfa-2 (campo conn_country) no nome do país em português
+
+    O resultado fica em cache por código: a resolução roda uma vez por país distinto,
+    nunca por reprodução. O pycountry é importado só na primeira chamada.
+
+    Args:
+        codigo: Código de duas letras ("BR")
+
+    Returns:
+        Nome do país ("Brasil"), ou o próprio código se ele não for reconhecido
+    """
+    if not isinstance(codigo, str) or not codigo.strip() or codigo.upper() == PAIS_DESCONHECIDO:
+        return "Desconhecido"
+    try:
+        import pycountry
+    except ImportError:
+        return codigo
+    pais = pycountry.countries.get(alpha_2=codigo.strip().upper())
+    if pais is None:
+        return codigo
+    return _traducao_paises()(getattr(pais, 'common_name', pais.name))
@@ -0,0 +1,334 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# Reproduções por arquivo JSON, próximo do tamanho dos arquivos da exportação real (~12 MB)
+REPRODUCOES_POR_ARQUIVO = 30_000
+
+# Limite superior do espaço em disco de uma reprodução gravada (~510 bytes em média)
+BYTES_POR_REPRODUCAO = 600
+
+# Reproduções geradas de cada vez (cada lote é independente e cobre um trecho do período)
+TAMANHO_LOTE = 500_000
+
+# Período coberto pelo histórico
+INICIO_PADRAO = '2016-01-01'
+ANOS_PADRAO = 8
+
+# Peso de cada hora do dia no início das sessões (madrugada vazia, picos no trajeto e à noite)
+PESOS_HORA_UTIL = np.array([
+    0.4, 0.2, 0.1, 0.1, 0.1, 0.3, 1.2, 2.4, 3.0, 2.2, 1.8, 1.7,
+    2.0, 1.9, 1.7, 1.7, 1.9, 2.6, 3.0, 2.7, 2.4, 2.1, 1.6, 0.9
+])
+PESOS_HORA_FIM_DE_SEMANA = np.array([
+    1.0, 0.8, 0.5, 0.3, 0.2, 0.2, 0.3, 0.5, 0.9, 1.5, 2.0, 2.3,
+    2.4, 2.4, 2.3, 2.2, 2.2, 2.3, 2.4, 2.5, 2.5, 2.3, 1.9, 1.4
+])
+
+# Peso de cada dia da semana (segunda a domingo)
+PESOS_DIA_SEMANA = np.array([1.0, 1.0, 1.0, 1.05, 1.15, 1.25, 0.95])
+
+# Plataformas: (nome na exportação, peso, probabilidade de a sessão ser offline)
+PLATAFORMAS = (
+    ('android', 0.42, 0.12),
+    ('ios', 0.25, 0.12),
+    ('windows', 0.15, 0.01),
+    ('osx', 0.08, 0.01),
+    ('web_player', 0.06, 0.0),
+    ('cast_to_device', 0.04, 0.0)
+)
+
+# Países de conexão (o usuário mora no primeiro e às vezes viaja)
+PAISES = ('BR', 'PT', 'US', 'AR', 'ES', 'FR')
+
+# Proporção de reproduções de podcasts (sem os campos de música)
+PROPORCAO_PODCASTS = 0.02
+
+# Palavras combinadas nos nomes sintéticos
+PALAVRAS_A = (
+    'Noite', 'Lua', 'Sol', 'Mar', 'Vento', 'Fogo', 'Rio', 'Céu', 'Estrela', 'Tempo',
+    'Cidade', 'Sonho', 'Chuva', 'Neon', 'Areia', 'Vidro', 'Aurora', 'Eco', 'Onda', 'Trilho'
+)
+PALAVRAS_B = (
+    'Azul', 'Elétrico', 'Selvagem', 'Perdido', 'Dourado', 'Distante', 'Quente', 'Calmo',
+    'Infinito', 'Secreto', 'Veloz', 'Antigo', 'Brilhante', 'Noturno', 'Livre', 'Real'
+)
+
+# Função para gerar nomes sintéticos únicos
+def _gerar_nomes(quantidade, prefixo=''):
+    """
+    Gera nomes legíveis e únicos combinando palavras (com numeração quando as combinações acabam)
+
+    Args:
+        quantidade: Número de nomes
+        prefixo: Texto antes de cada nome
+
+    Returns:
+        Array de strings (object)
+    """
+    combinacoes = len(PALAVRAS_A) * len(PALAVRAS_B)
+    nomes = [
+        f"{prefixo}{PALAVRAS_A[i % len(PALAVRAS_A)]} {PALAVRAS_B[(i + 5 * (i // len(PALAVRAS_A))) % len(PALAVRAS_B)]}"
+        + (f" {i // combinacoes + 1}" if i >= combinacoes else '')
+        for i in range(quantidade)
+    ]
+    return np.array(nomes, dtype=object)
+
+class CatalogoSintetico:
+    """
+    Artistas, álbuns e faixas de um histórico sintético, com popularidade de Zipf
+
+    Poucos artistas concentram a maior parte das reproduções e, dentro de cada artista,
+    poucas faixas concentram a maior parte das reproduções dele.
+    """
+
+    def __init__(self, n_reproducoes, semente=42):
+        """
+        Args:
+            n_reproducoes: Tamanho do histórico (define o tamanho do catálogo)
+            semente: Semente do gerador aleatório
+        """
+        rng = np.random.default_rng(semente)
+
+        self.n_artistas = int(np.clip(2 * np.sqrt(n_reproducoes), 50, 200_000))
+        popularidade = 1 / np.arange(1, self.n_artistas + 1) ** 1.1
+        self.prob_artistas = popularidade / popularidade.sum()
+
+        # Faixas por artista: 5 a ~200, mais para os artistas populares
+        self.faixas_por_artista = np.clip(5 + rng.zipf(1.8, self.n_artistas), 5, 200)
+        self.primeira_faixa = np.concatenate(([0], np.cumsum(self.faixas_por_artista)[:-1]))
+        n_faixas = int(self.faixas_por_artista.sum())
+
+        artista_da_faixa = np.repeat(np.arange(self.n_artistas), self.faixas_por_artista)
+        posicao_na_obra = np.arange(n_faixas) - self.primeira_faixa[artista_da_faixa]
+
+        self.nomes_artistas = _gerar_nomes(self.n_artistas)
+        self.nomes_faixas = _gerar_nomes(n_faixas)
+        # Álbuns de 10 faixas na ordem da obra de cada artista
+        numero_album = posicao_na_obra // 10
+        self.nomes_albuns = np.array(
+            [f"{nome} Vol. {numero + 1}" for nome, numero in zip(self.nomes_artistas[artista_da_faixa], numero_album)],
+            dtype=object
+        )
+        self.uris = np.array([f"spotify:track:{i:022d}" for i in range(n_faixas)], dtype=object)
+        # Duração de cada faixa, em ms
+        self.duracoes = np.clip(rng.normal(210_000, 50_000, n_faixas), 90_000, 480_000).astype(np.int64)
+
+        self.podcasts = _gerar_nomes(20, prefixo='Podcast ')
+
+    def sortear_faixas(self, rng, quantidade):
+        """
+        Sorteia faixas seguindo a popularidade dos artistas e das faixas de cada artista
+
+        Args:
+            rng: numpy.random.Generator
+            quantidade: Número de faixas
+
+        Returns:
+            Array de índices de faixas do catálogo
+        """
+        artistas = rng.choice(self.n_artistas, size=quantidade, p=self.prob_artistas)
+        posicoes = (rng.zipf(1.5, quantidade) - 1) % self.faixas_por_artista[artistas]
+        return self.primeira_faixa[artistas] + posicoes
+
+# Função para gerar um lote de reproduções
+def gerar_lote(catalogo, quantidade, inicio_s, fim_s, semente):
+    """
+    Gera as reproduções de um trecho do período, organizadas em sessões
+
+    Args:
+        catalogo: CatalogoSintetico
+        quantidade: Número (aproximado) de reproduções do trecho
+        inicio_s: Início do trecho (segundos desde 1970, UTC)
+        fim_s: Fim do trecho (segundos desde 1970, UTC)
+        semente: Semente do lote (sequência de inteiros aceita pelo numpy)
+
+    Returns:
+        DataFrame com os campos da exportação estendida do Spotify, em ordem cronológica
+    """
+    rng = np.random.default_rng(semente)
+
+    # 1. Sessões: tamanho geométrico (média de 12 faixas) e início com ritmo diário e semanal
+    tamanhos = rng.geometric(1 / 12, size=quantidade // 12 + 16)
+    tamanhos = tamanhos[:np.searchsorted(np.cumsum(tamanhos), quantidade) + 1]
+    tamanhos[-1] -= tamanhos.sum() - quantidade
+    tamanhos = tamanhos[tamanhos > 0]
+    n_sessoes = len(tamanhos)
+
+    primeiro_dia = inicio_s // 86400
+    n_dias = max(1, (fim_s - inicio_s) // 86400)
+    dias = np.arange(primeiro_dia, primeiro_dia + n_dias)
+    dia_semana = (dias + 3) % 7  # 1970-01-01 foi uma quinta-feira
+    pesos_dias = PESOS_DIA_SEMANA[dia_semana]
+    dias_sessao = np.sort(rng.choice(dias, size=n_sessoes, p=pesos_dias / pesos_dias.sum()))
+    fim_de_semana = (dias_sessao + 3) % 7 >= 5
+    horas = np.where(
+        fim_de_semana,
+        rng.choice(24, size=n_sessoes, p=PESOS_HORA_FIM_DE_SEMANA / PESOS_HORA_FIM_DE_SEMANA.sum()),
+        rng.choice(24, size=n_sessoes, p=PESOS_HORA_UTIL / PESOS_HORA_UTIL.sum())
+    )
+    inicio_sessao = dias_sessao * 86400 + horas * 3600 + rng.integers(0, 3600, n_sessoes)
+
+    # Atributos de cada sessão
+    pesos_plataformas = np.array([peso for _, peso, _ in PLATAFORMAS])
+    plataforma = rng.choice(len(PLATAFORMAS), size=n_sessoes, p=pesos_plataformas / pesos_plataformas.sum())
+    prob_offline = np.array([offline for _, _, offline in PLATAFORMAS])[plataforma]
+    offline_sessao = rng.random(n_sessoes) < prob_offline
+    shuffle_sessao = rng.random(n_sessoes) < 0.45
+    viajando = rng.random(n_sessoes) < 0.03
+    pais_sessao = np.where(viajando, rng.integers(1, len(PAISES), n_sessoes), 0)
+    ip_sessao = rng.integers(0, 2 ** 24, n_sessoes)
+
+    # 2. Reproduções: cada uma herda a sessão
+    sessao = np.repeat(np.arange(n_sessoes), tamanhos)
+    n = len(sessao)
+    posicao = np.arange(n) - np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos)
+
+    faixas = catalogo.sortear_faixas(rng, n)
+    duracao = catalogo.duracoes[faixas]
+
+    # Mais pulos no modo aleatório; uma faixa pulada toca só um trecho
+    pulada = rng.random(n) < np.where(shuffle_sessao[sessao], 0.28, 0.14)
+    ms_played = np.where(pulada, (duracao * rng.uniform(0.01, 0.3, n)).astype(np.int64), duracao)
+    ultima = np.r_[posicao[1:] == 0, True]
+    # A última faixa da sessão às vezes é interrompida (fim da viagem, do trabalho...)
+    interrompida = ultima & ~pulada & (rng.random(n) < 0.3)
+    ms_played = np.where(interrompida, (ms_played * rng.uniform(0.1, 0.9, n)).astype(np.int64), ms_played)
+
+    # 'ts' é o fim da reprodução: início da sessão + tudo o que tocou até aqui (com pequenas pausas)
+    segundos = ms_played // 1000 + rng.integers(0, 4, n)
+    decorrido = np.cumsum(segundos)
+    primeiras = np.cumsum(tamanhos) - tamanhos
+    ts = inicio_sessao[sessao] + decorrido - np.repeat(decorrido[primeiras] - segundos[primeiras], tamanhos)
+    ordem = np.argsort(ts, kind='stable')
+
+    # O motivo de início segue o motivo de fim da faixa anterior da mesma sessão
+    reason_end = np.where(pulada, 'fwdbtn', np.where(interrompida, 'endplay', 'trackdone')).astype(object)
+    reason_start = np.where(
+        posicao == 0,
+        np.where(rng.random(n) < 0.5, 'clickrow', 'playbtn'),
+        np.concatenate((['trackdone'], reason_end[:-1]))
+    ).astype(object)
+
+    # Podcasts: sem os campos de música e com os campos de episódio
+    podcast = rng.random(n) < PROPORCAO_PODCASTS
+    episodio = rng.integers(0, len(catalogo.podcasts), n)
+    faixa_ou_nada = lambda valores: np.where(podcast, None, valores)
+
+    plataformas = np.array([nome for nome, _, _ in PLATAFORMAS], dtype=object)
+    paises = np.array(PAISES, dtype=object)
+    # Um endereço fictício (rede 10.0.0.0/8) por sessão, montado só para as sessões e depois repetido
+    octetos = [pd.Series(valores).astype(str) for valores in (ip_sessao >> 16, (ip_sessao >> 8) & 255, ip_sessao & 255)]
+    ip_addr = ('10.' + octetos[0] + '.' + octetos[1] + '.' + octetos[2]).to_numpy()[sessao]
+    offline = offline_sessao[sessao]
+
+    lote = pd.DataFrame({
+        'ts': np.char.add(np.datetime_as_string(ts.astype('datetime64[s]'), unit='s'), 'Z').astype(object),
+        'platform': plataformas[plataforma[sessao]],
+        'ms_played': ms_played,
+        'conn_country': paises[pais_sessao[sessao]],
+        'ip_addr': ip_addr,
+        'master_metadata_track_name': faixa_ou_nada(catalogo.nomes_faixas[faixas]),
+        'master_metadata_album_artist_name': faixa_ou_nada(catalogo.nomes_artistas[np.searchsorted(catalogo.primeira_faixa, faixas, side='right') - 1]),
+        'master_metadata_album_album_name': faixa_ou_nada(catalogo.nomes_albuns[faixas]),
+        'spotify_track_uri': faixa_ou_nada(catalogo.uris[faixas]),
+        'episode_name': np.where(podcast, np.char.add('Episódio ', (episodio * 7 + posicao).astype(str)).astype(object), None),
+        'episode_show_name': np.where(podcast, catalogo.podcasts[episodio], None),
+        'reason_start': reason_start,
+        'reason_end': reason_end,
+        'shuffle': shuffle_sessao[sessao],
+        'skipped': pulada,
+        'offline': offline,
+        'offline_timestamp': np.where(offline, ts - rng.integers(60, 86400, n), 0),
+        'incognito_mode': False
+    })
+    return lote.iloc[ordem].reset_index(drop=True)
+
+# Função para gerar um histórico em lotes
+def gerar_lotes(n_reproducoes, tamanho_lote=TAMANHO_LOTE, semente=42, inicio=INICIO_PADRAO, anos=ANOS_PADRAO):
+    """
+    Gera um histórico sintético em lotes cronológicos, sem montar o histórico inteiro
+
+    Cada lote cobre um trecho igual do período e tem sua própria semente, então o
+    resultado é determinístico e a memória depende só do tamanho do lote.
+
+    Args:
+        n_reproducoes: Número total de reproduções
+        tamanho_lote: Reproduções por lote
+        semente: Semente do gerador
+        inicio: Data inicial do histórico
+        anos: Duração do histórico em anos
+
+    Yields:
+        DataFrames com os campos da exportação estendida do Spotify
+    """
+    catalogo = CatalogoSintetico(n_reproducoes, semente)
+    inicio_s = pd.Timestamp(inicio, tz='UTC').value // 10 ** 9
+    duracao_s = int(anos * 365.25 * 86400)
+
+    n_lotes = max(1, -(-n_reproducoes // tamanho_lote))
+    for indice in range(n_lotes):
+        quantidade = min(tamanho_lote, n_reproducoes - indice * tamanho_lote)
+        trecho_inicio = inicio_s + duracao_s * indice // n_lotes
+        trecho_fim = inicio_s + duracao_s * (indice + 1) // n_lotes
+        yield gerar_lote(catalogo, quantidade, trecho_inicio, trecho_fim, (semente, indice))
+
+# Função para gravar um histórico sintético como exportação do Spotify
+def gravar_exportacao(pasta, n_reproducoes, reproducoes_por_arquivo=REPRODUCOES_POR_ARQUIVO, semente=42, **parametros):
+    """
+    Grava um histórico sintético na estrutura lida pelo carregamento (pasta/data/*.json)
+
+    Args:
+        pasta: Pasta de destino (a subpasta 'data' é criada)
+        n_reproducoes: Número total de reproduções
+        reproducoes_por_arquivo: Reproduções por arquivo JSON
+        semente: Semente do gerador
+        **parametros: inicio e anos, repassados a gerar_lotes
+
+    Returns:
+        Lista com os caminhos dos arquivos gravados
+    """
+    pasta_data = os.path.join(pasta, 'data')
+    os.makedirs(pasta_data, exist_ok=True)
+
+    # Lotes múltiplos do tamanho dos arquivos, para que nenhum arquivo junte dois lotes
+    tamanho_lote = max(reproducoes_por_arquivo, TAMANHO_LOTE // reproducoes_por_arquivo * reproducoes_por_arquivo)
+
+    caminhos = []
+    for lote in gerar_lotes(n_reproducoes, tamanho_lote, semente, **parametros):
+        for inicio in range(0, len(lote), reproducoes_por_arquivo):
+            caminho = os.path.join(pasta_data, f"Streaming_History_Audio_{len(caminhos)}.json")
+            lote.iloc[inicio:inicio + reproducoes_por_arquivo].to_json(caminho, orient='records')
+            caminhos.append(caminho)
+    return caminhos
+
+# Função principal
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera exportações sintéticas do Spotify (artistas e faixas de Zipf, ritmos diário e semanal, sessões, pulos e plataformas)"
+    )
+    parser.add_argument('saida', help="Pasta de destino (os arquivos ficam em <saida>/data)")
+    parser.add_argument('--reproducoes', type=int, default=100_000, help="Número de reproduções (padrão: 100 mil)")
+    parser.add_argument('--por-arquivo', type=int, default=REPRODUCOES_POR_ARQUIVO, help="Reproduções por arquivo JSON")
+    parser.add_argument('--anos', type=float, default=ANOS_PADRAO, help="Duração do histórico em anos")
+    parser.add_argument('--inicio', default=INICIO_PADRAO, help="Data inicial (AAAA-MM-DD)")
+    parser.add_argument('--semente', type=int, default=42, help="Semente do gerador")
+    args = parser.parse_args()
+
+    if args.reproducoes <= 0 or args.por_arquivo <= 0:
+        parser.error("--reproducoes e --por-arquivo devem ser positivos")
+
+    inicio = time.perf_counter()
+    caminhos = gravar_exportacao(
+        args.saida, args.reproducoes, args.por_arquivo, args.semente, inicio=args.inicio, anos=args.anos
+    )
+    duracao = time.perf_counter() - inicio
+    tamanho = sum(os.path.getsize(caminho) for caminho in caminhos)
+    print(f"{args.reproducoes:,} reproduções em {len(caminhos)} arquivos ({tamanho / 1024 ** 2:,.0f} MB) "
+          f"em {duracao:.1f} s → {args.reproducoes / duracao:,.0f} reproduções/s")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+# Separador usado para diferenciar nomes de exibição repetidos
+SEPARADOR_ROTULO = " · "
+
+# Função para gerar rótulos de exibição sem repetição
+def _rotulos_unicos(nomes, *desempates):
+    """
+    Gera rótulos de exibição únicos para identificadores que compartilham o mesmo nome
+
+    Args:
+        nomes: Series com o nome de cada identificador (na ordem dos códigos)
+        desempates: Series usadas, em ordem, para diferenciar nomes repetidos
+
+    Returns:
+        Series de rótulos sem repetição, alinhada a nomes
+    """
+    rotulos = nomes.astype(str)
+
+    # Acrescentar informações extras apenas aos nomes que se repetem
+    for desempate in desempates:
+        repetidos = rotulos.duplicated(keep=False)
+        if not repetidos.any():
+            return rotulos
+        rotulos = rotulos.where(~repetidos, rotulos + SEPARADOR_ROTULO + desempate.astype(str))
+
+    # Se ainda houver repetição (mesma faixa com URIs diferentes), numerar as ocorrências
+    repetidos = rotulos.duplicated(keep=False)
+    if repetidos.any():
+        ordem = rotulos.groupby(rotulos).cumcount() + 1
+        rotulos = rotulos.where(~repetidos, rotulos + ' #' + ordem.astype(str))
+
+    return rotulos
+
+# Função para codificar uma chave em inteiros
+def _codificar(chave):
+    """
+    Codifica uma chave em identificadores inteiros (int32), na ordem de aparição
+
+    Args:
+        chave: Series com a chave de identidade (NaN para registros sem identidade)
+
+    Returns:
+        (ndarray, ndarray): Códigos int32 (-1 para ausentes) e posição da primeira ocorrência de cada código
+    """
+    codigos, _ = pd.factorize(chave)
+    codigos = codigos.astype(np.int32)
+
+    # Como os códigos seguem a ordem de aparição, a primeira ocorrência de cada um já está ordenada
+    primeiras = np.flatnonzero(~pd.Series(codigos).duplicated().to_numpy() & (codigos >= 0))
+
+    return codigos, primeiras
+
+# Função para codificar faixas, artistas e álbuns
+def codificar_identidades(df):
+    """
+    Codifica faixas, artistas e álbuns em identificadores inteiros estáveis
+
+    As faixas são identificadas pela spotify_track_uri (ou pelo par música/artista quando
+    a URI não existe), evitando que músicas homônimas de artistas diferentes se misturem.
+    Os códigos ficam em track_id, artist_id e album_id (int32, -1 quando ausente) e as
+    colunas track, artist e album passam a ser categóricas com os mesmos códigos: suas
+    categorias formam o dicionário de nomes de exibição.
+
+    Args:
+        df: DataFrame com os campos master_metadata_* do Spotify
+
+    Returns:
+        DataFrame com as colunas de identidade adicionadas
+    """
+    nome_faixa = df['master_metadata_track_name']
+    nome_artista = df['master_metadata_album_artist_name']
+    nome_album = df['master_metadata_album_album_name']
+
+    # 1. Artistas: identificados pelo nome
+    artist_id, primeiras_artistas = _codificar(nome_artista)
+    artistas = nome_artista.iloc[primeiras_artistas].reset_index(drop=True)
+
+    # 2. Álbuns: identificados pelo par álbum/artista
+    tem_album = nome_album.notna()
+    chave_album = (nome_album[tem_album] + '\x1f' + nome_artista[tem_album].fillna('')).reindex(df.index)
+    album_id, primeiras_albuns = _codificar(chave_album)
+    albuns = _rotulos_unicos(
+        nome_album.iloc[primeiras_albuns].reset_index(drop=True),
+        nome_artista.iloc[primeiras_albuns].reset_index(drop=True)
+    )
+
+    # 3. Faixas: identificadas pela URI, com o par música/artista como alternativa
+    tem_faixa = nome_faixa.notna()
+    if 'spotify_track_uri' in df.columns:
+        chave_faixa = df['spotify_track_uri'].where(tem_faixa)
+    else:
+        chave_faixa = pd.Series(np.nan, index=df.index, dtype=object)
+    sem_uri = tem_faixa & chave_faixa.isna()
+    if sem_uri.any():
+        chave_faixa = chave_faixa.astype(object)
+        chave_faixa[sem_uri] = nome_faixa[sem_uri] + '\x1f' + nome_artista[sem_uri].fillna('')
+    track_id, primeiras_faixas = _codificar(chave_faixa)
+    faixas = _rotulos_unicos(
+        nome_faixa.iloc[primeiras_faixas].reset_index(drop=True),
+        nome_artista.iloc[primeiras_faixas].reset_index(drop=True),
+        nome_album.iloc[primeiras_faixas].reset_index(drop=True)
+    )
+
+    # Guardar os códigos e as colunas de exibição que compartilham os mesmos códigos
+    df['track_id'] = track_id
+    df['artist_id'] = artist_id
+    df['album_id'] = album_id
+
+    df['track'] = pd.Categorical.from_codes(track_id, categories=pd.Index(faixas, dtype=object))
+    df['artist'] = pd.Categorical.from_codes(artist_id, categories=pd.Index(artistas, dtype=object))
+    df['album'] = pd.Categorical.from_codes(album_id, categories=pd.Index(albuns, dtype=object))
+
+    return df
+
+# Função para obter o artista de cada faixa
+def artistas_das_faixas(df, track_ids):
+    """
+    Obtém o nome do artista de cada faixa a partir dos identificadores
+
+    Args:
+        df: DataFrame com as colunas de identidade
+        track_ids: Identificadores das faixas
+
+    Returns:
+        Lista com o nome do artista de cada faixa, na mesma ordem de track_ids
+    """
+    faixas = df.loc[df['track_id'].isin(track_ids), ['track_id', 'artist']].drop_duplicates('track_id')
+    return faixas.set_index('track_id')['artist'].reindex(track_ids).astype(object).tolist()
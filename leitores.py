@@ -0,0 +1,372 @@
+import re
+import json
+from functools import lru_cache
+from operator import attrgetter
+from typing import List, Optional
+
+import pandas as pd
+
+# Colunas do esquema comum produzido por todos os leitores (nomes do histórico estendido);
+# os demais campos das exportações (ip_addr, user_agent_decrypted, episode_*...) nunca viram colunas
+CAMPOS_UTILIZADOS = (
+    'ts',
+    'ms_played',
+    'master_metadata_track_name',
+    'master_metadata_album_artist_name',
+    'master_metadata_album_album_name',
+    'spotify_track_uri',
+    'platform',
+    'skipped',
+    'offline',
+    'conn_country'
+)
+
+# Tipo das colunas de texto ausentes no formato: o 'str' do pandas 3 (nulos como NaN, concatenável
+# com as outras colunas de texto); nas versões anteriores 'str' converteria None no texto 'None'
+TIPO_TEXTO_NULO = 'str' if int(pd.__version__.split('.')[0]) >= 3 else object
+
+# Atributo do DataFrame (df.attrs) com os campos preenchidos pelos formatos lidos
+ATRIBUTO_CAMPOS_DISPONIVEIS = 'campos_disponiveis'
+
+# Bytes lidos do início de um arquivo para reconhecer o formato
+JANELA_DETECCAO_BYTES = 4096
+
+# Nome de um campo JSON seguido de ':' (as chaves dos registros)
+PADRAO_CHAVE = re.compile(rb'"([^"\\]+)"\s*:')
+
+class LeitorFormato:
+    """
+    Leitor de um formato de exportação do Spotify
+
+    Cada formato declara os campos que lê (com os tipos), os campos que o identificam,
+    um conversor próprio que leva as colunas de origem ao esquema comum e as colunas
+    do esquema comum que ele de fato preenche (as demais ficam nulas). Com o
+    msgspec instalado, os arquivos são decodificados direto em structs tipadas do
+    formato, sem montar um dicionário por registro; sem ele, usa o json da biblioteca padrão.
+    """
+
+    def __init__(self, nome, descricao, campos, marcadores, converter, preenche=CAMPOS_UTILIZADOS):
+        """
+        Args:
+            nome: Identificador do formato
+            descricao: Nome exibido ao usuário
+            campos: Pares (campo de origem, tipo) lidos pelo conversor (os únicos gravados nos envios)
+            marcadores: Campos que, juntos, identificam o formato
+            converter: Função (DataFrame com os campos de origem) -> DataFrame com as colunas
+                de CAMPOS_UTILIZADOS e 'ts' já convertido para datetime em UTC
+            preenche: Colunas de CAMPOS_UTILIZADOS com valores no formato (as outras saem nulas)
+        """
+        self.nome = nome
+        self.descricao = descricao
+        self.campos = tuple(campo for campo, _ in campos)
+        self.tipos = dict(campos)
+        self.marcadores = frozenset(marcadores)
+        self.converter = converter
+        self.preenche = frozenset(preenche)
+
+    def reconhece(self, chaves):
+        """
+        Args:
+            chaves: Campos de um registro
+
+        Returns:
+            True se todos os marcadores do formato estão entre as chaves
+        """
+        return self.marcadores <= set(chaves)
+
+    def converter_registros(self, registros):
+        """
+        Converte registros já decodificados (dicionários) para o esquema comum
+
+        Args:
+            registros: Lista de dicionários no formato
+
+        Returns:
+            DataFrame no esquema comum
+        """
+        return self.converter(pd.DataFrame.from_records(registros, columns=list(self.campos)))
+
+    def ler_arquivo(self, caminho, usar_msgspec=True):
+        """
+        Lê um arquivo inteiro do formato para o esquema comum
+
+        Args:
+            caminho: Caminho do arquivo JSON
+            usar_msgspec: Usar o decodificador tipado quando o msgspec estiver instalado
+
+        Returns:
+            DataFrame no esquema comum
+        """
+        decodificador = _obter_decodificador(self) if usar_msgspec else None
+        if decodificador is not None:
+            decodificar, erros = decodificador
+            with open(caminho, 'rb') as f:
+                conteudo = f.read()
+            try:
+                registros = decodificar(conteudo)
+            except erros:
+                # Registro fora do esquema tipado (campo com outro tipo): o json tolera
+                registros = None
+            if registros is not None:
+                # Colunas direto dos atributos das structs, sem tuplas ou dicionários intermediários
+                colunas = {campo: list(map(attrgetter(campo), registros)) for campo in self.campos}
+                return self.converter(pd.DataFrame(colunas))
+
+        with open(caminho, 'r', encoding='utf-8') as f:
+            registros = json.load(f)
+        return self.converter_registros(registros)
+
+# Função para verificar se o decodificador tipado está disponível
+def decodificador_tipado_disponivel():
+    """
+    Returns:
+        True se o msgspec estiver instalado (caso contrário os arquivos são lidos com json)
+    """
+    return _obter_decodificador(LEITORES[0]) is not None
+
+# Função para montar o decodificador tipado de um formato
+@lru_cache(maxsize=None)
+def _obter_decodificador(leitor):
+    """
+    Monta (uma vez por formato) o decodificador msgspec com uma struct dos campos do formato
+
+    Campos que não estão na struct são pulados pelo decodificador, sem virar objetos Python.
+    O msgspec é opcional e importado só aqui.
+
+    Args:
+        leitor: LeitorFormato
+
+    Returns:
+        (decodificar, erros), ou None se o msgspec não estiver instalado
+    """
+    try:
+        import msgspec
+    except ImportError:
+        return None
+    registro = msgspec.defstruct(
+        f"Registro_{leitor.nome}",
+        [(campo, tipo, None) for campo, tipo in leitor.tipos.items()]
+    )
+    decodificador = msgspec.json.Decoder(List[registro])
+    return decodificador.decode, (msgspec.ValidationError, msgspec.DecodeError)
+
+# Leitores registrados, na ordem de verificação
+LEITORES = []
+
+# Função para registrar um leitor
+def registrar_leitor(leitor):
+    """
+    Adiciona um leitor ao registro (verificado depois dos já registrados)
+
+    Args:
+        leitor: LeitorFormato
+
+    Returns:
+        O próprio leitor
+    """
+    LEITORES.append(leitor)
+    return leitor
+
+# Função para identificar o leitor de um registro
+def identificar_leitor(chaves):
+    """
+    Args:
+        chaves: Campos de um registro (dicionário ou qualquer iterável de nomes)
+
+    Returns:
+        LeitorFormato do primeiro formato reconhecido, ou None
+    """
+    for leitor in LEITORES:
+        if leitor.reconhece(chaves):
+            return leitor
+    return None
+
+# Função para detectar o formato pelos primeiros bytes
+def detectar_formato(inicio):
+    """
+    Reconhece o formato a partir do começo do conteúdo, sem decodificar o arquivo
+
+    Os registros das exportações são objetos sem aninhamento: as chaves do primeiro
+    objeto (do primeiro '{' ao '}' seguinte) bastam para identificar o formato.
+
+    Args:
+        inicio: Primeiros bytes do arquivo (JANELA_DETECCAO_BYTES bastam)
+
+    Returns:
+        LeitorFormato reconhecido, ou None
+    """
+    abertura = inicio.find(b'{')
+    if abertura < 0:
+        return None
+    fechamento = inicio.find(b'}', abertura)
+    objeto = inicio[abertura:fechamento if fechamento >= 0 else len(inicio)]
+    chaves = [chave.decode('utf-8', 'replace') for chave in PADRAO_CHAVE.findall(objeto)]
+    return identificar_leitor(chaves)
+
+# Função para detectar o formato de um arquivo
+def detectar_formato_arquivo(caminho):
+    """
+    Args:
+        caminho: Caminho de um arquivo JSON
+
+    Returns:
+        LeitorFormato reconhecido, ou None
+    """
+    with open(caminho, 'rb') as f:
+        return detectar_formato(f.read(JANELA_DETECCAO_BYTES))
+
+# Função para ler um arquivo de qualquer formato registrado
+def ler_arquivo(caminho, usar_msgspec=True):
+    """
+    Detecta o formato de um arquivo e o lê para o esquema comum
+
+    Args:
+        caminho: Caminho do arquivo JSON
+        usar_msgspec: Usar o decodificador tipado quando o msgspec estiver instalado
+
+    Returns:
+        DataFrame no esquema comum, ou None se o formato não for reconhecido
+    """
+    leitor = detectar_formato_arquivo(caminho)
+    if leitor is None:
+        return None
+    return leitor.ler_arquivo(caminho, usar_msgspec)
+
+# Função para registrar os campos disponíveis de um conjunto de dados
+def registrar_campos_disponiveis(df, leitores):
+    """
+    Guarda em df.attrs as colunas preenchidas pelos formatos lidos (acompanha cópias e filtros)
+
+    Args:
+        df: DataFrame no esquema comum
+        leitores: LeitorFormato de cada arquivo lido
+
+    Returns:
+        O próprio DataFrame
+    """
+    df.attrs[ATRIBUTO_CAMPOS_DISPONIVEIS] = frozenset().union(*(leitor.preenche for leitor in leitores))
+    return df
+
+# Função para consultar os campos disponíveis de um conjunto de dados
+def campos_disponiveis(df):
+    """
+    Colunas do esquema comum que os formatos lidos preenchem
+
+    Num conjunto com formatos misturados, uma coluna conta como disponível se algum
+    dos formatos a preenche.
+
+    Args:
+        df: DataFrame no esquema comum
+
+    Returns:
+        frozenset de nomes de CAMPOS_UTILIZADOS (todos, se o DataFrame não veio de um leitor)
+    """
+    return df.attrs.get(ATRIBUTO_CAMPOS_DISPONIVEIS, frozenset(CAMPOS_UTILIZADOS))
+
+# Função para completar as colunas do esquema comum
+def _completar_esquema(colunas, n):
+    """
+    Monta o DataFrame do esquema comum, com nulos nas colunas que o formato não tem
+
+    Args:
+        colunas: Dicionário coluna -> valores
+        n: Número de registros
+
+    Returns:
+        DataFrame com as colunas de CAMPOS_UTILIZADOS, nessa ordem
+    """
+    # Colunas ausentes como texto nulo, para que as concatenações de nomes continuem válidas
+    return pd.DataFrame({
+        campo: colunas[campo] if campo in colunas else pd.Series([None] * n, dtype=TIPO_TEXTO_NULO)
+        for campo in CAMPOS_UTILIZADOS
+    })
+
+# Função para converter o histórico estendido
+def _converter_estendido(origem):
+    """
+    Histórico estendido (Streaming_History_Audio_*.json): já está no esquema comum
+
+    Args:
+        origem: DataFrame com os campos de origem
+
+    Returns:
+        DataFrame no esquema comum
+    """
+    # "AAAA-MM-DDTHH:MM:SSZ", sempre em UTC: sem o sufixo 'Z' a conversão é ~5x mais rápida
+    origem['ts'] = pd.to_datetime(origem['ts'].str.slice(0, 19), format='ISO8601', utc=True)
+    return origem
+
+# Função para converter o histórico básico de músicas
+def _converter_basico_musicas(origem):
+    """
+    Histórico básico dos dados da conta (StreamingHistory_music_*.json)
+
+    Só tem fim da reprodução (endTime, UTC, com minutos), duração, artista e música.
+
+    Args:
+        origem: DataFrame com os campos de origem
+
+    Returns:
+        DataFrame no esquema comum
+    """
+    return _completar_esquema({
+        'ts': pd.to_datetime(origem['endTime'], format='%Y-%m-%d %H:%M', utc=True),
+        'ms_played': origem['msPlayed'],
+        'master_metadata_track_name': origem['trackName'],
+        'master_metadata_album_artist_name': origem['artistName']
+    }, len(origem))
+
+# Função para converter o histórico básico de podcasts
+def _converter_basico_podcasts(origem):
+    """
+    Histórico básico de podcasts (StreamingHistory_podcast_*.json)
+
+    Como os episódios do histórico estendido, entram sem os campos de música.
+
+    Args:
+        origem: DataFrame com os campos de origem
+
+    Returns:
+        DataFrame no esquema comum
+    """
+    return _completar_esquema({
+        'ts': pd.to_datetime(origem['endTime'], format='%Y-%m-%d %H:%M', utc=True),
+        'ms_played': origem['msPlayed']
+    }, len(origem))
+
+LEITOR_ESTENDIDO = registrar_leitor(LeitorFormato(
+    'estendido',
+    "Histórico estendido (Streaming_History_Audio)",
+    (
+        ('ts', str),
+        ('ms_played', int),
+        ('master_metadata_track_name', Optional[str]),
+        ('master_metadata_album_artist_name', Optional[str]),
+        ('master_metadata_album_album_name', Optional[str]),
+        ('spotify_track_uri', Optional[str]),
+        ('platform', Optional[str]),
+        ('skipped', Optional[bool]),
+        ('offline', Optional[bool]),
+        ('conn_country', Optional[str])
+    ),
+    ('ts', 'ms_played'),
+    _converter_estendido
+))
+
+LEITOR_BASICO_MUSICAS = registrar_leitor(LeitorFormato(
+    'basico_musicas',
+    "Histórico de reprodução (StreamingHistory_music)",
+    (('endTime', str), ('msPlayed', int), ('artistName', Optional[str]), ('trackName', Optional[str])),
+    ('endTime', 'msPlayed', 'trackName'),
+    _converter_basico_musicas,
+    ('ts', 'ms_played', 'master_metadata_track_name', 'master_metadata_album_artist_name')
+))
+
+LEITOR_BASICO_PODCASTS = registrar_leitor(LeitorFormato(
+    'basico_podcasts',
+    "Histórico de podcasts (StreamingHistory_podcast)",
+    (('endTime', str), ('msPlayed', int), ('podcastName', Optional[str]), ('episodeName', Optional[str])),
+    ('endTime', 'msPlayed', 'episodeName'),
+    _converter_basico_podcasts,
+    ('ts', 'ms_played')
+))
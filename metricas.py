@@ -0,0 +1,297 @@
+import os
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Porta local onde as métricas são expostas (variável de ambiente; vazia ou 0 desliga)
+PORTA_PADRAO = '9464'
+
+# Intervalo de gravação do arquivo de métricas, quando configurado
+INTERVALO_ARQUIVO_SEGUNDOS = 15
+
+# Limites dos histogramas de latência, em segundos
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Métricas conhecidas: nome -> (tipo, descrição)
+DEFINICOES = {
+    'spotify_carregamentos_total': ('counter', "Conjuntos de dados lidos do disco"),
+    'spotify_carregamento_segundos': ('histogram', "Tempo de leitura e processamento de um conjunto de dados"),
+    'spotify_carregamentos_cancelados_total': ('counter', "Carregamentos em segundo plano cancelados pelo usuário"),
+    'spotify_cache_consultas_total': ('counter', "Consultas aos caches do painel"),
+    'spotify_cache_falhas_total': ('counter', "Consultas que não encontraram o valor no cache e precisaram calcular"),
+    'spotify_cache_acertos_total': ('counter', "Consultas atendidas pelo cache (consultas menos falhas)"),
+    'spotify_execucao_segundos': ('histogram', "Tempo de uma execução completa da página, por seção"),
+    'spotify_secao_segundos': ('histogram', "Tempo de cálculo e renderização de uma seção"),
+    'spotify_figura_construcao_segundos': ('histogram', "Tempo de construção de uma figura"),
+    'spotify_figura_serializacao_segundos': ('histogram', "Tempo de serialização de uma figura em JSON"),
+}
+
+# Função para escapar o valor de um rótulo
+def _escapar(valor):
+    """
+    Escapa o valor de um rótulo no formato de texto do Prometheus
+
+    Args:
+        valor: Valor do rótulo
+
+    Returns:
+        String escapada
+    """
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Função para formatar os rótulos de uma série
+def _formatar_rotulos(rotulos, extra=None):
+    """
+    Formata os rótulos de uma série ({a="1",b="2"})
+
+    Args:
+        rotulos: Tupla ordenada de pares (rótulo, valor)
+        extra: Par (rótulo, valor) adicional, como o 'le' dos histogramas
+
+    Returns:
+        String com os rótulos (vazia se não houver)
+    """
+    pares = list(rotulos) + ([extra] if extra else [])
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{chave}="{_escapar(valor)}"' for chave, valor in pares) + '}'
+
+class RegistroMetricas:
+    """
+    Contadores, medidores e histogramas do painel, exportados no formato de texto do Prometheus
+
+    As métricas ficam em memória no próprio processo; nenhum serviço externo é necessário.
+    Medidores calculados na hora da leitura (uso de memória, armazenamento) são
+    fornecidos por coletores registrados com registrar_coletor.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._contadores = {}
+        self._histogramas = {}
+        self._coletores = []
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        """
+        Incrementa um contador
+
+        Args:
+            nome: Nome da métrica (deve estar em DEFINICOES)
+            valor: Valor a somar
+            **rotulos: Rótulos da série
+        """
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, segundos, **rotulos):
+        """
+        Registra uma observação em um histograma de latência
+
+        Args:
+            nome: Nome da métrica (deve estar em DEFINICOES)
+            segundos: Valor observado
+            **rotulos: Rótulos da série
+        """
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = {'baldes': [0] * len(LIMITES_LATENCIA), 'soma': 0.0, 'total': 0}
+            for indice, limite in enumerate(LIMITES_LATENCIA):
+                if segundos <= limite:
+                    histograma['baldes'][indice] += 1
+                    break
+            histograma['soma'] += segundos
+            histograma['total'] += 1
+
+    @contextmanager
+    def cronometrar(self, nome, **rotulos):
+        """
+        Mede a duração de um bloco e a registra em um histograma
+
+        Args:
+            nome: Nome da métrica (deve estar em DEFINICOES)
+            **rotulos: Rótulos da série
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def registrar_coletor(self, coletor):
+        """
+        Registra uma função chamada a cada leitura das métricas
+
+        Args:
+            coletor: Função sem argumentos que retorna uma lista de
+                (nome, tipo, descrição, dicionário de rótulos, valor)
+        """
+        with self._trava:
+            self._coletores.append(coletor)
+
+    def formatar_prometheus(self):
+        """
+        Gera o texto de todas as métricas no formato de exposição do Prometheus
+
+        Returns:
+            String no formato text/plain; version=0.0.4
+        """
+        with self._trava:
+            contadores = dict(self._contadores)
+            histogramas = {chave: dict(valor, baldes=list(valor['baldes'])) for chave, valor in self._histogramas.items()}
+            coletores = list(self._coletores)
+
+        # Acertos de cache derivados das consultas e falhas de cada cache
+        for (nome, rotulos), valor in list(contadores.items()):
+            if nome == 'spotify_cache_consultas_total':
+                falhas = contadores.get(('spotify_cache_falhas_total', rotulos), 0)
+                contadores[('spotify_cache_acertos_total', rotulos)] = max(valor - falhas, 0)
+
+        # Agrupar as séries por nome de métrica
+        series = {}
+        for (nome, rotulos), valor in contadores.items():
+            series.setdefault(nome, []).append(f"{nome}{_formatar_rotulos(rotulos)} {valor}")
+        for (nome, rotulos), histograma in histogramas.items():
+            linhas = series.setdefault(nome, [])
+            acumulado = 0
+            for limite, quantidade in zip(LIMITES_LATENCIA, histograma['baldes']):
+                acumulado += quantidade
+                linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', limite))} {acumulado}")
+            linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', '+Inf'))} {histograma['total']}")
+            linhas.append(f"{nome}_sum{_formatar_rotulos(rotulos)} {histograma['soma']:.6f}")
+            linhas.append(f"{nome}_count{_formatar_rotulos(rotulos)} {histograma['total']}")
+
+        definicoes = dict(DEFINICOES)
+        for coletor in coletores:
+            try:
+                for nome, tipo, ajuda, rotulos, valor in coletor():
+                    definicoes.setdefault(nome, (tipo, ajuda))
+                    series.setdefault(nome, []).append(f"{nome}{_formatar_rotulos(sorted(rotulos.items()))} {valor}")
+            except Exception:
+                # Um coletor com erro não deve impedir a leitura das demais métricas
+                continue
+
+        partes = []
+        for nome in sorted(series):
+            tipo, ajuda = definicoes.get(nome, ('untyped', nome))
+            partes.append(f"# HELP {nome} {ajuda}")
+            partes.append(f"# TYPE {nome} {tipo}")
+            partes.extend(series[nome])
+        return '\n'.join(partes) + '\n'
+
+# Registro único do processo
+METRICAS = RegistroMetricas()
+
+# Decorador para contar as consultas a uma função em cache
+def contar_consultas_cache(cache):
+    """
+    Conta cada chamada a uma função em cache do Streamlit como consulta ao cache
+
+    A função em cache deve contar as próprias falhas (o corpo só roda quando o valor
+    não está no cache); os acertos são a diferença entre consultas e falhas.
+
+    Args:
+        cache: Nome do cache (rótulo 'cache' das métricas)
+
+    Returns:
+        Decorador a aplicar por fora do st.cache_data / st.cache_resource
+    """
+    def decorar(funcao_em_cache):
+        @functools.wraps(funcao_em_cache)
+        def consultar(*args, **kwargs):
+            METRICAS.incrementar('spotify_cache_consultas_total', cache=cache)
+            return funcao_em_cache(*args, **kwargs)
+        return consultar
+    return decorar
+
+# Estado da exportação (iniciada uma única vez por processo)
+_trava_exportacao = threading.Lock()
+_exportacao_iniciada = False
+
+class _ManipuladorMetricas(BaseHTTPRequestHandler):
+    """
+    Responde a GET /metrics com o texto das métricas
+    """
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        corpo = METRICAS.formatar_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        # Não poluir o log do Streamlit com cada leitura
+        pass
+
+# Função para gravar as métricas em arquivo periodicamente
+def _gravar_arquivo_periodicamente(caminho, intervalo):
+    """
+    Grava as métricas em um arquivo a cada intervalo (formato do textfile collector do node_exporter)
+
+    Args:
+        caminho: Caminho do arquivo
+        intervalo: Segundos entre as gravações
+    """
+    while True:
+        try:
+            temporario = f"{caminho}.tmp"
+            with open(temporario, 'w', encoding='utf-8') as f:
+                f.write(METRICAS.formatar_prometheus())
+            # Troca atômica, para que o leitor nunca veja um arquivo pela metade
+            os.replace(temporario, caminho)
+        except OSError:
+            pass
+        time.sleep(intervalo)
+
+# Função para iniciar a exportação das métricas
+def iniciar_exportacao(porta=None, arquivo=None):
+    """
+    Inicia a exportação das métricas (uma única vez por processo)
+
+    Por padrão usa as variáveis de ambiente SPOTIFY_METRICAS_PORTA (porta local em
+    127.0.0.1, padrão 9464; vazia ou 0 desliga) e SPOTIFY_METRICAS_ARQUIVO (arquivo
+    regravado a cada 15 segundos).
+
+    Args:
+        porta: Porta HTTP local (None para usar a variável de ambiente)
+        arquivo: Caminho do arquivo de métricas (None para usar a variável de ambiente)
+
+    Returns:
+        Porta em uso pelo servidor HTTP, ou None se ele não foi iniciado
+    """
+    global _exportacao_iniciada
+    with _trava_exportacao:
+        if _exportacao_iniciada:
+            return None
+        _exportacao_iniciada = True
+
+    porta = porta if porta is not None else os.environ.get('SPOTIFY_METRICAS_PORTA', PORTA_PADRAO)
+    arquivo = arquivo if arquivo is not None else os.environ.get('SPOTIFY_METRICAS_ARQUIVO')
+
+    if arquivo:
+        threading.Thread(
+            target=_gravar_arquivo_periodicamente,
+            args=(arquivo, INTERVALO_ARQUIVO_SEGUNDOS),
+            name='metricas-arquivo',
+            daemon=True
+        ).start()
+
+    if porta and int(porta) > 0:
+        try:
+            servidor = ThreadingHTTPServer(('127.0.0.1', int(porta)), _ManipuladorMetricas)
+        except OSError:
+            # Porta ocupada (por exemplo, outra instância do painel): seguir sem o servidor
+            return None
+        threading.Thread(target=servidor.serve_forever, name='metricas-http', daemon=True).start()
+        return servidor.server_address[1]
+
+    return None
@@ -0,0 +1,225 @@
+import io
+import time
+import marshal
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextvars import ContextVar
+from contextlib import contextmanager, nullcontext
+
+# Perfil da execução atual (None quando o modo de depuração está desligado)
+_perfil_atual = ContextVar('perfil_atual', default=None)
+
+# O tracemalloc é do processo inteiro: perfis ativos (de todas as sessões) contados sob a trava
+_TRAVA_TRACEMALLOC = threading.Lock()
+_perfis_ativos = 0
+
+# Se o tracemalloc foi ligado por este módulo (e não por quem executa o painel)
+_tracemalloc_proprio = False
+
+# Função para ligar o tracemalloc
+def _ligar_tracemalloc():
+    """
+    Registra mais um perfil ativo, ligando o tracemalloc no primeiro
+    """
+    global _perfis_ativos, _tracemalloc_proprio
+    with _TRAVA_TRACEMALLOC:
+        if _perfis_ativos == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_proprio = True
+        _perfis_ativos += 1
+
+# Função para desligar o tracemalloc
+def _desligar_tracemalloc():
+    """
+    Encerra um perfil ativo, desligando o tracemalloc depois do último
+    """
+    global _perfis_ativos, _tracemalloc_proprio
+    with _TRAVA_TRACEMALLOC:
+        _perfis_ativos -= 1
+        if _perfis_ativos == 0 and _tracemalloc_proprio:
+            tracemalloc.stop()
+            _tracemalloc_proprio = False
+
+# Função para ler a memória rastreada
+def _ler_memoria(zerar_pico=False):
+    """
+    Lê a memória do tracemalloc (do processo inteiro, não de uma sessão)
+
+    Args:
+        zerar_pico: Zerar o pico depois da leitura; só acontece quando há um único perfil
+            ativo, para não alterar as medidas de outras sessões
+
+    Returns:
+        (int, int): Memória atual e pico, em bytes
+    """
+    with _TRAVA_TRACEMALLOC:
+        atual, pico = tracemalloc.get_traced_memory()
+        if zerar_pico and _perfis_ativos == 1 and _tracemalloc_proprio:
+            tracemalloc.reset_peak()
+    return atual, pico
+
+class PerfilExecucao:
+    """
+    Coleta tempo, memória alocada e linhas processadas por etapa de uma execução do painel
+
+    As etapas podem ser aninhadas (seção > figura > construção). A memória vem do
+    tracemalloc, ligado enquanto houver algum perfil ativo no processo: inclui as
+    alocações de outras sessões e dos carregamentos em segundo plano, e com mais de um
+    perfil ativo o pico é o do processo desde o início da etapa mais antiga em aberto.
+    O cProfile é opcional.
+    """
+
+    def __init__(self, coletar_cprofile=False):
+        """
+        Args:
+            coletar_cprofile: Se True, também coleta um cProfile da execução inteira
+        """
+        self.etapas = []
+        self.coletar_cprofile = coletar_cprofile
+        self.dump_cprofile = None
+        self.inicio = None
+        self.duracao = None
+        self._pilha = []
+        self._profiler = None
+        self._ligou_tracemalloc = False
+
+    def iniciar(self):
+        """
+        Ativa o perfil para a execução atual
+        """
+        _ligar_tracemalloc()
+        self._ligou_tracemalloc = True
+        if self.coletar_cprofile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self.inicio = time.perf_counter()
+        _perfil_atual.set(self)
+
+    def finalizar(self):
+        """
+        Desativa o perfil e prepara o dump do cProfile
+        """
+        self.duracao = time.perf_counter() - self.inicio
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.create_stats()
+            # Mesmo formato de cProfile.Profile.dump_stats, lido por pstats e snakeviz
+            self.dump_cprofile = marshal.dumps(self._profiler.stats)
+        if self._ligou_tracemalloc:
+            _desligar_tracemalloc()
+            self._ligou_tracemalloc = False
+        _perfil_atual.set(None)
+
+    def resumo_cprofile(self, limite=15):
+        """
+        Gera o resumo em texto das funções mais caras do cProfile
+
+        Args:
+            limite: Número de funções listadas
+
+        Returns:
+            Texto do pstats ordenado por tempo cumulativo (ou None sem cProfile)
+        """
+        if self._profiler is None:
+            return None
+        saida = io.StringIO()
+        pstats.Stats(self._profiler, stream=saida).sort_stats('cumulative').print_stats(limite)
+        return saida.getvalue()
+
+    @contextmanager
+    def etapa(self, nome, linhas=None):
+        """
+        Mede uma etapa (usada por medir_etapa)
+
+        Args:
+            nome: Nome da etapa
+            linhas: Número de linhas processadas (pode ser preenchido depois no registro)
+
+        Yields:
+            Dicionário da etapa, onde 'linhas' pode ser atualizado
+        """
+        registro = {'etapa': nome, 'nivel': len(self._pilha), 'linhas': linhas}
+        self.etapas.append(registro)
+
+        # O pico do tracemalloc é global: repassar o pico atual às etapas abertas antes de zerá-lo
+        atual, pico = _ler_memoria(zerar_pico=True)
+        for aberta in self._pilha:
+            aberta['_pico_absoluto'] = max(aberta['_pico_absoluto'], pico)
+        registro['_memoria_inicial'] = atual
+        registro['_pico_absoluto'] = atual
+
+        self._pilha.append(registro)
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['ms'] = (time.perf_counter() - inicio) * 1000
+            self._pilha.pop()
+            atual, pico = _ler_memoria()
+            for aberta in self._pilha + [registro]:
+                aberta['_pico_absoluto'] = max(aberta['_pico_absoluto'], pico)
+            registro['alocado_mb'] = (atual - registro['_memoria_inicial']) / 1024 ** 2
+            registro['pico_mb'] = (registro['_pico_absoluto'] - registro['_memoria_inicial']) / 1024 ** 2
+
+    def tabela(self):
+        """
+        Monta as linhas da tabela de etapas para exibição
+
+        Returns:
+            Lista de dicionários com etapa (recuada pelo nível), tempo, memória e linhas
+        """
+        return [
+            {
+                'Etapa': ' ' * registro['nivel'] + registro['etapa'],
+                'Tempo (ms)': round(registro.get('ms', 0.0), 1),
+                'Alocado (MB)': round(registro.get('alocado_mb', 0.0), 2),
+                'Pico no processo (MB)': round(registro.get('pico_mb', 0.0), 2),
+                'Linhas': registro['linhas']
+            }
+            for registro in self.etapas
+        ]
+
+# Função para medir uma etapa
+def medir_etapa(nome, linhas=None):
+    """
+    Mede uma etapa da execução quando o modo de depuração está ligado
+
+    Com o perfil desligado retorna um contexto vazio, sem medir nada, que entrega um
+    dicionário novo (os chamadores podem escrever nele).
+
+    Args:
+        nome: Nome da etapa (por exemplo, 'carregamento' ou 'figura: heatmap')
+        linhas: Número de linhas processadas pela etapa
+
+    Returns:
+        Gerenciador de contexto que entrega o dicionário da etapa
+    """
+    perfil = _perfil_atual.get()
+    if perfil is None:
+        return nullcontext({})
+    return perfil.etapa(nome, linhas)
+
+# Função para iniciar o perfil de uma execução
+def iniciar_perfil(ativo, coletar_cprofile=False):
+    """
+    Inicia (ou não) o perfil da execução que está começando
+
+    Quem inicia o perfil deve chamar finalizar em um finally: uma execução interrompida
+    (st.rerun, st.stop ou erro) deixaria o tracemalloc e o cProfile ligados, e a execução
+    seguinte roda em outra thread, sem acesso ao perfil desta.
+
+    Args:
+        ativo: Se o modo de depuração está ligado
+        coletar_cprofile: Se também deve coletar o cProfile
+
+    Returns:
+        PerfilExecucao ativo, ou None se o modo de depuração estiver desligado
+    """
+    if not ativo:
+        return None
+
+    perfil = PerfilExecucao(coletar_cprofile)
+    perfil.iniciar()
+    return perfil
@@ -0,0 +1,110 @@
+import html
+from functools import lru_cache
+from datetime import datetime
+
+# Estilo do relatório (mesmas cores do painel)
+ESTILO_RELATORIO = """
+body { background: #0e1117; color: #fafafa; font-family: sans-serif; margin: 0 auto; max-width: 1200px; padding: 2rem; }
+h1, h2, h3 { color: #1DB954; }
+.metricas { display: flex; flex-wrap: wrap; gap: 1rem; }
+.metrica { background: #1a1c24; border-radius: 10px; padding: 1rem 1.5rem; flex: 1 1 180px; }
+.metrica .rotulo { color: #b3b3b3; font-size: 0.9rem; }
+.metrica .valor { font-size: 1.8rem; font-weight: bold; }
+.figura { margin: 1rem 0 2rem; }
+.rodape { color: #b3b3b3; font-size: 0.8rem; margin-top: 3rem; }
+"""
+
+# Função para obter o plotly.js
+@lru_cache(maxsize=1)
+def _plotlyjs():
+    """
+    Obtém o código do plotly.js distribuído com o pacote plotly (lido uma única vez)
+
+    Returns:
+        Código JavaScript do plotly.js
+    """
+    from plotly.offline import get_plotlyjs
+    return get_plotlyjs()
+
+# Função para gerar o trecho HTML de uma figura
+def _html_figura(id_div, payload):
+    """
+    Gera o trecho HTML que desenha uma figura a partir do seu JSON
+
+    O JSON é embutido como está (sem reconstruir a figura), usando o plotly.js
+    compartilhado do relatório.
+
+    Args:
+        id_div: Identificador do elemento da figura
+        payload: JSON da figura gerado pelo Plotly
+
+    Returns:
+        Trecho HTML com o elemento e o script da figura
+    """
+    # Impedir que o conteúdo do JSON feche a tag <script>
+    payload = payload.replace('</', '<\\/')
+    return (
+        f'<div id="{id_div}" class="figura"></div>\n'
+        f'<script>(function() {{ var fig = {payload}; '
+        f'Plotly.newPlot("{id_div}", fig.data, fig.layout, {{responsive: true, displaylogo: false}}); }})();</script>'
+    )
+
+# Função para gerar o relatório HTML
+def gerar_relatorio_html(titulo, metricas, secoes):
+    """
+    Gera um relatório HTML autocontido com métricas e figuras já calculadas
+
+    O plotly.js é incluído uma única vez e compartilhado por todas as figuras, então o
+    arquivo abre sem internet e sem servidor.
+
+    Args:
+        titulo: Título do relatório
+        metricas: Lista de (rótulo, valor formatado) exibidos em cartões
+        secoes: Lista de (título da seção, itens); cada item é (subtítulo, conteúdo), em
+            que o conteúdo é o JSON de uma figura ou uma lista de textos
+
+    Returns:
+        String com o documento HTML
+    """
+    partes = [
+        '<!DOCTYPE html>',
+        '<html lang="pt-BR">',
+        '<head>',
+        '<meta charset="utf-8">',
+        f'<title>{html.escape(titulo)}</title>',
+        f'<style>{ESTILO_RELATORIO}</style>',
+        f'<script>{_plotlyjs()}</script>',
+        '</head>',
+        '<body>',
+        f'<h1>{html.escape(titulo)}</h1>',
+        '<div class="metricas">'
+    ]
+
+    # Cartões de métricas
+    for rotulo, valor in metricas:
+        partes.append(
+            f'<div class="metrica"><div class="rotulo">{html.escape(rotulo)}</div>'
+            f'<div class="valor">{html.escape(str(valor))}</div></div>'
+        )
+    partes.append('</div>')
+
+    # Seções com figuras e listas
+    numero_figura = 0
+    for titulo_secao, itens in secoes:
+        partes.append(f'<h2>{html.escape(titulo_secao)}</h2>')
+        for subtitulo, conteudo in itens:
+            if conteudo is None:
+                continue
+            partes.append(f'<h3>{html.escape(subtitulo)}</h3>')
+            if isinstance(conteudo, str):
+                numero_figura += 1
+                partes.append(_html_figura(f"figura-{numero_figura}", conteudo))
+            else:
+                partes.append('<ul>' + ''.join(f'<li>{html.escape(str(texto))}</li>' for texto in conteudo) + '</ul>')
+
+    partes.append(
+        f'<p class="rodape">Gerado em {datetime.now():%d/%m/%Y %H:%M} · Spotify Analytics Avançado</p>'
+    )
+    partes.append('</body>\n</html>')
+
+    return '\n'.join(partes)
@@ -1,19 +1,48 @@
 import os
 import json
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
+import plotly.graph_objects as go
 from datetime import datetime
-import tempfile
-import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from comparacoes_criativas_interativas import adicionar_comparacoes_ao_painel
+from carregamento import ler_dados, ler_amostra, projetar_registros, ProgressoCarregamento
+from leitores import LEITORES, campos_disponiveis, identificar_leitor
+from componentes import exibir_tabela_paginada
+from cache_figuras import calcular_impressao_digital, obter_figura, obter_payload
+from relatorio_html import gerar_relatorio_html
+from conjunto_dados import ConjuntoDados, conjuntos_ativos
+from armazenamento import ArmazenamentoEnvios
+from perfil import iniciar_perfil, medir_etapa
+from metricas import METRICAS, contar_consultas_cache, iniciar_exportacao
+from esbocos import resumir_exportacao
+from gerador_sintetico import BYTES_POR_REPRODUCAO, gravar_exportacao
 from analises_avancadas import (
     criar_heatmap_dia_semana_hora,
     criar_paleta_horarios,
     criar_comparativo_anos,
     criar_graficos_evolucao,
     gerar_recomendacoes,
-    visualizar_recomendacoes
+    visualizar_recomendacoes,
+    criar_grafico_top,
+    criar_grafico_top_aproximado,
+    criar_grafico_distintos_por_mes,
+    criar_grafico_pulos,
+    criar_grafico_dispositivos,
+    calcular_resumo_paises,
+    criar_grafico_paises,
+    criar_grafico_paises_tempo,
+    criar_heatmap_detalhado,
+    METRICAS_HEATMAP,
+    AVISO_INDISPONIVEL,
+    criar_traco_serie,
+    FREQUENCIAS_SERIE,
+    encontrar_musicas_sequencia,
+    buscar_musicas_por_artista
 )
 
 def install(package):
@@ -25,6 +54,9 @@ try:
 except ImportError:
     install("plotly==5.18.0")
 
+# Início da execução (usado para medir a latência de atualização)
+inicio_execucao = time.perf_counter()
+
 # Configuração da página
 st.set_page_config(
     page_title="Spotify Analytics Avançado",
@@ -33,6 +65,14 @@ st.set_page_config(
     page_icon="🎧"
 )
 
+# Modo de depuração: perfil por etapa desta execução (sem custo quando desligado)
+modo_perfil = st.sidebar.toggle(
+    "🐞 Modo de depuração",
+    key="modo_perfil",
+    help="Mede tempo, memória alocada e linhas de cada etapa da execução"
+)
+coletar_cprofile = modo_perfil and st.sidebar.checkbox("Coletar cProfile", key="coletar_cprofile")
+
 # Aplicar tema personalizado
 st.markdown("""
 <style>
@@ -172,33 +212,98 @@ def validar_arquivo_spotify(conteudo):
         if len(conteudo) == 0:
             return False, "O arquivo não contém dados de reprodução"
         
-        # Verificar campos obrigatórios no primeiro item
-        campos_obrigatorios = ['ts', 'ms_played', 'master_metadata_track_name', 
-                              'master_metadata_album_artist_name', 'master_metadata_album_album_name']
-        
-        for campo in campos_obrigatorios:
-            if campo not in conteudo[0]:
-                return False, f"Campo obrigatório '{campo}' não encontrado nos dados"
+        # Verificar se o primeiro item está em um dos formatos conhecidos
+        if not isinstance(conteudo[0], dict) or identificar_leitor(conteudo[0]) is None:
+            formatos = ", ".join(leitor.descricao for leitor in LEITORES)
+            return False, f"Formato não reconhecido. Formatos aceitos: {formatos}"
         
         return True, "Arquivo válido"
     
     except Exception as e:
         return False, f"Erro ao validar arquivo: {str(e)}"
 
+# Função para obter o armazenamento das pastas de envio
+@st.cache_resource
+def obter_armazenamento():
+    """
+    Obtém o armazenamento de pastas de envio, compartilhado por todas as sessões
+    
+    Returns:
+        ArmazenamentoEnvios com validade, cota de disco e varredura em segundo plano
+    """
+    return ArmazenamentoEnvios()
+
+# Função para renovar a validade da pasta da sessão
+def renovar_validade_pasta():
+    """
+    Registra um acesso à pasta da sessão nas execuções de fragmentos, que não passam pelo
+    início da página (onde a validade é renovada a cada execução completa)
+    """
+    obter_armazenamento().acessar(st.session_state.id_sessao)
+
+# Função para coletar as métricas de memória e armazenamento
+def coletar_metricas_recursos():
+    """
+    Coleta, no momento da leitura das métricas, a memória dos conjuntos carregados e o uso do armazenamento
+    
+    Returns:
+        Lista de (nome, tipo, descrição, rótulos, valor) no formato dos coletores de METRICAS
+    """
+    conjuntos = conjuntos_ativos()
+    series = [
+        ('spotify_conjuntos_carregados', 'gauge', "Conjuntos de dados em memória", {}, len(conjuntos))
+    ]
+    for conjunto in conjuntos:
+        series.append((
+            'spotify_conjunto_memoria_bytes', 'gauge', "Memória ocupada pelo DataFrame de cada conjunto de dados",
+            {'conjunto': conjunto.nome or 'sem_nome'}, conjunto.memoria_bytes()
+        ))
+    
+    armazenamento = obter_armazenamento().obter_metricas()
+    series.extend([
+        ('spotify_envios_pastas_ativas', 'gauge', "Pastas de envio com dono", {}, armazenamento['pastas_ativas']),
+        ('spotify_envios_bytes_em_uso', 'gauge', "Espaço ocupado pelas pastas de envio", {}, armazenamento['bytes_em_uso']),
+        ('spotify_envios_bytes_recuperados_total', 'counter', "Espaço liberado pela remoção de pastas de envio", {}, armazenamento['bytes_recuperados'])
+    ])
+    for motivo in ('pelo_usuario', 'por_validade', 'por_cota', 'orfas'):
+        series.append((
+            'spotify_envios_pastas_removidas_total', 'counter', "Pastas de envio removidas, por motivo",
+            {'motivo': motivo}, armazenamento[f'removidas_{motivo}']
+        ))
+    return series
+
+# Função para iniciar as métricas do processo
+@st.cache_resource
+def iniciar_metricas():
+    """
+    Registra os coletores e inicia a exportação das métricas (uma única vez por processo)
+    
+    Returns:
+        Porta local do endpoint /metrics, ou None se ele não foi iniciado
+    """
+    METRICAS.registrar_coletor(coletar_metricas_recursos)
+    return iniciar_exportacao()
+
 # Função para processar arquivos enviados
-def processar_arquivos_enviados(arquivos_enviados):
+def processar_arquivos_enviados(arquivos_enviados, armazenamento, id_sessao, ao_processar_arquivo=None):
     """
     Processa os arquivos JSON enviados pelo usuário
     
     Args:
         arquivos_enviados: Lista de arquivos enviados
+        armazenamento: ArmazenamentoEnvios onde a pasta da sessão é criada
+        id_sessao: Identificador da sessão dona da pasta
+        ao_processar_arquivo: Função opcional (índice, total, nome) chamada antes de cada arquivo
         
     Returns:
         (bool, str, str): Tupla com status, mensagem e caminho da pasta temporária
     """
     try:
-        # Criar pasta temporária para armazenar os arquivos
-        pasta_temp = tempfile.mkdtemp()
+        # Criar a pasta da sessão, reservando na cota o tamanho dos envios (os arquivos gravados,
+        # só com os campos utilizados, são menores)
+        pasta_temp = armazenamento.criar_pasta(id_sessao, sum(arquivo.size for arquivo in arquivos_enviados))
+        if pasta_temp is None:
+            return False, "Os arquivos enviados excedem o espaço disponível no servidor", ""
         pasta_data = os.path.join(pasta_temp, 'data')
         os.makedirs(pasta_data, exist_ok=True)
         
@@ -206,7 +311,9 @@ def processar_arquivos_enviados(arquivos_enviados):
         arquivos_validos = 0
         
         # Processar cada arquivo
-        for arquivo in arquivos_enviados:
+        for indice, arquivo in enumerate(arquivos_enviados):
+            if ao_processar_arquivo is not None:
+                ao_processar_arquivo(indice, len(arquivos_enviados), arquivo.name)
             try:
                 # Ler conteúdo do arquivo
                 conteudo = json.loads(arquivo.getvalue().decode('utf-8'))
@@ -215,876 +322,1667 @@ def processar_arquivos_enviados(arquivos_enviados):
                 valido, mensagem = validar_arquivo_spotify(conteudo)
                 
                 if valido:
-                    # Salvar arquivo na pasta temporária
+                    # Salvar na pasta temporária só os campos lidos pelo formato (sem IP, user agent etc.)
+                    leitor = identificar_leitor(conteudo[0])
                     caminho_arquivo = os.path.join(pasta_data, f"spotify_{arquivos_validos}.json")
                     with open(caminho_arquivo, 'w', encoding='utf-8') as f:
-                        json.dump(conteudo, f)
+                        json.dump(projetar_registros(conteudo, leitor.campos), f)
                     
                     arquivos_validos += 1
                 else:
+                    armazenamento.liberar(id_sessao)
                     return False, f"Erro no arquivo {arquivo.name}: {mensagem}", ""
             
             except Exception as e:
+                armazenamento.liberar(id_sessao)
                 return False, f"Erro ao processar arquivo {arquivo.name}: {str(e)}", ""
         
         if arquivos_validos == 0:
+            armazenamento.liberar(id_sessao)
             return False, "Nenhum arquivo válido foi enviado", ""
         
+        # Aplicar a cota de disco (pode remover pastas de sessões inativas)
+        if not armazenamento.registrar_tamanho(id_sessao):
+            return False, "Os arquivos enviados excedem o espaço disponível no servidor", ""
+        
         return True, f"{arquivos_validos} arquivos processados com sucesso", pasta_temp
     
     except Exception as e:
         return False, f"Erro ao processar arquivos: {str(e)}", ""
 
-# Função para carregar dados
-@st.cache_data
-def carregar_dados(pasta_dados):
+# Número máximo de conjuntos de dados mantidos em memória pelo cache de carregamento
+MAX_CONJUNTOS_CARREGADOS = 8
+
+# Tamanho da exportação a partir do qual o painel mostra uma prévia por amostra enquanto carrega
+LIMITE_PREVIA_BYTES = 64 * 1024 ** 2
+
+# Tamanhos oferecidos para o histórico sintético de demonstração
+ESCALAS_DEMO = {
+    "10 mil reproduções": 10_000,
+    "100 mil reproduções": 100_000,
+    "1 milhão de reproduções": 1_000_000
+}
+
+# Figuras da visão geral: nome -> (nome no cache de figuras, construtor, parâmetros)
+FIGURAS_VISAO_GERAL = {
+    'top_artistas': ('top', criar_grafico_top, {'coluna': 'artist', 'rotulo': 'Artista', 'escala_cores': 'viridis'}),
+    'top_musicas': ('top', criar_grafico_top, {'coluna': 'track', 'rotulo': 'Música', 'escala_cores': 'plasma'}),
+    'top_albuns': ('top', criar_grafico_top, {'coluna': 'album', 'rotulo': 'Álbum', 'escala_cores': 'inferno'}),
+    'pulos': ('pulos', criar_grafico_pulos, {}),
+    'dispositivos': ('dispositivos', criar_grafico_dispositivos, {})
+}
+
+# Função para ler um conjunto de dados do disco
+def ler_conjunto(pasta_dados, progresso=None):
     """
-    Carrega dados dos arquivos JSON
+    Lê e processa os arquivos de uma pasta, registrando as métricas de carregamento
     
     Args:
         pasta_dados: Caminho da pasta com os arquivos JSON
+        progresso: ProgressoCarregamento opcional, atualizado a cada arquivo lido
         
     Returns:
-        DataFrame com os dados processados
+        ConjuntoDados com os dados processados
     """
-    caminho_pasta = os.path.join(pasta_dados, 'data')
-    todos_dados = []
+    METRICAS.incrementar('spotify_carregamentos_total')
+    with medir_etapa("leitura dos arquivos"), METRICAS.cronometrar('spotify_carregamento_segundos'):
+        return ConjuntoDados(ler_dados(pasta_dados, progresso), nome=os.path.basename(os.path.normpath(pasta_dados)))
 
-    for arquivo in os.listdir(caminho_pasta):
-        if arquivo.endswith('.json'):
-            with open(os.path.join(caminho_pasta, arquivo), 'r', encoding='utf-8') as f:
-                dados = json.load(f)
-                todos_dados.extend(dados)
+# Função para obter os carregamentos em segundo plano
+@st.cache_resource
+def obter_carregamentos():
+    """
+    Obtém o executor e o registro dos carregamentos em segundo plano (um por processo)
+    
+    Returns:
+        (ThreadPoolExecutor, dict): Executor e dicionário pasta -> (Future, ProgressoCarregamento)
+    """
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix='carregamento'), {}
 
-    df = pd.DataFrame(todos_dados)
+# Função para carregar os dados exatos em segundo plano
+def carregar_em_segundo_plano(pasta_dados, chave_dados, progresso):
+    """
+    Lê o conjunto de dados e pré-calcula as figuras da visão geral (executada no executor)
+    
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON
+        chave_dados: Impressão digital do conjunto de dados
+        progresso: ProgressoCarregamento consultado pela interface
+        
+    Returns:
+        ConjuntoDados com os dados processados
+        
+    Raises:
+        CarregamentoCancelado: Se o usuário cancelou o carregamento
+    """
+    conjunto = ler_conjunto(pasta_dados, progresso)
+    progresso.verificar_cancelamento()
+    progresso.etapa = "figuras"
+    df = conjunto.df
+    for nome, construtor, parametros in FIGURAS_VISAO_GERAL.values():
+        obter_payload(nome, chave_dados, df, construtor, **parametros)
+    return conjunto
 
-    df['ts'] = pd.to_datetime(df['ts'])
-    df['ano'] = df['ts'].dt.year
-    df['mes'] = df['ts'].dt.month
-    df['dia'] = df['ts'].dt.day
-    df['hora'] = df['ts'].dt.hour
-    df['diaSemana'] = df['ts'].dt.day_name()
+# Função para iniciar o carregamento em segundo plano
+def iniciar_carregamento(pasta_dados):
+    """
+    Marca a pasta para leitura exata em segundo plano quando a exportação é grande
+    
+    Enquanto ela roda, o painel mostra a prévia por amostra, o progresso da leitura e os
+    totais exatos dos arquivos já lidos; exportações pequenas continuam sendo lidas direto
+    por carregar_dados. A leitura só começa depois que a prévia é desenhada
+    (disparar_carregamento): a decodificação do JSON segura o GIL e atrasaria a primeira exibição.
+    
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON
+    """
+    progresso = ProgressoCarregamento(pasta_dados)
+    if progresso.total_bytes >= LIMITE_PREVIA_BYTES:
+        _, cargas = obter_carregamentos()
+        cargas[pasta_dados] = (None, progresso)
 
-    df['segundos'] = df['ms_played'] / 1000
-    df['minutos'] = df['segundos'] / 60
-    df['horas'] = df['minutos'] / 60
+# Função para disparar a leitura exata
+def disparar_carregamento(pasta_dados):
+    """
+    Submete ao executor a leitura exata de uma pasta marcada por iniciar_carregamento
+    
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON
+    """
+    executor, cargas = obter_carregamentos()
+    carga = cargas.get(pasta_dados)
+    if carga is not None and carga[0] is None:
+        futuro = executor.submit(
+            carregar_em_segundo_plano, pasta_dados, calcular_impressao_digital(pasta_dados), carga[1]
+        )
+        cargas[pasta_dados] = (futuro, carga[1])
 
-    df['foi_pulado'] = df['skipped'] == True
+# Função para verificar se há um carregamento em andamento
+def possui_carga_pendente(pasta_dados):
+    """
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON
+        
+    Returns:
+        True se a leitura exata da pasta ainda não terminou (ou nem começou)
+    """
+    _, cargas = obter_carregamentos()
+    carga = cargas.get(pasta_dados)
+    return carga is not None and (carga[0] is None or not carga[0].done())
 
-    df['track'] = df['master_metadata_track_name']
-    df['artist'] = df['master_metadata_album_artist_name']
-    df['album'] = df['master_metadata_album_album_name']
+# Função para cancelar o carregamento em segundo plano
+def cancelar_carregamento(pasta_dados):
+    """
+    Interrompe a leitura exata de uma pasta e descarta os arquivos da sessão
+    
+    A leitura para ao fim do arquivo em andamento (o resultado nunca chega ao cache) e
+    a página volta para a tela de envio.
+    
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON
+    """
+    _, cargas = obter_carregamentos()
+    carga = cargas.pop(pasta_dados, None)
+    if carga is not None:
+        carga[1].cancelar()
+        METRICAS.incrementar('spotify_carregamentos_cancelados_total')
+    
+    obter_armazenamento().liberar(st.session_state.id_sessao)
+    st.session_state.dados_carregados = False
+    st.session_state.pasta_temp = None
 
-    return df
+# Função para exibir um gráfico ou um aviso
+def exibir_grafico(fig, aviso):
+    """
+    Exibe a figura ou, quando o construtor não gerou figura (sem dados), o aviso
+    
+    Args:
+        fig: Figura do Plotly ou None
+        aviso: Mensagem exibida no lugar do gráfico
+    """
+    if fig is None:
+        st.info(aviso)
+    else:
+        st.plotly_chart(fig, use_container_width=True)
 
-# Função para encontrar músicas tocadas antes/depois
-def encontrar_musicas_sequencia(df, musica_selecionada, direcao='depois', top_n=10):
+# Função para montar o aviso de um gráfico sem dados
+def aviso_sem_dados(df, campo, descricao):
     """
-    Encontra as músicas mais tocadas antes ou depois de uma música específica
+    Explica por que um gráfico ficou sem dados
     
     Args:
         df: DataFrame com os dados
-        musica_selecionada: Nome da música selecionada
-        direcao: 'antes' ou 'depois'
-        top_n: Número de músicas a retornar
+        campo: Campo da exportação usado pelo gráfico
+        descricao: O que o gráfico mostra (por exemplo, "Álbuns")
         
     Returns:
-        DataFrame com as músicas mais frequentes na sequência
-    """
-    # Ordenar por timestamp
-    df_ordenado = df.sort_values('ts')
-    
-    # Encontrar índices da música selecionada
-    indices_musica = df_ordenado[df_ordenado['track'] == musica_selecionada].index
-    
-    musicas_sequencia = []
-    
-    for idx in indices_musica:
-        # Encontrar índice da próxima ou anterior música
-        if direcao == 'depois':
-            # Próxima música (índice + 1)
-            if idx + 1 < len(df_ordenado):
-                proxima_musica = df_ordenado.iloc[idx + 1]
-                if not pd.isna(proxima_musica['track']):
-                    musicas_sequencia.append({
-                        'track': proxima_musica['track'],
-                        'artist': proxima_musica['artist'],
-                        'ts': proxima_musica['ts']
-                    })
-        else:
-            # Música anterior (índice - 1)
-            if idx - 1 >= 0:
-                anterior_musica = df_ordenado.iloc[idx - 1]
-                if not pd.isna(anterior_musica['track']):
-                    musicas_sequencia.append({
-                        'track': anterior_musica['track'],
-                        'artist': anterior_musica['artist'],
-                        'ts': anterior_musica['ts']
-                    })
-    
-    # Converter para DataFrame
-    if musicas_sequencia:
-        df_sequencia = pd.DataFrame(musicas_sequencia)
-        
-        # Contar frequência
-        contagem = df_sequencia.groupby(['track', 'artist']).size().reset_index(name='contagem')
-        
-        # Ordenar por contagem e retornar top N
-        return contagem.sort_values('contagem', ascending=False).head(top_n)
-    else:
-        return pd.DataFrame(columns=['track', 'artist', 'contagem'])
+        Aviso de campo indisponível no formato lido, ou de ausência de registros
+    """
+    if campo not in campos_disponiveis(df):
+        return f"{descricao}: {AVISO_INDISPONIVEL} (só o histórico estendido, Streaming_History_Audio, traz esse campo)."
+    return f"{descricao}: não há registros nos arquivos enviados."
 
-# Função para buscar músicas por artista
-def buscar_musicas_por_artista(df, artista):
+# Função para obter uma figura da visão geral
+def obter_figura_visao_geral(nome, chave_dados, df):
     """
-    Busca músicas de um artista específico
+    Obtém do cache uma das figuras de FIGURAS_VISAO_GERAL
     
     Args:
+        nome: Chave em FIGURAS_VISAO_GERAL
+        chave_dados: Impressão digital do conjunto de dados
         df: DataFrame com os dados
-        artista: Nome do artista
         
     Returns:
-        DataFrame com as músicas do artista ordenadas por tempo de escuta
+        Figura do Plotly
     """
-    # Filtrar por artista
-    df_artista = df[df['artist'] == artista]
-    
-    # Agrupar por música e somar minutos
-    musicas_artista = df_artista.groupby(['track', 'artist'])['minutos'].sum().reset_index()
-    
-    # Ordenar por tempo de escuta
-    return musicas_artista.sort_values('minutos', ascending=False)
-
-# Início do app
-st.title("🎧 Spotify Analytics Avançado")
-
-# Verificar se os dados já foram carregados
-if 'dados_carregados' not in st.session_state:
-    st.session_state.dados_carregados = False
-    st.session_state.pasta_temp = None
+    nome_cache, construtor, parametros = FIGURAS_VISAO_GERAL[nome]
+    return obter_figura(nome_cache, chave_dados, df, construtor, **parametros)
 
-# Tela inicial para upload de dados
-if not st.session_state.dados_carregados:
-    st.markdown("### Bem-vindo ao Analisador Avançado de Dados do Spotify")
-    
-    # Container de upload estilizado
-    st.markdown("""
-    <div class="upload-container">
-        <img src="https://storage.googleapis.com/pr-newsroom-wp/1/2018/11/Spotify_Logo_RGB_Green.png" class="spotify-logo" />
-        <p class="welcome-text">Descubra insights detalhados sobre seus hábitos de escuta no Spotify com visualizações modernas e análises personalizadas.</p>
-        <p class="instruction-text">Para começar, faça o upload dos seus arquivos JSON de histórico de reprodução do Spotify.<br>Você pode baixar seus dados em <a href="https://www.spotify.com/account/privacy/" target="_blank">spotify.com/account/privacy</a> → Solicitar dados → Histórico de reprodução.</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Upload de arquivos
-    arquivos_enviados = st.file_uploader(
-        "Selecione seus arquivos JSON do Spotify",
-        type=["json"],
-        accept_multiple_files=True,
-        help="Você pode selecionar múltiplos arquivos JSON do seu histórico de reprodução do Spotify."
-    )
+# Função para carregar dados
+@contar_consultas_cache('conjuntos')
+@st.cache_resource(show_spinner=False, max_entries=MAX_CONJUNTOS_CARREGADOS)
+def carregar_dados(pasta_dados):
+    """
+    Carrega dados dos arquivos JSON
     
-    # Botão para processar arquivos
-    if arquivos_enviados:
-        if st.button("Analisar meus dados", key="analisar_dados"):
-            with st.spinner("Processando seus dados..."):
-                # Processar arquivos
-                sucesso, mensagem, pasta_temp = processar_arquivos_enviados(arquivos_enviados)
-                
-                if sucesso:
-                    # Armazenar caminho da pasta temporária
-                    st.session_state.pasta_temp = pasta_temp
-                    st.session_state.dados_carregados = True
-                    
-                    # Exibir mensagem de sucesso
-                    st.markdown(f"""
-                    <div class="success-message">
-                        <h3>✅ Dados carregados com sucesso!</h3>
-                        <p>{mensagem}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Recarregar a página para mostrar as análises
-                    st.rerun()
-                else:
-                    # Exibir mensagem de erro
-                    st.markdown(f"""
-                    <div class="error-message">
-                        <h3>❌ Erro ao processar arquivos</h3>
-                        <p>{mensagem}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+    O resultado é um recurso compartilhado: as execuções seguintes recebem o mesmo
+    objeto, sem a cópia (pickle/unpickle) do DataFrame inteiro que o cache_data faria.
+    Se a pasta foi lida em segundo plano, usa o resultado desse carregamento.
     
-    # Exibir instruções detalhadas
-    with st.expander("Como obter seus dados do Spotify?"):
-        st.markdown("""
-        ### Como obter seus dados do Spotify
-        
-        1. Acesse [spotify.com/account/privacy](https://www.spotify.com/account/privacy/)
-        2. Faça login na sua conta
-        3. Role até a seção "Solicitar seus dados"
-        4. Clique em "Solicitar"
-        5. Selecione "Histórico de reprodução" e confirme
-        6. Você receberá um e-mail quando seus dados estiverem prontos (geralmente em até 30 dias)
-        7. Baixe o arquivo ZIP e extraia os arquivos JSON
-        8. Faça upload dos arquivos JSON nesta página
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON
         
-        **Nota:** Os arquivos JSON do Spotify contêm seu histórico de reprodução detalhado, incluindo músicas, artistas, álbuns, timestamps e outros metadados.
-        """)
-    
-    # Exibir exemplo com dados de demonstração
-    with st.expander("Não tem seus dados? Use nosso exemplo de demonstração"):
-        if st.button("Carregar dados de demonstração", key="carregar_demo"):
-            # Criar pasta temporária para os dados de demonstração
-            pasta_temp = tempfile.mkdtemp()
-            pasta_data = os.path.join(pasta_temp, 'data')
-            os.makedirs(pasta_data, exist_ok=True)
-            
-            # Criar arquivo de demonstração
-            dados_demo = [
-                {
-                    "ts": "2024-01-01T12:30:45Z",
-                    "ms_played": 18000000,
-                    "master_metadata_track_name": "Exemplo de Música",
-                    "master_metadata_album_artist_name": "Artista Exemplo",
-                    "master_metadata_album_album_name": "Álbum Exemplo",
-                    "reason_start": "trackdone",
-                    "reason_end": "trackdone",
-                    "skipped": False,
-                    "offline": False,
-                    "platform": "android"
-                },
-                {
-                    "ts": "2024-01-01T12:34:45Z",
-                    "ms_played": 24000000,
-                    "master_metadata_track_name": "Outra Música",
-                    "master_metadata_album_artist_name": "Outro Artista",
-                    "master_metadata_album_album_name": "Outro Álbum",
-                    "reason_start": "clickrow",
-                    "reason_end": "fwdbtn",
-                    "skipped": True,
-                    "offline": True,
-                    "platform": "ios"
-                },
-                {
-                    "ts": "2024-01-02T18:30:45Z",
-                    "ms_played": 30000000,
-                    "master_metadata_track_name": "Música Popular",
-                    "master_metadata_album_artist_name": "Artista Famoso",
-                    "master_metadata_album_album_name": "Álbum Famoso",
-                    "reason_start": "playbtn",
-                    "reason_end": "trackdone",
-                    "skipped": False,
-                    "offline": False,
-                    "platform": "desktop"
-                },
-                {
-                    "ts": "2023-01-01T12:30:45Z",
-                    "ms_played": 18000000,
-                    "master_metadata_track_name": "Música Antiga",
-                    "master_metadata_album_artist_name": "Artista Antigo",
-                    "master_metadata_album_album_name": "Álbum Antigo",
-                    "reason_start": "trackdone",
-                    "reason_end": "trackdone",
-                    "skipped": False,
-                    "offline": False,
-                    "platform": "android"
-                },
-                {
-                    "ts": "2024-01-01T12:38:45Z",
-                    "ms_played": 24000000,
-                    "master_metadata_track_name": "Música Sequencial",
-                    "master_metadata_album_artist_name": "Artista Exemplo",
-                    "master_metadata_album_album_name": "Álbum Exemplo",
-                    "reason_start": "trackdone",
-                    "reason_end": "trackdone",
-                    "skipped": False,
-                    "offline": False,
-                    "platform": "android"
-                }
-            ]
-            
-            # Multiplicar dados para ter mais exemplos
-            dados_expandidos = []
-            for i in range(20):
-                for item in dados_demo:
-                    novo_item = item.copy()
-                    if i > 0:
-                        # Modificar alguns campos para criar variação
-                        novo_item["ts"] = f"2024-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}T{i % 24:02d}:30:45Z"
-                        if i % 3 == 0:
-                            novo_item["master_metadata_track_name"] += f" {i}"
-                            novo_item["master_metadata_album_artist_name"] += f" {i % 5}"
-                    dados_expandidos.append(novo_item)
-            
-            # Salvar arquivo de demonstração
-            with open(os.path.join(pasta_data, "spotify_demo.json"), 'w', encoding='utf-8') as f:
-                json.dump(dados_expandidos, f)
-            
-            # Atualizar estado da sessão
-            st.session_state.pasta_temp = pasta_temp
-            st.session_state.dados_carregados = True
-            
-            # Exibir mensagem de sucesso
-            st.markdown("""
-            <div class="success-message">
-                <h3>✅ Dados de demonstração carregados!</h3>
-                <p>Os dados de demonstração foram carregados com sucesso. Clique em "Recarregar" para ver as análises.</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Botão para recarregar
-            if st.button("Recarregar"):
-                st.rerun()
-
-# Painel principal com análises
-else:
-    # Carregar dados
-    df = carregar_dados(st.session_state.pasta_temp)
-    
-    # Criar abas para organizar o conteúdo
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        "📊 Visão Geral", 
-        "🔍 Busca por Artista",
-        "🔄 Fluxo Musical",
-        "🎭 Estatísticas Divertidas", 
-        "⏰ Análise de Horários", 
-        "📈 Evolução e Comparativos"
-    ])
+    Returns:
+        ConjuntoDados (somente leitura) com os dados processados
+    """
+    METRICAS.incrementar('spotify_cache_falhas_total', cache='conjuntos')
+    _, cargas = obter_carregamentos()
+    carga = cargas.pop(pasta_dados, None)
+    if carga is not None and carga[0] is not None:
+        return carga[0].result()
+    return ler_conjunto(pasta_dados)
+
+# Função para calcular a prévia por amostra
+@st.cache_resource(show_spinner=False, max_entries=MAX_CONJUNTOS_CARREGADOS)
+def calcular_previa(chave_dados, pasta_dados):
+    """
+    Lê, com cache por conjunto de dados, a amostra estratificada usada na prévia
     
-    with tab1:
-        st.header("📊 Visão Geral")
-        
-        # Botão para carregar novos dados
-        if st.button("Carregar novos dados", key="novos_dados"):
-            # Limpar pasta temporária
-            if st.session_state.pasta_temp and os.path.exists(st.session_state.pasta_temp):
-                shutil.rmtree(st.session_state.pasta_temp)
-            
-            # Resetar estado
-            st.session_state.dados_carregados = False
-            st.session_state.pasta_temp = None
-            
-            # Recarregar página
-            st.rerun()
-        
-        # Cartões principais
-        col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Total de minutos", f"{df['minutos'].sum():,.0f}")
-        col2.metric("Total de horas", f"{df['horas'].sum():,.0f}")
-        col3.metric("Total de dias", f"{df['horas'].sum() / 24:,.1f}")
-        col4.metric("Músicas ouvidas", f"{len(df):,}")
-        
-        # Top artistas
-        st.subheader("👨‍🎤 Artistas mais ouvidos")
-        top_artistas = df.groupby('artist')['minutos'].sum().sort_values(ascending=False).head(10)
-        fig1 = px.bar(top_artistas, x=top_artistas.values, y=top_artistas.index, orientation='h', 
-                     labels={'x':'Minutos', 'y':'Artista'}, 
-                     color=top_artistas.values, color_continuous_scale='viridis',
-                     template="plotly_dark")
-        fig1.update_layout(height=500)
-        st.plotly_chart(fig1, use_container_width=True)
-
-        # Top músicas e álbuns em colunas
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("🎶 Músicas mais ouvidas")
-            top_musicas = df.groupby('track')['minutos'].sum().sort_values(ascending=False).head(10)
-            fig2 = px.bar(top_musicas, x=top_musicas.values, y=top_musicas.index, orientation='h', 
-                         labels={'x':'Minutos', 'y':'Música'}, 
-                         color=top_musicas.values, color_continuous_scale='plasma',
-                         template="plotly_dark")
-            fig2.update_layout(height=500)
-            st.plotly_chart(fig2, use_container_width=True)
-        
-        with col2:
-            st.subheader("💿 Álbuns mais ouvidos")
-            top_albuns = df.groupby('album')['minutos'].sum().sort_values(ascending=False).head(10)
-            fig3 = px.bar(top_albuns, x=top_albuns.values, y=top_albuns.index, orientation='h', 
-                         labels={'x':'Minutos', 'y':'Álbum'}, 
-                         color=top_albuns.values, color_continuous_scale='inferno',
-                         template="plotly_dark")
-            fig3.update_layout(height=500)
-            st.plotly_chart(fig3, use_container_width=True)
-        
-        # Puladas vs completas e dispositivos em colunas
-        col1, col2 = st.columns(2)
+    Args:
+        chave_dados: Impressão digital do conjunto de dados (chave do cache)
+        pasta_dados: Caminho da pasta com os arquivos JSON
         
-        with col1:
-            st.subheader("⏭️ Puladas vs Completas")
-            qtd_puladas = df['foi_pulado'].sum()
-            qtd_completas = len(df) - qtd_puladas
-            fig6 = px.pie(values=[qtd_completas, qtd_puladas],
-                          names=['Completas', 'Puladas'],
-                          title='Proporção de faixas puladas',
-                          color_discrete_sequence=px.colors.qualitative.Set2,
-                          template="plotly_dark",
-                          hole=0.4)
-            fig6.update_layout(height=400)
-            st.plotly_chart(fig6, use_container_width=True)
+    Returns:
+        (DataFrame, int): Amostra processada e número estimado de reproduções
+    """
+    with medir_etapa("prévia: leitura da amostra"):
+        return ler_amostra(pasta_dados)
+
+# Função para calcular os itens mais ouvidos
+@contar_consultas_cache('agregacoes')
+@st.cache_data(show_spinner=False)
+def calcular_top_por_minutos(chave_dados, _df, coluna, n=10):
+    """
+    Calcula, com cache por conjunto de dados, os itens mais ouvidos de uma coluna
+    
+    Args:
+        chave_dados: Impressão digital do conjunto de dados (chave do cache)
+        _df: DataFrame com os dados (não entra no hash do cache)
+        coluna: Coluna a agrupar ('artist', 'track' ou 'album')
+        n: Número de itens a retornar
         
-        with col2:
-            st.subheader("📱 Dispositivos mais utilizados")
-            dispositivos = df['platform'].value_counts().head(10)
-            fig14 = px.bar(dispositivos, x=dispositivos.index, y=dispositivos.values,
-                           labels={'x': 'Dispositivo', 'y': 'Execuções'},
-                           color=dispositivos.values, color_continuous_scale='Viridis',
-                           template="plotly_dark")
-            fig14.update_layout(height=400)
-            st.plotly_chart(fig14, use_container_width=True)
-    
-    with tab2:
-        st.header("🔍 Busca por Artista")
+    Returns:
+        Series com os minutos ouvidos dos n itens mais ouvidos
+    """
+    METRICAS.incrementar('spotify_cache_falhas_total', cache='agregacoes')
+    with medir_etapa(f"agregação: top {coluna}", linhas=len(_df)):
+        top = _df.groupby(coluna, observed=True)['minutos'].sum().sort_values(ascending=False).head(n)
+    top.index = top.index.astype(object)
+    return top
+
+# Função para calcular as músicas de um artista
+@contar_consultas_cache('agregacoes')
+@st.cache_data(show_spinner=False)
+def calcular_musicas_artista(chave_dados, _df, artista):
+    """
+    Calcula, com cache por conjunto de dados, as músicas de um artista ordenadas por tempo de escuta
+    
+    Args:
+        chave_dados: Impressão digital do conjunto de dados (chave do cache)
+        _df: DataFrame com os dados (não entra no hash do cache)
+        artista: Nome do artista
         
-        # Container de busca estilizado
-        st.markdown('<div class="search-container">', unsafe_allow_html=True)
+    Returns:
+        DataFrame com as músicas do artista e os minutos ouvidos
+    """
+    METRICAS.incrementar('spotify_cache_falhas_total', cache='agregacoes')
+    with medir_etapa("agregação: músicas do artista", linhas=len(_df)):
+        musicas_artista = buscar_musicas_por_artista(_df, artista)
+    musicas_artista['track'] = musicas_artista['track'].astype(object)
+    musicas_artista['artist'] = musicas_artista['artist'].astype(object)
+    return musicas_artista.reset_index(drop=True)
+
+# Função para calcular o índice de nomes usado no autocompletar
+@contar_consultas_cache('agregacoes')
+@st.cache_data(show_spinner=False)
+def calcular_indice_nomes(chave_dados, _df, coluna):
+    """
+    Calcula, com cache por conjunto de dados, o índice de nomes de uma coluna para o autocompletar
+    
+    Args:
+        chave_dados: Impressão digital do conjunto de dados (chave do cache)
+        _df: DataFrame com os dados (não entra no hash do cache)
+        coluna: Coluna categórica com os nomes ('artist' ou 'track')
         
-        # Obter lista de artistas para autocompletar
-        todos_artistas = df['artist'].dropna().unique().tolist()
+    Returns:
+        (list, list): Nomes de exibição e os mesmos nomes em minúsculas
+    """
+    METRICAS.incrementar('spotify_cache_falhas_total', cache='agregacoes')
+    nomes = _df[coluna].cat.categories
+    return nomes.tolist(), nomes.str.lower().tolist()
+
+# Função para calcular o resumo por país de conexão
+@contar_consultas_cache('agregacoes')
+@st.cache_data(show_spinner=False)
+def calcular_paises(chave_dados, _df):
+    """
+    Calcula, com cache por conjunto de dados, a escuta em cada país de conexão
+    
+    Args:
+        chave_dados: Impressão digital do conjunto de dados (chave do cache)
+        _df: DataFrame com os dados (não entra no hash do cache)
         
-        # Criar lista de sugestões baseada no top 10
-        top10_artistas = df.groupby('artist')['minutos'].sum().sort_values(ascending=False).head(10).index.tolist()
+    Returns:
+        DataFrame de calcular_resumo_paises
+    """
+    METRICAS.incrementar('spotify_cache_falhas_total', cache='agregacoes')
+    with medir_etapa("agregação: países", linhas=len(_df)):
+        return calcular_resumo_paises(_df)
+
+# Função para calcular os esboços do modo aproximado
+@contar_consultas_cache('esbocos')
+@st.cache_resource(show_spinner="Calculando estimativas...", max_entries=MAX_CONJUNTOS_CARREGADOS)
+def calcular_resumo_aproximado(chave_dados, pasta_dados):
+    """
+    Preenche, com cache por conjunto de dados, os esboços do modo aproximado
+    
+    Os esboços são calculados em uma passagem em fluxo pelos arquivos da exportação,
+    com memória fixa, sem depender do DataFrame carregado.
+    
+    Args:
+        chave_dados: Impressão digital do conjunto de dados (chave do cache)
+        pasta_dados: Caminho da pasta com os arquivos JSON
         
-        # Exibir sugestões de top artistas
-        st.markdown("### Sugestões de artistas populares")
-        cols_sugestoes = st.columns(5)
-        for i, artista in enumerate(top10_artistas[:5]):
-            with cols_sugestoes[i]:
-                if st.button(artista, key=f"sugestao_{i}"):
-                    st.session_state.artista_selecionado = artista
+    Returns:
+        ResumoAproximado (somente leitura)
+    """
+    METRICAS.incrementar('spotify_cache_falhas_total', cache='esbocos')
+    with medir_etapa("esboços: passagem em fluxo"):
+        return resumir_exportacao(pasta_dados)
+
+# Função para formatar uma estimativa com a margem de erro
+def formatar_estimativa(valor, erro):
+    """
+    Formata uma estimativa do modo aproximado para exibição em métricas
+    
+    Args:
+        valor: Estimativa
+        erro: Margem de erro
         
-        cols_sugestoes2 = st.columns(5)
-        for i, artista in enumerate(top10_artistas[5:10]):
-            with cols_sugestoes2[i]:
-                if st.button(artista, key=f"sugestao2_{i}"):
-                    st.session_state.artista_selecionado = artista
+    Returns:
+        Texto no formato "≈ 1.234 ± 20"
+    """
+    return f"≈ {valor:,.0f} ± {erro:,.0f}"
+
+# Função para buscar sugestões no índice de nomes
+def buscar_sugestoes(indice, termo, limite=10):
+    """
+    Busca os nomes que contêm o termo digitado
+    
+    Args:
+        indice: Tupla (nomes, nomes em minúsculas) de calcular_indice_nomes
+        termo: Texto digitado pelo usuário
+        limite: Número máximo de sugestões
         
-        # Campo de busca com autocompletar
-        if 'artista_selecionado' not in st.session_state:
-            st.session_state.artista_selecionado = ""
-            
-        artista_busca = st.text_input(
-            "Buscar artista",
-            value=st.session_state.artista_selecionado,
-            placeholder="Digite o nome do artista...",
-            key="busca_artista"
+    Returns:
+        Lista com até limite nomes que contêm o termo
+    """
+    nomes, nomes_minusculos = indice
+    termo = termo.lower()
+    sugestoes = []
+    for nome, nome_minusculo in zip(nomes, nomes_minusculos):
+        if termo in nome_minusculo:
+            sugestoes.append(nome)
+            if len(sugestoes) == limite:
+                break
+    return sugestoes
+
+# Callback das sugestões de busca
+def selecionar_sugestao(chave_campo, valor):
+    """
+    Preenche o campo de busca com a sugestão clicada
+    
+    Args:
+        chave_campo: Chave do text_input de busca no session_state
+        valor: Nome sugerido
+    """
+    st.session_state[chave_campo] = valor
+
+# Função para registrar a latência de atualização da página
+def registrar_latencia(secao, inicio):
+    """
+    Registra o tempo da execução atual e exibe-o na barra lateral junto com a meta da seção
+    
+    Args:
+        secao: Nome da seção exibida nesta execução
+        inicio: Instante (time.perf_counter) do início da execução
+    """
+    latencia_ms = (time.perf_counter() - inicio) * 1000
+    METRICAS.observar('spotify_execucao_segundos', latencia_ms / 1000, secao=secao)
+    
+    # Manter as últimas medições de cada seção
+    historico = st.session_state.setdefault('latencias', {}).setdefault(secao, [])
+    historico.append(latencia_ms)
+    del historico[:-LIMITE_HISTORICO_LATENCIA]
+    
+    # Exibir última medição e percentil 95 em relação à meta
+    meta = META_LATENCIA_MS[secao]
+    p95 = float(np.percentile(historico, 95))
+    st.sidebar.caption(
+        f"⏱️ Atualização: {latencia_ms:,.0f} ms · p95: {p95:,.0f} ms · meta: {meta} ms"
+        + (" ⚠️" if p95 > meta else "")
+    )
+
+# Função para exibir as métricas do armazenamento
+def exibir_metricas_armazenamento(armazenamento):
+    """
+    Exibe na barra lateral o uso de disco e o espaço recuperado pelo armazenamento de envios
+    
+    Args:
+        armazenamento: ArmazenamentoEnvios compartilhado
+    """
+    metricas = armazenamento.obter_metricas()
+    removidas = (
+        metricas['removidas_pelo_usuario'] + metricas['removidas_por_validade']
+        + metricas['removidas_por_cota'] + metricas['removidas_orfas']
+    )
+    with st.sidebar.expander("🗄️ Armazenamento"):
+        st.caption(
+            f"Em uso: {metricas['bytes_em_uso'] / 1024 ** 2:,.1f} MB de {metricas['cota_bytes'] / 1024 ** 2:,.0f} MB "
+            f"· {metricas['pastas_ativas']} sessões"
         )
-        
-        # Lista de sugestões baseada no input
-        if artista_busca:
-            sugestoes = [a for a in todos_artistas if artista_busca.lower() in a.lower()][:10]
-            
-            if sugestoes:
-                st.markdown("### Sugestões de artistas")
-                cols_auto = st.columns(5)
-                for i, sugestao in enumerate(sugestoes[:5]):
-                    with cols_auto[i]:
-                        if st.button(sugestao, key=f"auto_{i}"):
-                            st.session_state.artista_selecionado = sugestao
-                            artista_busca = sugestao
-                
-                if len(sugestoes) > 5:
-                    cols_auto2 = st.columns(5)
-                    for i, sugestao in enumerate(sugestoes[5:10]):
-                        with cols_auto2[i]:
-                            if st.button(sugestao, key=f"auto2_{i}"):
-                                st.session_state.artista_selecionado = sugestao
-                                artista_busca = sugestao
-        
-        st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Exibir resultados da busca
-        if artista_busca and artista_busca in todos_artistas:
-            st.markdown('<div class="result-container">', unsafe_allow_html=True)
-            
-            # Buscar músicas do artista
-            musicas_artista = buscar_musicas_por_artista(df, artista_busca)
-            
-            # Calcular estatísticas do artista
-            total_minutos = musicas_artista['minutos'].sum()
-            total_musicas = len(musicas_artista)
-            
-            # Exibir estatísticas
-            st.subheader(f"Estatísticas de {artista_busca}")
-            col1, col2, col3 = st.columns(3)
-            col1.metric("Total de minutos", f"{total_minutos:,.0f}")
-            col2.metric("Total de músicas", f"{total_musicas}")
-            col3.metric("Média por música", f"{total_minutos/total_musicas if total_musicas > 0 else 0:,.1f}")
-            
-            # Exibir top músicas
-            st.subheader(f"Top músicas de {artista_busca}")
-            
-            if not musicas_artista.empty:
-                fig = px.bar(
-                    musicas_artista.head(10),
-                    x='minutos',
-                    y='track',
-                    orientation='h',
-                    labels={'minutos': 'Minutos', 'track': 'Música'},
-                    color='minutos',
-                    color_continuous_scale='Viridis',
-                    template="plotly_dark"
-                )
-                fig.update_layout(height=500)
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Exibir tabela com todas as músicas
-                st.subheader("Todas as músicas")
-                st.dataframe(
-                    musicas_artista[['track', 'minutos']].reset_index(drop=True),
-                    column_config={
-                        "track": "Música",
-                        "minutos": st.column_config.NumberColumn("Minutos", format="%.1f")
-                    },
-                    hide_index=True
-                )
-            else:
-                st.info(f"Nenhuma música encontrada para {artista_busca}")
-            
-            st.markdown('</div>', unsafe_allow_html=True)
+        st.caption(
+            f"Recuperado: {metricas['bytes_recuperados'] / 1024 ** 2:,.1f} MB em {removidas} pastas "
+            f"(validade: {metricas['removidas_por_validade']}, cota: {metricas['removidas_por_cota']}, "
+            f"órfãs: {metricas['removidas_orfas']})"
+        )
+
+# Função para exibir o perfil da execução
+def exibir_perfil(perfil):
+    """
+    Exibe na barra lateral o tempo, a memória e as linhas de cada etapa da última execução
     
-    with tab3:
-        st.header("🔄 Fluxo Musical")
-        
-        # Container de busca estilizado
-        st.markdown('<div class="search-container">', unsafe_allow_html=True)
-        
-        # Obter lista de músicas para autocompletar
-        todas_musicas = df['track'].dropna().unique().tolist()
+    Args:
+        perfil: PerfilExecucao já finalizado
+    """
+    with st.sidebar.expander("🐞 Perfil da última execução", expanded=True):
+        st.caption(f"Execução completa: {perfil.duracao * 1000:,.0f} ms · {len(perfil.etapas)} etapas")
+        st.caption("Com o tracemalloc ligado, os tempos ficam maiores que os de uma execução normal.")
+        st.caption(
+            "Memória medida no processo inteiro, não por sessão: inclui outras sessões e carregamentos "
+            "em segundo plano, e com outras sessões no modo de depuração o pico não é zerado entre as etapas."
+        )
+        if perfil.etapas:
+            st.dataframe(perfil.tabela(), hide_index=True)
+        else:
+            st.caption("Nenhuma etapa medida nesta execução.")
+        
+        if perfil.dump_cprofile is not None:
+            st.download_button(
+                "Baixar cProfile",
+                data=perfil.dump_cprofile,
+                file_name="perfil_execucao.prof",
+                mime="application/octet-stream",
+                on_click="ignore",
+                help="Abra com python -m pstats ou snakeviz"
+            )
+            st.code(perfil.resumo_cprofile(), language=None)
+
+# Função para renderizar a visão geral
+def renderizar_visao_geral(df, chave_dados):
+    """
+    Renderiza a seção de visão geral com métricas e rankings principais
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
+    """
+    st.header("📊 Visão Geral")
+    
+    # Botão para carregar novos dados
+    if st.button("Carregar novos dados", key="novos_dados"):
+        # Remover a pasta da sessão
+        obter_armazenamento().liberar(st.session_state.id_sessao)
         
-        # Criar lista de sugestões baseada no top 10
-        top10_musicas = df.groupby('track')['minutos'].sum().sort_values(ascending=False).head(10).index.tolist()
+        # Resetar estado
+        st.session_state.dados_carregados = False
+        st.session_state.pasta_temp = None
         
-        # Exibir sugestões de top músicas
-        st.markdown("### Sugestões de músicas populares")
-        cols_sugestoes = st.columns(5)
-        for i, musica in enumerate(top10_musicas[:5]):
-            with cols_sugestoes[i]:
-                if st.button(musica, key=f"sugestao_musica_{i}"):
-                    st.session_state.musica_selecionada = musica
-        
-        cols_sugestoes2 = st.columns(5)
-        for i, musica in enumerate(top10_musicas[5:10]):
-            with cols_sugestoes2[i]:
-                if st.button(musica, key=f"sugestao_musica2_{i}"):
-                    st.session_state.musica_selecionada = musica
-        
-        # Campo de busca com autocompletar
-        if 'musica_selecionada' not in st.session_state:
-            st.session_state.musica_selecionada = ""
-            
-        musica_busca = st.text_input(
-            "Buscar música",
-            value=st.session_state.musica_selecionada,
-            placeholder="Digite o nome da música...",
-            key="busca_musica"
+        # Recarregar página
+        st.rerun()
+    
+    # Cartões principais
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total de minutos", f"{df['minutos'].sum():,.0f}")
+    col2.metric("Total de horas", f"{df['horas'].sum():,.0f}")
+    col3.metric("Total de dias", f"{df['horas'].sum() / 24:,.1f}")
+    col4.metric("Músicas ouvidas", f"{len(df):,}")
+    
+    # Modo aproximado: distintos e rankings de artistas e músicas vêm dos esboços
+    resumo = None
+    if st.session_state.get('modo_aproximado'):
+        resumo = calcular_resumo_aproximado(chave_dados, st.session_state.pasta_temp)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Artistas distintos", formatar_estimativa(*resumo.distintos_totais('artist')),
+                    help="Estimativa por HyperLogLog; margem de ~95%")
+        col2.metric("Músicas distintas", formatar_estimativa(*resumo.distintos_totais('track')),
+                    help="Estimativa por HyperLogLog; margem de ~95%")
+        col3.metric("Memória dos esboços", f"{resumo.memoria_bytes() / 1024:,.0f} KB",
+                    help="Fixa, independente do tamanho do histórico (cresce só com o número de meses)")
+        st.caption(
+            "Rankings estimados por Space-Saving e Count-Min: as barras de erro mostram o intervalo "
+            "garantido de minutos de cada item."
         )
-        
-        # Lista de sugestões baseada no input
-        if musica_busca:
-            sugestoes = [m for m in todas_musicas if musica_busca.lower() in m.lower()][:10]
-            
-            if sugestoes:
-                st.markdown("### Sugestões de músicas")
-                cols_auto = st.columns(5)
-                for i, sugestao in enumerate(sugestoes[:5]):
-                    with cols_auto[i]:
-                        if st.button(sugestao, key=f"auto_musica_{i}"):
-                            st.session_state.musica_selecionada = sugestao
-                            musica_busca = sugestao
-                
-                if len(sugestoes) > 5:
-                    cols_auto2 = st.columns(5)
-                    for i, sugestao in enumerate(sugestoes[5:10]):
-                        with cols_auto2[i]:
-                            if st.button(sugestao, key=f"auto_musica2_{i}"):
-                                st.session_state.musica_selecionada = sugestao
-                                musica_busca = sugestao
-        
-        st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Exibir resultados da busca
-        if musica_busca and musica_busca in todas_musicas:
-            st.markdown('<div class="result-container">', unsafe_allow_html=True)
-            
-            # Encontrar músicas tocadas antes e depois
-            musicas_depois = encontrar_musicas_sequencia(df, musica_busca, 'depois')
-            musicas_antes = encontrar_musicas_sequencia(df, musica_busca, 'antes')
-            
-            # Exibir informações da música
-            info_musica = df[df['track'] == musica_busca].iloc[0]
-            artista = info_musica['artist']
-            
-            st.subheader(f"Fluxo musical para: {musica_busca}")
-            st.markdown(f"**Artista:** {artista}")
-            
-            # Exibir fluxo musical em colunas
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("🔙 Top 10 músicas tocadas ANTES")
-                
-                if not musicas_antes.empty:
-                    # Criar gráfico
-                    fig_antes = px.bar(
-                        musicas_antes,
-                        x='contagem',
-                        y='track',
-                        orientation='h',
-                        labels={'contagem': 'Frequência', 'track': 'Música', 'artist': 'Artista'},
-                        color='contagem',
-                        color_continuous_scale='Blues',
-                        template="plotly_dark",
-                        hover_data=['artist']
-                    )
-                    fig_antes.update_layout(height=500)
-                    st.plotly_chart(fig_antes, use_container_width=True)
-                    
-                    # Exibir lista detalhada
-                    st.markdown("### Lista detalhada")
-                    for i, (_, row) in enumerate(musicas_antes.iterrows()):
-                        st.markdown(f"""
-                        <div class="flow-item">
-                            <div class="flow-number">{i+1}</div>
-                            <div>
-                                <strong>{row['track']}</strong><br>
-                                <small>{row['artist']} • {row['contagem']} vezes</small>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                else:
-                    st.info("Nenhuma música encontrada tocada antes desta música")
-            
-            with col2:
-                st.subheader("🔜 Top 10 músicas tocadas DEPOIS")
-                
-                if not musicas_depois.empty:
-                    # Criar gráfico
-                    fig_depois = px.bar(
-                        musicas_depois,
-                        x='contagem',
-                        y='track',
-                        orientation='h',
-                        labels={'contagem': 'Frequência', 'track': 'Música', 'artist': 'Artista'},
-                        color='contagem',
-                        color_continuous_scale='Greens',
-                        template="plotly_dark",
-                        hover_data=['artist']
-                    )
-                    fig_depois.update_layout(height=500)
-                    st.plotly_chart(fig_depois, use_container_width=True)
-                    
-                    # Exibir lista detalhada
-                    st.markdown("### Lista detalhada")
-                    for i, (_, row) in enumerate(musicas_depois.iterrows()):
-                        st.markdown(f"""
-                        <div class="flow-item">
-                            <div class="flow-number">{i+1}</div>
-                            <div>
-                                <strong>{row['track']}</strong><br>
-                                <small>{row['artist']} • {row['contagem']} vezes</small>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                else:
-                    st.info("Nenhuma música encontrada tocada depois desta música")
+    
+    # Top artistas
+    st.subheader("👨‍🎤 Artistas mais ouvidos")
+    if resumo is not None:
+        fig1 = criar_grafico_top_aproximado(resumo.top('artist'), rotulo='Artista', escala_cores='viridis')
+    else:
+        fig1 = obter_figura_visao_geral('top_artistas', chave_dados, df)
+    exibir_grafico(fig1, aviso_sem_dados(df, 'master_metadata_album_artist_name', "Artistas"))
+
+    # Top músicas e álbuns em colunas
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("🎶 Músicas mais ouvidas")
+        if resumo is not None:
+            fig2 = criar_grafico_top_aproximado(resumo.top('track'), rotulo='Música', escala_cores='plasma')
+        else:
+            fig2 = obter_figura_visao_geral('top_musicas', chave_dados, df)
+        exibir_grafico(fig2, aviso_sem_dados(df, 'master_metadata_track_name', "Músicas"))
+    
+    with col2:
+        st.subheader("💿 Álbuns mais ouvidos")
+        fig3 = obter_figura_visao_geral('top_albuns', chave_dados, df)
+        exibir_grafico(fig3, aviso_sem_dados(df, 'master_metadata_album_album_name', "Álbuns"))
+    
+    # Puladas vs completas e dispositivos em colunas
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("⏭️ Puladas vs Completas")
+        fig6 = obter_figura_visao_geral('pulos', chave_dados, df)
+        exibir_grafico(fig6, aviso_sem_dados(df, 'skipped', "Pulos"))
+    
+    with col2:
+        st.subheader("📱 Dispositivos mais utilizados")
+        fig14 = obter_figura_visao_geral('dispositivos', chave_dados, df)
+        exibir_grafico(fig14, aviso_sem_dados(df, 'platform', "Dispositivos"))
+
+
+# Função para renderizar a prévia por amostra
+def renderizar_previa(pasta_dados):
+    """
+    Renderiza a visão geral calculada sobre a amostra estratificada, enquanto a leitura
+    exata roda em segundo plano
+    
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON
+    """
+    st.header("📊 Visão Geral")
+    
+    amostra, total_estimado = calcular_previa(calcular_impressao_digital(pasta_dados), pasta_dados)
+    if amostra is None:
+        disparar_carregamento(pasta_dados)
+        acompanhar_carregamento(pasta_dados)
+        return
+    
+    st.info(
+        f"⏳ **Prévia aproximada**: calculada com {len(amostra):,} reproduções sorteadas ao longo de todo o "
+        f"histórico (de cerca de {total_estimado:,}). Os resultados exatos substituem esta prévia assim que "
+        "o carregamento completo terminar."
+    )
+    acompanhar_carregamento(pasta_dados)
+    
+    # Totais extrapolados da amostra para o número estimado de reproduções
+    fator = total_estimado / len(amostra)
+    minutos_estimados = amostra['minutos'].sum() * fator
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total de minutos", f"≈ {minutos_estimados:,.0f}")
+    col2.metric("Total de horas", f"≈ {minutos_estimados / 60:,.0f}")
+    col3.metric("Total de dias", f"≈ {minutos_estimados / 1440:,.1f}")
+    col4.metric("Músicas ouvidas", f"≈ {total_estimado:,}")
+    
+    # Rankings com os minutos da amostra extrapolados
+    amostra_escalada = amostra.assign(minutos=amostra['minutos'] * fator)
+    
+    st.subheader("👨‍🎤 Artistas mais ouvidos (prévia)")
+    exibir_grafico(
+        criar_grafico_top(amostra_escalada, 'artist', 'Artista', 'viridis'),
+        aviso_sem_dados(amostra, 'master_metadata_album_artist_name', "Artistas")
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🎶 Músicas mais ouvidas (prévia)")
+        exibir_grafico(
+            criar_grafico_top(amostra_escalada, 'track', 'Música', 'plasma'),
+            aviso_sem_dados(amostra, 'master_metadata_track_name', "Músicas")
+        )
+    with col2:
+        st.subheader("💿 Álbuns mais ouvidos (prévia)")
+        exibir_grafico(
+            criar_grafico_top(amostra_escalada, 'album', 'Álbum', 'inferno'),
+            aviso_sem_dados(amostra, 'master_metadata_album_album_name', "Álbuns")
+        )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("⏭️ Puladas vs Completas (prévia)")
+        exibir_grafico(
+            criar_grafico_pulos(amostra),
+            aviso_sem_dados(amostra, 'skipped', "Pulos")
+        )
+    with col2:
+        st.subheader("📱 Dispositivos mais utilizados (prévia)")
+        exibir_grafico(
+            criar_grafico_dispositivos(amostra),
+            aviso_sem_dados(amostra, 'platform', "Dispositivos")
+        )
+    
+    # Com a prévia desenhada, começar a leitura exata
+    disparar_carregamento(pasta_dados)
+
+
+# Fragmento que acompanha o carregamento em segundo plano
+@st.fragment(run_every=1)
+def acompanhar_carregamento(pasta_dados):
+    """
+    Mostra a cada segundo o progresso da leitura exata e os totais exatos dos arquivos já
+    lidos, com a opção de cancelar; quando a leitura terminar, recarrega a página
+    
+    Args:
+        pasta_dados: Caminho da pasta com os arquivos JSON
+    """
+    renovar_validade_pasta()
+    
+    _, cargas = obter_carregamentos()
+    carga = cargas.get(pasta_dados)
+    if carga is None or not possui_carga_pendente(pasta_dados):
+        st.rerun(scope="app")
+    _, progresso = carga
+    
+    # Barra de progresso pelos bytes lidos, com o tempo restante estimado pela vazão
+    if progresso.etapa == "leitura":
+        restante = progresso.segundos_restantes()
+        texto = (
+            f"🔄 Lendo os arquivos em segundo plano: {progresso.arquivos_lidos} de {progresso.total_arquivos} "
+            f"({progresso.bytes_lidos / 1024 ** 2:,.0f} de {progresso.total_bytes / 1024 ** 2:,.0f} MB), "
+            f"{progresso.reproducoes:,} reproduções · "
+            + (f"cerca de {restante:.0f} s restantes" if restante is not None else "estimando o tempo restante...")
+        )
+    else:
+        texto = f"🔄 Arquivos lidos; preparando as análises... ({time.time() - progresso.inicio:.0f} s)"
+    st.progress(progresso.fracao(), text=texto)
+    
+    # Totais exatos dos arquivos já lidos (crescem até os totais finais)
+    totais = progresso.totais()
+    if totais['reproducoes']:
+        st.markdown(f"**Totais exatos dos {progresso.arquivos_lidos} arquivos já lidos**")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Total de minutos", f"{totais['minutos']:,.0f}")
+        col2.metric("Total de horas", f"{totais['minutos'] / 60:,.0f}")
+        col3.metric("Total de dias", f"{totais['minutos'] / 1440:,.1f}")
+        col4.metric("Músicas ouvidas", f"{totais['reproducoes']:,}")
+        if len(totais['top_artistas']):
+            st.caption(
+                f"{totais['artistas']:,} artistas até agora; mais ouvidos: "
+                + ", ".join(f"{artista} ({minutos:,.0f} min)" for artista, minutos in totais['top_artistas'].items())
+            )
+    
+    if st.button("Cancelar carregamento", key="cancelar_carregamento"):
+        cancelar_carregamento(pasta_dados)
+        st.rerun(scope="app")
+
+
+# Função para renderizar a busca por artista
+def renderizar_busca_artista(df, chave_dados):
+    """
+    Renderiza a seção de busca por artista
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
+    """
+    st.header("🔍 Busca por Artista")
+    
+    # Busca e resultados são atualizados como fragmento, sem reexecutar a página
+    fragmento_busca_artista(df, chave_dados)
+
+
+# Fragmento com a busca por artista e seus resultados
+@st.fragment
+def fragmento_busca_artista(df, chave_dados):
+    """
+    Renderiza o campo de busca, as sugestões e os resultados da busca por artista
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
+    """
+    renovar_validade_pasta()
+    
+    # Container de busca estilizado
+    st.markdown('<div class="search-container">', unsafe_allow_html=True)
+    
+    # Obter índice de artistas para autocompletar (dicionário de nomes)
+    indice_artistas = calcular_indice_nomes(chave_dados, df, 'artist')
+    
+    # Criar lista de sugestões baseada no top 10
+    top10_artistas = calcular_top_por_minutos(chave_dados, df, 'artist').index.tolist()
+    
+    # Exibir sugestões de top artistas
+    st.markdown("### Sugestões de artistas populares")
+    cols_sugestoes = st.columns(5)
+    for i, artista in enumerate(top10_artistas[:5]):
+        with cols_sugestoes[i]:
+            st.button(artista, key=f"sugestao_{i}", on_click=selecionar_sugestao, args=("busca_artista", artista))
+    
+    cols_sugestoes2 = st.columns(5)
+    for i, artista in enumerate(top10_artistas[5:10]):
+        with cols_sugestoes2[i]:
+            st.button(artista, key=f"sugestao2_{i}", on_click=selecionar_sugestao, args=("busca_artista", artista))
+    
+    # Campo de busca com autocompletar
+    artista_busca = st.text_input(
+        "Buscar artista",
+        placeholder="Digite o nome do artista...",
+        key="busca_artista"
+    )
+    
+    # Lista de sugestões baseada no input
+    if artista_busca:
+        sugestoes = buscar_sugestoes(indice_artistas, artista_busca)
+        
+        if sugestoes:
+            st.markdown("### Sugestões de artistas")
+            cols_auto = st.columns(5)
+            for i, sugestao in enumerate(sugestoes[:5]):
+                with cols_auto[i]:
+                    st.button(sugestao, key=f"auto_{i}", on_click=selecionar_sugestao, args=("busca_artista", sugestao))
             
-            st.markdown('</div>', unsafe_allow_html=True)
+            if len(sugestoes) > 5:
+                cols_auto2 = st.columns(5)
+                for i, sugestao in enumerate(sugestoes[5:10]):
+                    with cols_auto2[i]:
+                        st.button(sugestao, key=f"auto2_{i}", on_click=selecionar_sugestao, args=("busca_artista", sugestao))
     
-    with tab4:
-        st.header("🎭 Estatísticas Divertidas")
-        
-        # Adicionar estatísticas divertidas e criativas interativas
-        adicionar_comparacoes_ao_painel(df)
+    st.markdown('</div>', unsafe_allow_html=True)
     
-    with tab5:
-        st.header("⏰ Análise de Horários")
-        
-        # Paleta de horários moderna
-        st.subheader("🕒 Paleta de Horários")
-        fig_paleta = criar_paleta_horarios(df)
-        st.plotly_chart(fig_paleta, use_container_width=True)
-        
-        # Heatmap dia da semana vs hora
-        st.subheader("📅 Heatmap: Dia da Semana x Hora")
-        fig_heatmap = criar_heatmap_dia_semana_hora(df)
-        st.plotly_chart(fig_heatmap, use_container_width=True)
-        
-        # Filtros para análise de horários
-        st.subheader("🔍 Análise Personalizada")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            periodo_selecionado = st.selectbox(
-                "Selecione um período do dia:",
-                ["Todos", "Madrugada (0h-6h)", "Manhã (6h-12h)", "Tarde (12h-18h)", "Noite (18h-24h)"]
+    # Exibir resultados da busca
+    if artista_busca and artista_busca in df['artist'].cat.categories:
+        st.markdown('<div class="result-container">', unsafe_allow_html=True)
+        
+        # Buscar músicas do artista (agregado em cache)
+        musicas_artista = calcular_musicas_artista(chave_dados, df, artista_busca)
+        
+        # Calcular estatísticas do artista
+        total_minutos = musicas_artista['minutos'].sum()
+        total_musicas = len(musicas_artista)
+        
+        # Exibir estatísticas
+        st.subheader(f"Estatísticas de {artista_busca}")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total de minutos", f"{total_minutos:,.0f}")
+        col2.metric("Total de músicas", f"{total_musicas}")
+        col3.metric("Média por música", f"{total_minutos/total_musicas if total_musicas > 0 else 0:,.1f}")
+        
+        # Exibir top músicas
+        st.subheader(f"Top músicas de {artista_busca}")
+        
+        if not musicas_artista.empty:
+            fig = px.bar(
+                musicas_artista.head(10),
+                x='minutos',
+                y='track',
+                orientation='h',
+                labels={'minutos': 'Minutos', 'track': 'Música'},
+                color='minutos',
+                color_continuous_scale='Viridis',
+                template="plotly_dark"
             )
-        
-        with col2:
-            dia_selecionado = st.selectbox(
-                "Selecione um dia da semana:",
-                ["Todos", "Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+            fig.update_layout(height=500)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Exibir tabela paginada com todas as músicas
+            st.subheader("Todas as músicas")
+            exibir_tabela_paginada(
+                musicas_artista[['track', 'minutos']],
+                chave="tabela_musicas_artista",
+                column_config={
+                    "track": "Música",
+                    "minutos": st.column_config.NumberColumn("Minutos", format="%.1f")
+                },
+                colunas_busca=['track']
             )
+        else:
+            st.info(f"Nenhuma música encontrada para {artista_busca}")
         
-        # Filtrar dados conforme seleção
-        df_filtrado = df.copy()
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+# Função para renderizar o fluxo musical
+def renderizar_fluxo_musical(df, chave_dados):
+    """
+    Renderiza a seção de fluxo musical (músicas tocadas antes/depois)
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
+    """
+    st.header("🔄 Fluxo Musical")
+    
+    # Busca e resultados são atualizados como fragmento, sem reexecutar a página
+    fragmento_fluxo_musical(df, chave_dados)
+
+
+# Fragmento com a busca de músicas e o fluxo musical
+@st.fragment
+def fragmento_fluxo_musical(df, chave_dados):
+    """
+    Renderiza o campo de busca, as sugestões e o fluxo musical da música buscada
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
+    """
+    renovar_validade_pasta()
+    
+    # Container de busca estilizado
+    st.markdown('<div class="search-container">', unsafe_allow_html=True)
+    
+    # Obter índice de músicas para autocompletar (dicionário de nomes)
+    indice_musicas = calcular_indice_nomes(chave_dados, df, 'track')
+    
+    # Criar lista de sugestões baseada no top 10
+    top10_musicas = calcular_top_por_minutos(chave_dados, df, 'track').index.tolist()
+    
+    # Exibir sugestões de top músicas
+    st.markdown("### Sugestões de músicas populares")
+    cols_sugestoes = st.columns(5)
+    for i, musica in enumerate(top10_musicas[:5]):
+        with cols_sugestoes[i]:
+            st.button(musica, key=f"sugestao_musica_{i}", on_click=selecionar_sugestao, args=("busca_musica", musica))
+    
+    cols_sugestoes2 = st.columns(5)
+    for i, musica in enumerate(top10_musicas[5:10]):
+        with cols_sugestoes2[i]:
+            st.button(musica, key=f"sugestao_musica2_{i}", on_click=selecionar_sugestao, args=("busca_musica", musica))
+    
+    # Campo de busca com autocompletar
+    musica_busca = st.text_input(
+        "Buscar música",
+        placeholder="Digite o nome da música...",
+        key="busca_musica"
+    )
+    
+    # Lista de sugestões baseada no input
+    if musica_busca:
+        sugestoes = buscar_sugestoes(indice_musicas, musica_busca)
+        
+        if sugestoes:
+            st.markdown("### Sugestões de músicas")
+            cols_auto = st.columns(5)
+            for i, sugestao in enumerate(sugestoes[:5]):
+                with cols_auto[i]:
+                    st.button(sugestao, key=f"auto_musica_{i}", on_click=selecionar_sugestao, args=("busca_musica", sugestao))
+            
+            if len(sugestoes) > 5:
+                cols_auto2 = st.columns(5)
+                for i, sugestao in enumerate(sugestoes[5:10]):
+                    with cols_auto2[i]:
+                        st.button(sugestao, key=f"auto_musica2_{i}", on_click=selecionar_sugestao, args=("busca_musica", sugestao))
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Exibir resultados da busca
+    if musica_busca and musica_busca in df['track'].cat.categories:
+        st.markdown('<div class="result-container">', unsafe_allow_html=True)
         
-        # Mapear dias da semana para português
-        mapa_dias = {
-            'Monday': 'Segunda',
-            'Tuesday': 'Terça',
-            'Wednesday': 'Quarta',
-            'Thursday': 'Quinta',
-            'Friday': 'Sexta',
-            'Saturday': 'Sábado',
-            'Sunday': 'Domingo'
-        }
-        df_filtrado['dia_pt'] = df_filtrado['diaSemana'].map(mapa_dias)
+        # Encontrar músicas tocadas antes e depois
+        musicas_depois = encontrar_musicas_sequencia(df, musica_busca, 'depois')
+        musicas_antes = encontrar_musicas_sequencia(df, musica_busca, 'antes')
         
-        # Aplicar filtro de período
-        if periodo_selecionado != "Todos":
-            if periodo_selecionado == "Madrugada (0h-6h)":
-                df_filtrado = df_filtrado[(df_filtrado['hora'] >= 0) & (df_filtrado['hora'] < 6)]
-            elif periodo_selecionado == "Manhã (6h-12h)":
-                df_filtrado = df_filtrado[(df_filtrado['hora'] >= 6) & (df_filtrado['hora'] < 12)]
-            elif periodo_selecionado == "Tarde (12h-18h)":
-                df_filtrado = df_filtrado[(df_filtrado['hora'] >= 12) & (df_filtrado['hora'] < 18)]
-            elif periodo_selecionado == "Noite (18h-24h)":
-                df_filtrado = df_filtrado[(df_filtrado['hora'] >= 18) & (df_filtrado['hora'] < 24)]
+        # Exibir informações da música
+        info_musica = df[df['track'] == musica_busca].iloc[0]
+        artista = info_musica['artist']
         
-        # Aplicar filtro de dia
-        if dia_selecionado != "Todos":
-            df_filtrado = df_filtrado[df_filtrado['dia_pt'] == dia_selecionado]
+        st.subheader(f"Fluxo musical para: {musica_busca}")
+        st.markdown(f"**Artista:** {artista}")
         
-        # Exibir resultados da análise personalizada
+        # Exibir fluxo musical em colunas
         col1, col2 = st.columns(2)
         
         with col1:
-            st.subheader("Top Artistas no Período Selecionado")
-            top_artistas_filtrado = df_filtrado.groupby('artist')['minutos'].sum().sort_values(ascending=False).head(5)
+            st.subheader("🔙 Top 10 músicas tocadas ANTES")
             
-            if not top_artistas_filtrado.empty:
-                fig_artistas_filtrado = px.bar(
-                    top_artistas_filtrado, 
-                    x=top_artistas_filtrado.values, 
-                    y=top_artistas_filtrado.index, 
+            if not musicas_antes.empty:
+                # Criar gráfico
+                fig_antes = px.bar(
+                    musicas_antes,
+                    x='contagem',
+                    y='track',
                     orientation='h',
-                    labels={'x':'Minutos', 'y':'Artista'},
-                    color=top_artistas_filtrado.values,
-                    color_continuous_scale='Viridis',
-                    template="plotly_dark"
+                    labels={'contagem': 'Frequência', 'track': 'Música', 'artist': 'Artista'},
+                    color='contagem',
+                    color_continuous_scale='Blues',
+                    template="plotly_dark",
+                    hover_data=['artist']
                 )
-                fig_artistas_filtrado.update_layout(height=400)
-                st.plotly_chart(fig_artistas_filtrado, use_container_width=True)
+                fig_antes.update_layout(height=500)
+                st.plotly_chart(fig_antes, use_container_width=True)
+                
+                # Exibir lista detalhada
+                st.markdown("### Lista detalhada")
+                for i, (_, row) in enumerate(musicas_antes.iterrows()):
+                    st.markdown(f"""
+                    <div class="flow-item">
+                        <div class="flow-number">{i+1}</div>
+                        <div>
+                            <strong>{row['track']}</strong><br>
+                            <small>{row['artist']} • {row['contagem']} vezes</small>
+                        </div>
+                    </div>
+                    """, unsafe_allow_html=True)
             else:
-                st.info("Não há dados suficientes para o período selecionado.")
+                st.info("Nenhuma música encontrada tocada antes desta música")
         
         with col2:
-            st.subheader("Top Músicas no Período Selecionado")
-            top_musicas_filtrado = df_filtrado.groupby('track')['minutos'].sum().sort_values(ascending=False).head(5)
+            st.subheader("🔜 Top 10 músicas tocadas DEPOIS")
             
-            if not top_musicas_filtrado.empty:
-                fig_musicas_filtrado = px.bar(
-                    top_musicas_filtrado, 
-                    x=top_musicas_filtrado.values, 
-                    y=top_musicas_filtrado.index, 
+            if not musicas_depois.empty:
+                # Criar gráfico
+                fig_depois = px.bar(
+                    musicas_depois,
+                    x='contagem',
+                    y='track',
                     orientation='h',
-                    labels={'x':'Minutos', 'y':'Música'},
-                    color=top_musicas_filtrado.values,
-                    color_continuous_scale='Plasma',
-                    template="plotly_dark"
+                    labels={'contagem': 'Frequência', 'track': 'Música', 'artist': 'Artista'},
+                    color='contagem',
+                    color_continuous_scale='Greens',
+                    template="plotly_dark",
+                    hover_data=['artist']
                 )
-                fig_musicas_filtrado.update_layout(height=400)
-                st.plotly_chart(fig_musicas_filtrado, use_container_width=True)
+                fig_depois.update_layout(height=500)
+                st.plotly_chart(fig_depois, use_container_width=True)
+                
+                # Exibir lista detalhada
+                st.markdown("### Lista detalhada")
+                for i, (_, row) in enumerate(musicas_depois.iterrows()):
+                    st.markdown(f"""
+                    <div class="flow-item">
+                        <div class="flow-number">{i+1}</div>
+                        <div>
+                            <strong>{row['track']}</strong><br>
+                            <small>{row['artist']} • {row['contagem']} vezes</small>
+                        </div>
+                    </div>
+                    """, unsafe_allow_html=True)
             else:
-                st.info("Não há dados suficientes para o período selecionado.")
-    
-    with tab6:
-        st.header("📈 Evolução e Comparativos")
+                st.info("Nenhuma música encontrada tocada depois desta música")
         
-        # Comparativo entre anos
-        st.subheader("🗓️ Comparativo entre Anos")
-        fig_comparativo = criar_comparativo_anos(df)
-        
-        if fig_comparativo:
-            st.plotly_chart(fig_comparativo, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+# Função para renderizar as estatísticas divertidas
+def renderizar_estatisticas_divertidas(df, chave_dados):
+    """
+    Renderiza a seção de estatísticas divertidas
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
+    """
+    st.header("🎭 Estatísticas Divertidas")
+    
+    # Adicionar estatísticas divertidas e criativas interativas
+    adicionar_comparacoes_ao_painel(df)
+
+
+# Função para renderizar a análise de horários
+def renderizar_analise_horarios(df, chave_dados):
+    """
+    Renderiza a seção de análise de horários
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
+    """
+    st.header("⏰ Análise de Horários")
+    
+    # Paleta de horários moderna
+    st.subheader("🕒 Paleta de Horários")
+    fig_paleta = obter_figura('paleta', chave_dados, df, criar_paleta_horarios)
+    st.plotly_chart(fig_paleta, use_container_width=True)
+    
+    # Heatmap dia da semana vs hora
+    st.subheader("📅 Heatmap: Dia da Semana x Hora")
+    fig_heatmap = obter_figura('heatmap', chave_dados, df, criar_heatmap_dia_semana_hora)
+    st.plotly_chart(fig_heatmap, use_container_width=True)
+    
+    # Heatmap detalhado atualizado como fragmento
+    fragmento_heatmap_detalhado(df, chave_dados)
+    
+    # Filtros atualizados como fragmento, sem reexecutar a página
+    fragmento_analise_personalizada_horarios(df)
+
+
+# Fragmento com o heatmap detalhado
+@st.fragment
+def fragmento_heatmap_detalhado(df, chave_dados):
+    """
+    Renderiza os controles e o heatmap com granularidade, métrica e facetas configuráveis
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
+    """
+    renovar_validade_pasta()
+    
+    st.subheader("🔬 Heatmap Detalhado")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        intervalo = st.selectbox(
+            "Faixa de horário:",
+            [5, 15, 30, 60],
+            index=1,
+            format_func=lambda minutos: f"{minutos} minutos"
+        )
+    
+    with col2:
+        # Sem o campo skipped (histórico básico) não há taxa de pulos
+        metrica = st.selectbox(
+            "Métrica:",
+            [chave for chave in METRICAS_HEATMAP if chave != 'taxa_pulos' or 'skipped' in campos_disponiveis(df)],
+            format_func=lambda chave: METRICAS_HEATMAP[chave][0]
+        )
+    
+    with col3:
+        faceta = st.selectbox(
+            "Separar por:",
+            [None, 'ano', 'artista'],
+            format_func=lambda chave: {None: "Nada", 'ano': "Ano", 'artista': "Top artistas"}[chave]
+        )
+    
+    fig_detalhado = obter_figura(
+        'heatmap_detalhado', chave_dados, df, criar_heatmap_detalhado,
+        intervalo=intervalo, metrica=metrica, faceta=faceta
+    )
+    
+    if fig_detalhado:
+        st.plotly_chart(fig_detalhado, use_container_width=True)
+    else:
+        st.info("Não há dados suficientes para o heatmap detalhado.")
+
+
+# Fragmento com a análise personalizada de horários
+@st.fragment
+def fragmento_analise_personalizada_horarios(df):
+    """
+    Renderiza os filtros de período/dia e os rankings do período selecionado
+    
+    Args:
+        df: DataFrame com os dados
+    """
+    renovar_validade_pasta()
+    
+    # Filtros para análise de horários
+    st.subheader("🔍 Análise Personalizada")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        periodo_selecionado = st.selectbox(
+            "Selecione um período do dia:",
+            ["Todos", "Madrugada (0h-6h)", "Manhã (6h-12h)", "Tarde (12h-18h)", "Noite (18h-24h)"]
+        )
+    
+    with col2:
+        dia_selecionado = st.selectbox(
+            "Selecione um dia da semana:",
+            ["Todos", "Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+        )
+    
+    # Filtrar dados conforme seleção (filtros geram visões, sem copiar o DataFrame inteiro)
+    df_filtrado = df
+    
+    # Mapear dias da semana em português para os nomes da coluna diaSemana
+    mapa_dias = {
+        'Segunda': 'Monday',
+        'Terça': 'Tuesday',
+        'Quarta': 'Wednesday',
+        'Quinta': 'Thursday',
+        'Sexta': 'Friday',
+        'Sábado': 'Saturday',
+        'Domingo': 'Sunday'
+    }
+    
+    # Aplicar filtro de período
+    if periodo_selecionado != "Todos":
+        if periodo_selecionado == "Madrugada (0h-6h)":
+            df_filtrado = df_filtrado[(df_filtrado['hora'] >= 0) & (df_filtrado['hora'] < 6)]
+        elif periodo_selecionado == "Manhã (6h-12h)":
+            df_filtrado = df_filtrado[(df_filtrado['hora'] >= 6) & (df_filtrado['hora'] < 12)]
+        elif periodo_selecionado == "Tarde (12h-18h)":
+            df_filtrado = df_filtrado[(df_filtrado['hora'] >= 12) & (df_filtrado['hora'] < 18)]
+        elif periodo_selecionado == "Noite (18h-24h)":
+            df_filtrado = df_filtrado[(df_filtrado['hora'] >= 18) & (df_filtrado['hora'] < 24)]
+    
+    # Aplicar filtro de dia
+    if dia_selecionado != "Todos":
+        df_filtrado = df_filtrado[df_filtrado['diaSemana'] == mapa_dias[dia_selecionado]]
+    
+    # Exibir resultados da análise personalizada
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Top Artistas no Período Selecionado")
+        top_artistas_filtrado = df_filtrado.groupby('artist', observed=True)['minutos'].sum().sort_values(ascending=False).head(5)
+        
+        if not top_artistas_filtrado.empty:
+            fig_artistas_filtrado = px.bar(
+                top_artistas_filtrado, 
+                x=top_artistas_filtrado.values, 
+                y=top_artistas_filtrado.index, 
+                orientation='h',
+                labels={'x':'Minutos', 'y':'Artista'},
+                color=top_artistas_filtrado.values,
+                color_continuous_scale='Viridis',
+                template="plotly_dark"
+            )
+            fig_artistas_filtrado.update_layout(height=400)
+            st.plotly_chart(fig_artistas_filtrado, use_container_width=True)
         else:
-            st.info("Não há dados suficientes para comparar diferentes anos. É necessário ter dados de pelo menos dois anos.")
-        
-        # Gráficos de evolução
-        st.subheader("📊 Evolução ao Longo do Tempo")
-        fig_evolucao = criar_graficos_evolucao(df)
-        st.plotly_chart(fig_evolucao, use_container_width=True)
+            st.info("Não há dados suficientes para o período selecionado.")
+    
+    with col2:
+        st.subheader("Top Músicas no Período Selecionado")
+        top_musicas_filtrado = df_filtrado.groupby('track', observed=True)['minutos'].sum().sort_values(ascending=False).head(5)
+        
+        if not top_musicas_filtrado.empty:
+            fig_musicas_filtrado = px.bar(
+                top_musicas_filtrado, 
+                x=top_musicas_filtrado.values, 
+                y=top_musicas_filtrado.index, 
+                orientation='h',
+                labels={'x':'Minutos', 'y':'Música'},
+                color=top_musicas_filtrado.values,
+                color_continuous_scale='Plasma',
+                template="plotly_dark"
+            )
+            fig_musicas_filtrado.update_layout(height=400)
+            st.plotly_chart(fig_musicas_filtrado, use_container_width=True)
+        else:
+            st.info("Não há dados suficientes para o período selecionado.")
+
+
+# Função para renderizar a evolução e os comparativos
+def renderizar_evolucao(df, chave_dados):
+    """
+    Renderiza a seção de evolução e comparativos
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
+    """
+    st.header("📈 Evolução e Comparativos")
+    
+    # Comparativo entre anos
+    st.subheader("🗓️ Comparativo entre Anos")
+    fig_comparativo = obter_figura('comparativo', chave_dados, df, criar_comparativo_anos)
+    
+    if fig_comparativo:
+        st.plotly_chart(fig_comparativo, use_container_width=True)
+    else:
+        st.info("Não há dados suficientes para comparar diferentes anos. É necessário ter dados de pelo menos dois anos.")
+    
+    # Gráficos de evolução
+    st.subheader("📊 Evolução ao Longo do Tempo")
+    fig_evolucao = obter_figura('evolucao', chave_dados, df, criar_graficos_evolucao)
+    st.plotly_chart(fig_evolucao, use_container_width=True)
+    
+    # Diversidade mensal estimada pelos esboços (modo aproximado)
+    if st.session_state.get('modo_aproximado'):
+        st.subheader("🎯 Diversidade por Mês (aproximada)")
+        resumo = calcular_resumo_aproximado(chave_dados, st.session_state.pasta_temp)
+        distintos = resumo.distintos_por_mes()
+        if len(distintos):
+            ultimo = distintos.iloc[-1]
+            col1, col2 = st.columns(2)
+            col1.metric(f"Artistas distintos em {ultimo['mes']}", formatar_estimativa(ultimo['artistas'], ultimo['artistas_erro']),
+                        help="Estimativa por HyperLogLog; margem de ~95%")
+            col2.metric(f"Músicas distintas em {ultimo['mes']}", formatar_estimativa(ultimo['musicas'], ultimo['musicas_erro']),
+                        help="Estimativa por HyperLogLog; margem de ~95%")
+            st.plotly_chart(criar_grafico_distintos_por_mes(distintos), use_container_width=True)
+    
+    # Filtros atualizados como fragmento, sem reexecutar a página
+    fragmento_evolucao_personalizada(df)
+
+
+# Fragmento com a análise de evolução personalizada
+@st.fragment
+def fragmento_evolucao_personalizada(df):
+    """
+    Renderiza os filtros de anos/métrica e o gráfico de evolução correspondente
+    
+    Args:
+        df: DataFrame com os dados
+    """
+    renovar_validade_pasta()
+    
+    # Filtros para análise de evolução
+    st.subheader("🔍 Análise de Evolução Personalizada")
+    
+    # Selecionar período para análise
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        anos_disponiveis = sorted(df['ano'].dropna().unique())
+        anos_selecionados = st.multiselect(
+            "Selecione os anos para análise:",
+            anos_disponiveis,
+            default=anos_disponiveis[-2:] if len(anos_disponiveis) >= 2 else anos_disponiveis
+        )
+    
+    with col2:
+        metricas_evolucao = ["Minutos ouvidos", "Quantidade de músicas"]
+        if 'skipped' in campos_disponiveis(df):
+            metricas_evolucao.append("Proporção de músicas puladas")
+        metrica_selecionada = st.selectbox(
+            "Selecione a métrica para análise:",
+            metricas_evolucao
+        )
+    
+    with col3:
+        granularidade_selecionada = st.selectbox(
+            "Selecione a granularidade:",
+            list(GRANULARIDADES)
+        )
+    
+    # Filtrar dados conforme seleção
+    if anos_selecionados:
+        df_anos = df[df['ano'].isin(anos_selecionados)]
+        
+        # Janela de visualização: ao aproximar, a série volta à resolução completa
+        data_inicial = df_anos['ts'].min().date()
+        data_final = df_anos['ts'].max().date()
+        if data_inicial < data_final:
+            janela = st.slider(
+                "Janela de visualização:",
+                min_value=data_inicial,
+                max_value=data_final,
+                value=(data_inicial, data_final),
+                format="DD/MM/YYYY",
+                key=f"janela_evolucao_{'_'.join(str(ano) for ano in anos_selecionados)}"
+            )
+            fuso = df_anos['ts'].dt.tz
+            inicio = pd.Timestamp(janela[0]).tz_localize(fuso)
+            fim = (pd.Timestamp(janela[1]) + pd.Timedelta(days=1)).tz_localize(fuso)
+            df_anos = df_anos[(df_anos['ts'] >= inicio) & (df_anos['ts'] < fim)]
+        
+        # Agrupar por ano e período na granularidade escolhida
+        frequencia = GRANULARIDADES[granularidade_selecionada]
+        periodos = df_anos['ts'].dt.to_period(frequencia).rename('periodo')
+        df_evolucao = df_anos.groupby([df_anos['ano'], periodos]).agg(
+            minutos=('minutos', 'sum'),
+            quantidade=('track', 'count'),
+            proporcao_puladas=('foi_pulado', 'mean')
+        ).reset_index()
+        df_evolucao['data'] = df_evolucao['periodo'].dt.to_timestamp()
+        
+        # Selecionar métrica para visualização
+        if metrica_selecionada == "Minutos ouvidos":
+            y_col = 'minutos'
+            y_label = 'Minutos'
+        elif metrica_selecionada == "Quantidade de músicas":
+            y_col = 'quantidade'
+            y_label = 'Quantidade'
+        else:
+            y_col = 'proporcao_puladas'
+            y_label = 'Proporção de puladas'
+            df_evolucao[y_col] = df_evolucao[y_col] * 100  # Converter para percentual
+        
+        # Criar gráfico de evolução personalizado (séries longas são reduzidas e desenhadas com WebGL)
+        singular, _, formato_data = FREQUENCIAS_SERIE[frequencia]
+        fig_evolucao_personalizada = go.Figure()
+        for ano, df_ano in df_evolucao.groupby('ano'):
+            fig_evolucao_personalizada.add_trace(
+                criar_traco_serie(
+                    x=df_ano['data'],
+                    y=df_ano[y_col],
+                    mode='lines+markers',
+                    name=str(ano),
+                    hovertemplate='Data: %{x|' + formato_data + '}<br>' + y_label + ': %{y:.1f}<extra></extra>'
+                )
+            )
         
-        # Filtros para análise de evolução
-        st.subheader("🔍 Análise de Evolução Personalizada")
+        fig_evolucao_personalizada.update_layout(
+            title=f'Evolução de {metrica_selecionada} por {singular}',
+            xaxis_title='Data',
+            yaxis_title=y_label,
+            legend_title_text='ano',
+            template="plotly_dark",
+            height=500
+        )
+        st.plotly_chart(fig_evolucao_personalizada, use_container_width=True)
+    else:
+        st.info("Selecione pelo menos um ano para visualizar a evolução.")
+
+
+# Função para renderizar a seção de países
+def renderizar_paises(df, chave_dados):
+    """
+    Renderiza a seção de escuta por país de conexão
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
+    """
+    st.header("🌍 Países")
+    
+    paises = calcular_paises(chave_dados, df)
+    if paises.empty:
+        st.info(aviso_sem_dados(df, 'conn_country', "País da conexão"))
+        return
+    
+    # Métricas principais
+    principal = paises.iloc[0]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Países", f"{len(paises):,}")
+    col2.metric("País principal", principal['pais'])
+    col3.metric("Minutos fora do país principal", f"{paises['minutos'].iloc[1:].sum():,.0f}",
+                help=f"{1 - principal['participacao']:.1%} do tempo total")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🗺️ Minutos por País")
+        st.plotly_chart(obter_figura('paises', chave_dados, df, criar_grafico_paises), use_container_width=True)
+    with col2:
+        st.subheader("📅 Países ao Longo do Tempo")
+        st.plotly_chart(obter_figura('paises_tempo', chave_dados, df, criar_grafico_paises_tempo), use_container_width=True)
+    
+    # Tabela com os artistas mais ouvidos em cada país
+    st.subheader("🎤 Artistas Mais Ouvidos em Cada País")
+    tabela = paises[['pais', 'minutos', 'reproducoes', 'primeira', 'ultima', 'top_artistas']].copy()
+    tabela['minutos'] = tabela['minutos'].round(0).astype(int)
+    tabela['primeira'] = tabela['primeira'].dt.date
+    tabela['ultima'] = tabela['ultima'].dt.date
+    tabela.columns = ['País', 'Minutos', 'Reproduções', 'Primeira reprodução', 'Última reprodução', 'Artistas mais ouvidos']
+    st.dataframe(tabela, use_container_width=True, hide_index=True)
+
+
+# Função para montar o relatório HTML
+def montar_relatorio_html(df, chave_dados):
+    """
+    Monta o relatório HTML com as métricas e figuras fixas de todas as seções
+    
+    Reaproveita os mesmos JSONs em cache usados pelo painel, então figuras já vistas
+    não são recalculadas. As análises que dependem de escolhas do usuário (busca,
+    fluxo musical e filtros personalizados) ficam de fora.
+    
+    Args:
+        df: DataFrame com os dados
+        chave_dados: Impressão digital do conjunto de dados (usada como chave dos caches)
         
-        # Selecionar período para análise
-        col1, col2 = st.columns(2)
+    Returns:
+        String com o documento HTML
+    """
+    metricas = [
+        ("Total de minutos", f"{df['minutos'].sum():,.0f}"),
+        ("Total de horas", f"{df['horas'].sum():,.0f}"),
+        ("Total de dias", f"{df['horas'].sum() / 24:,.1f}"),
+        ("Músicas ouvidas", f"{len(df):,}"),
+        ("Período", f"{df['ts'].min():%d/%m/%Y} a {df['ts'].max():%d/%m/%Y}")
+    ]
+    
+    recomendacoes = gerar_recomendacoes(df)
+    
+    secoes = [
+        ("📊 Visão Geral", [
+            ("👨‍🎤 Artistas mais ouvidos", obter_payload('top', chave_dados, df, criar_grafico_top, coluna='artist', rotulo='Artista', escala_cores='viridis')),
+            ("🎶 Músicas mais ouvidas", obter_payload('top', chave_dados, df, criar_grafico_top, coluna='track', rotulo='Música', escala_cores='plasma')),
+            ("💿 Álbuns mais ouvidos", obter_payload('top', chave_dados, df, criar_grafico_top, coluna='album', rotulo='Álbum', escala_cores='inferno')),
+            ("⏭️ Puladas vs Completas", obter_payload('pulos', chave_dados, df, criar_grafico_pulos)),
+            ("📱 Dispositivos mais utilizados", obter_payload('dispositivos', chave_dados, df, criar_grafico_dispositivos))
+        ]),
+        ("⏰ Análise de Horários", [
+            ("🕒 Paleta de Horários", obter_payload('paleta', chave_dados, df, criar_paleta_horarios)),
+            ("📅 Heatmap: Dia da Semana x Hora", obter_payload('heatmap', chave_dados, df, criar_heatmap_dia_semana_hora)),
+            ("🔬 Heatmap Detalhado", obter_payload(
+                'heatmap_detalhado', chave_dados, df, criar_heatmap_detalhado,
+                intervalo=15, metrica='minutos', faceta=None
+            ))
+        ]),
+        ("📈 Evolução e Comparativos", [
+            ("🗓️ Comparativo entre Anos", obter_payload('comparativo', chave_dados, df, criar_comparativo_anos)),
+            ("📊 Evolução ao Longo do Tempo", obter_payload('evolucao', chave_dados, df, criar_graficos_evolucao))
+        ]),
+        ("🎯 Recomendações", [
+            ("🌟 Artistas que você deveria ouvir mais", recomendacoes['artistas_pouco_ouvidos'] or None),
+            ("🎵 Músicas que você sempre ouve até o fim", [f"{musica} — {artista}" for musica, artista in recomendacoes['musicas_favoritas']] or None),
+            (f"⏰ Mais ouvidos às {recomendacoes['artistas_horario_favorito']['horario']}h", recomendacoes['artistas_horario_favorito']['artistas'])
+        ])
+    ]
+    
+    return gerar_relatorio_html("🎧 Spotify Analytics Avançado", metricas, secoes)
+
+
+# Seções do painel: apenas a seção selecionada é calculada em cada execução
+SECOES = {
+    "📊 Visão Geral": renderizar_visao_geral,
+    "🔍 Busca por Artista": renderizar_busca_artista,
+    "🔄 Fluxo Musical": renderizar_fluxo_musical,
+    "🎭 Estatísticas Divertidas": renderizar_estatisticas_divertidas,
+    "⏰ Análise de Horários": renderizar_analise_horarios,
+    "📈 Evolução e Comparativos": renderizar_evolucao,
+    "🌍 Países": renderizar_paises
+}
+
+# Meta de latência (ms) de uma atualização da página em cada seção, após o primeiro carregamento
+META_LATENCIA_MS = {
+    "📊 Visão Geral": 300,
+    "🔍 Busca por Artista": 200,
+    "🔄 Fluxo Musical": 300,
+    "🎭 Estatísticas Divertidas": 150,
+    "⏰ Análise de Horários": 500,
+    "📈 Evolução e Comparativos": 800,
+    "🌍 Países": 300
+}
+
+# Número de medições de latência mantidas por seção
+LIMITE_HISTORICO_LATENCIA = 20
+
+# Granularidades disponíveis na análise de evolução personalizada
+GRANULARIDADES = {
+    "Mês": 'M',
+    "Semana": 'W',
+    "Dia": 'D'
+}
+
+# Métricas de execução expostas no formato do Prometheus
+iniciar_metricas()
+
+# Perfil desta execução, encerrado no finally também quando ela é interrompida (st.stop, st.rerun ou erro)
+perfil = iniciar_perfil(modo_perfil, coletar_cprofile)
+try:
+    # Início do app
+    st.title("🎧 Spotify Analytics Avançado")
+
+    # Verificar se os dados já foram carregados
+    if 'dados_carregados' not in st.session_state:
+        st.session_state.dados_carregados = False
+        st.session_state.pasta_temp = None
+
+    # Identificador da sessão, dono da pasta de envio no armazenamento
+    if 'id_sessao' not in st.session_state:
+        st.session_state.id_sessao = uuid.uuid4().hex
+
+    armazenamento = obter_armazenamento()
+
+    # Se a pasta da sessão expirou (ou foi removida pela cota), voltar à tela de envio
+    if st.session_state.dados_carregados and armazenamento.acessar(st.session_state.id_sessao) is None:
+        st.session_state.dados_carregados = False
+        st.session_state.pasta_temp = None
+        st.warning("Seus dados expiraram após um período sem uso. Envie os arquivos novamente.")
+
+    # Tela inicial para upload de dados
+    if not st.session_state.dados_carregados:
+        st.markdown("### Bem-vindo ao Analisador Avançado de Dados do Spotify")
         
-        with col1:
-            anos_disponiveis = sorted(df['ano'].dropna().unique())
-            anos_selecionados = st.multiselect(
-                "Selecione os anos para análise:",
-                anos_disponiveis,
-                default=anos_disponiveis[-2:] if len(anos_disponiveis) >= 2 else anos_disponiveis
-            )
+        # Container de upload estilizado
+        st.markdown("""
+        <div class="upload-container">
+            <img src="https://storage.googleapis.com/pr-newsroom-wp/1/2018/11/Spotify_Logo_RGB_Green.png" class="spotify-logo" />
+            <p class="welcome-text">Descubra insights detalhados sobre seus hábitos de escuta no Spotify com visualizações modernas e análises personalizadas.</p>
+            <p class="instruction-text">Para começar, faça o upload dos seus arquivos JSON de histórico de reprodução do Spotify.<br>Você pode baixar seus dados em <a href="https://www.spotify.com/account/privacy/" target="_blank">spotify.com/account/privacy</a> → Solicitar dados → Histórico de reprodução.</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Upload de arquivos
+        arquivos_enviados = st.file_uploader(
+            "Selecione seus arquivos JSON do Spotify",
+            type=["json"],
+            accept_multiple_files=True,
+            help="Você pode selecionar múltiplos arquivos JSON do seu histórico de reprodução do Spotify: "
+                 "o histórico estendido (Streaming_History_Audio_*.json) ou o histórico dos dados da conta "
+                 "(StreamingHistory_music_*.json e StreamingHistory_podcast_*.json)."
+        )
         
-        with col2:
-            metrica_selecionada = st.selectbox(
-                "Selecione a métrica para análise:",
-                ["Minutos ouvidos", "Quantidade de músicas", "Proporção de músicas puladas"]
-            )
+        # Botão para processar arquivos
+        if arquivos_enviados:
+            if st.button("Analisar meus dados", key="analisar_dados"):
+                # Processar arquivos, com o progresso por arquivo
+                barra = st.progress(0.0, text="Processando seus dados...")
+                sucesso, mensagem, pasta_temp = processar_arquivos_enviados(
+                    arquivos_enviados, armazenamento, st.session_state.id_sessao,
+                    ao_processar_arquivo=lambda indice, total, nome: barra.progress(
+                        indice / total, text=f"Processando {nome} ({indice + 1} de {total})..."
+                    )
+                )
+                barra.empty()
+                
+                if sucesso:
+                    # Armazenar caminho da pasta temporária
+                    st.session_state.pasta_temp = pasta_temp
+                    st.session_state.dados_carregados = True
+                    
+                    # Exportações grandes: leitura exata em segundo plano, com prévia por amostra
+                    iniciar_carregamento(pasta_temp)
+                    
+                    # Exibir mensagem de sucesso
+                    st.markdown(f"""
+                    <div class="success-message">
+                        <h3>✅ Dados carregados com sucesso!</h3>
+                        <p>{mensagem}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    # Recarregar a página para mostrar as análises
+                    st.rerun()
+                else:
+                    # Exibir mensagem de erro
+                    st.markdown(f"""
+                    <div class="error-message">
+                        <h3>❌ Erro ao processar arquivos</h3>
+                        <p>{mensagem}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
         
-        # Filtrar dados conforme seleção
-        if anos_selecionados:
-            df_anos = df[df['ano'].isin(anos_selecionados)]
-            
-            # Agrupar por mês e ano
-            df_evolucao = df_anos.groupby([df_anos['ts'].dt.year, df_anos['ts'].dt.month]).agg({
-                'minutos': 'sum',
-                'track': 'count',
-                'foi_pulado': 'mean'
-            }).rename_axis(['ano', 'mes']).reset_index()
-            
-            df_evolucao.columns = ['ano', 'mes', 'minutos', 'quantidade', 'proporcao_puladas']
-            df_evolucao['data'] = pd.to_datetime({
-                'year': df_evolucao['ano'],
-                'month': df_evolucao['mes'],
-                'day': 1  # Define o dia como 1 (ou outro valor fixo)
-            })
+        # Exibir instruções detalhadas
+        with st.expander("Como obter seus dados do Spotify?"):
+            st.markdown("""
+            ### Como obter seus dados do Spotify
             
-            # Selecionar métrica para visualização
-            if metrica_selecionada == "Minutos ouvidos":
-                y_col = 'minutos'
-                y_label = 'Minutos'
-            elif metrica_selecionada == "Quantidade de músicas":
-                y_col = 'quantidade'
-                y_label = 'Quantidade'
-            else:
-                y_col = 'proporcao_puladas'
-                y_label = 'Proporção de puladas'
-                df_evolucao[y_col] = df_evolucao[y_col] * 100  # Converter para percentual
+            1. Acesse [spotify.com/account/privacy](https://www.spotify.com/account/privacy/)
+            2. Faça login na sua conta
+            3. Role até a seção "Solicitar seus dados"
+            4. Clique em "Solicitar"
+            5. Selecione "Histórico de reprodução" e confirme
+            6. Você receberá um e-mail quando seus dados estiverem prontos (geralmente em até 30 dias)
+            7. Baixe o arquivo ZIP e extraia os arquivos JSON
+            8. Faça upload dos arquivos JSON nesta página
             
-            # Criar gráfico de evolução personalizado
-            fig_evolucao_personalizada = px.line(
-                df_evolucao,
-                x='data',
-                y=y_col,
-                color='ano',
-                markers=True,
-                labels={'data': 'Data', y_col: y_label},
-                title=f'Evolução de {metrica_selecionada} por mês',
-                template="plotly_dark"
+            **Nota:** Os arquivos JSON do Spotify contêm seu histórico de reprodução detalhado, incluindo músicas, artistas, álbuns, timestamps e outros metadados.
+            Os arquivos StreamingHistory_music_*.json dos dados da conta (mais rápidos de obter) também são aceitos, mas não trazem álbuns, dispositivos, pulos nem país da conexão.
+            """)
+        
+        # Exibir exemplo com dados de demonstração
+        with st.expander("Não tem seus dados? Use nosso exemplo de demonstração"):
+            escala_demo = st.selectbox(
+                "Tamanho do histórico de demonstração",
+                list(ESCALAS_DEMO),
+                help="Histórico sintético com artistas e músicas de popularidade realista, sessões, pulos e várias plataformas."
             )
-            
-            fig_evolucao_personalizada.update_layout(height=500)
-            st.plotly_chart(fig_evolucao_personalizada, use_container_width=True)
-        else:
-            st.info("Selecione pelo menos um ano para visualizar a evolução.")
+            if st.button("Carregar dados de demonstração", key="carregar_demo"):
+                # Criar a pasta da sessão para os dados de demonstração, reservando o espaço na cota
+                n_reproducoes = ESCALAS_DEMO[escala_demo]
+                pasta_temp = armazenamento.criar_pasta(st.session_state.id_sessao, n_reproducoes * BYTES_POR_REPRODUCAO)
+                if pasta_temp is None:
+                    st.error("O histórico de demonstração excede o espaço disponível no servidor")
+                    st.stop()
+                
+                # Gerar um histórico sintético no formato da exportação do Spotify
+                with st.spinner("Gerando o histórico de demonstração..."):
+                    gravar_exportacao(pasta_temp, n_reproducoes)
+                if not armazenamento.registrar_tamanho(st.session_state.id_sessao):
+                    st.error("O histórico de demonstração excede o espaço disponível no servidor")
+                    st.stop()
+                
+                # Atualizar estado da sessão
+                st.session_state.pasta_temp = pasta_temp
+                st.session_state.dados_carregados = True
+                iniciar_carregamento(pasta_temp)
+                
+                # Exibir mensagem de sucesso
+                st.markdown("""
+                <div class="success-message">
+                    <h3>✅ Dados de demonstração carregados!</h3>
+                    <p>Os dados de demonstração foram carregados com sucesso. Clique em "Recarregar" para ver as análises.</p>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                # Botão para recarregar
+                if st.button("Recarregar"):
+                    st.rerun()
+
+    # Prévia por amostra enquanto a leitura exata roda em segundo plano
+    elif possui_carga_pendente(st.session_state.pasta_temp):
+        renderizar_previa(st.session_state.pasta_temp)
+
+    # Painel principal com análises
+    else:
+        # Carregar dados
+        with medir_etapa("carregamento") as registro:
+            df = carregar_dados(st.session_state.pasta_temp).df
+            registro['linhas'] = len(df)
+        
+        # Modo aproximado: métricas de artistas e músicas estimadas por esboços de memória fixa
+        st.sidebar.toggle(
+            "≈ Modo aproximado",
+            key="modo_aproximado",
+            help="Estima artistas e músicas distintos e os rankings com esboços (HyperLogLog, Count-Min e Space-Saving), mostrando as margens de erro"
+        )
+        
+        # Selecionar a seção a exibir (substitui as abas, que executavam todas as seções)
+        secao = st.radio(
+            "Seção",
+            list(SECOES),
+            horizontal=True,
+            label_visibility="collapsed",
+            key="secao"
+        )
+        
+        # Renderizar apenas a seção selecionada (os caches usam a impressão digital dos dados como chave)
+        chave_dados = calcular_impressao_digital(st.session_state.pasta_temp)
+        with medir_etapa(f"seção: {secao}", linhas=len(df)), METRICAS.cronometrar('spotify_secao_segundos', secao=secao):
+            SECOES[secao](df, chave_dados)
+        
+        # Exportar o relatório HTML (gerado apenas no clique, fora da execução da página)
+        st.sidebar.download_button(
+            "📄 Exportar relatório HTML",
+            data=lambda: montar_relatorio_html(df, chave_dados),
+            file_name="spotify_relatorio.html",
+            mime="text/html",
+            on_click="ignore",
+            help="Arquivo único com as métricas e gráficos, que abre sem o painel e sem internet"
+        )
+        
+        # Uso de disco das pastas de envio
+        exibir_metricas_armazenamento(armazenamento)
+        
+        # Medir a latência desta execução
+        registrar_latencia(secao, inicio_execucao)
+
 
-# Rodapé
-st.markdown("---")
-st.caption("Feito com 💙 Por: Henrique Sousa Sandre - usando Python, Streamlit e Plotly | Análise avançada de dados do Spotify")
+    # Rodapé
+    st.markdown("---")
+    st.caption("Feito com 💙 Por: Henrique Sousa Sandre - usando Python, Streamlit e Plotly | Análise avançada de dados do Spotify")
+finally:
+    # Encerrar e exibir o perfil desta execução (depois de st.stop ou st.rerun o Streamlit não exibe mais nada)
+    if perfil is not None:
+        perfil.finalizar()
+        exibir_perfil(perfil)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from analises_avancadas import criar_traco_serie, reduzir_lttb
+
+
+def test_lttb_mantem_extremos_e_respeita_orcamento():
+    rng = np.random.default_rng(0)
+    x = np.arange(10_000)
+    y = rng.normal(size=len(x)).cumsum()
+    for n_pontos in (3, 10, 500, 9_999):
+        indices = reduzir_lttb(x, y, n_pontos)
+        assert len(indices) == n_pontos
+        assert indices[0] == 0 and indices[-1] == len(x) - 1
+        assert (np.diff(indices) > 0).all()
+
+
+def test_lttb_preserva_picos():
+    x = np.arange(5_000, dtype=float)
+    y = np.zeros_like(x)
+    y[1234], y[4321] = 100.0, -80.0
+    indices = reduzir_lttb(x, y, 50)
+    assert {1234, 4321} <= set(indices.tolist())
+
+
+def test_lttb_serie_dentro_do_orcamento_fica_inteira():
+    np.testing.assert_array_equal(reduzir_lttb(np.arange(20), np.ones(20), 20), np.arange(20))
+    np.testing.assert_array_equal(reduzir_lttb(np.arange(20), np.ones(20), 2), np.arange(20))
+
+
+def test_traco_serie_reduz_acima_do_orcamento():
+    datas = pd.date_range('2020-01-01', periods=3_000, freq='D')
+    valores = np.sin(np.arange(len(datas)) / 30)
+
+    traco = criar_traco_serie(datas, valores, orcamento=200, name='série')
+    assert isinstance(traco, go.Scattergl)
+    assert len(traco.x) == 200
+    assert pd.Timestamp(traco.x[0]) == datas[0] and pd.Timestamp(traco.x[-1]) == datas[-1]
+
+    traco = criar_traco_serie(datas[:150], valores[:150], orcamento=200)
+    assert isinstance(traco, go.Scatter)
+    assert len(traco.x) == 150
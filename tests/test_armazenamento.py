@@ -0,0 +1,107 @@
+import os
+import time
+
+import pytest
+
+import armazenamento
+from armazenamento import PREFIXO_PASTA, ArmazenamentoEnvios
+
+
+@pytest.fixture
+def criar_armazenamento(tmp_path):
+    """Armazenamento em uma pasta temporária, sem a thread de varredura"""
+    def criar(**parametros):
+        return ArmazenamentoEnvios(raiz=str(tmp_path), intervalo_varredura=None, **parametros)
+    return criar
+
+
+# Função para gravar um arquivo de um tamanho na pasta de uma sessão
+def _gravar(pasta, tamanho):
+    with open(os.path.join(pasta, 'dados.json'), 'wb') as f:
+        f.write(b'x' * tamanho)
+
+
+def test_varredura_remove_pastas_expiradas(criar_armazenamento, monkeypatch):
+    envios = criar_armazenamento(ttl_segundos=60)
+    antiga = envios.criar_pasta('antiga')
+    recente = envios.criar_pasta('recente')
+
+    agora = time.time()
+    monkeypatch.setattr(armazenamento.time, 'time', lambda: agora + 45)
+    assert envios.acessar('recente') == recente
+    monkeypatch.setattr(armazenamento.time, 'time', lambda: agora + 90)
+    envios.varrer()
+
+    assert not os.path.exists(antiga)
+    assert envios.acessar('antiga') is None
+    assert envios.acessar('recente') == recente
+    assert envios.obter_metricas()['removidas_por_validade'] == 1
+
+
+def test_varredura_remove_pastas_orfas_antigas(criar_armazenamento, tmp_path):
+    orfa = tmp_path / (PREFIXO_PASTA + 'anterior')
+    orfa.mkdir()
+    outra = tmp_path / 'outra_pasta'
+    outra.mkdir()
+    antigo = time.time() - 3600
+    os.utime(orfa, (antigo, antigo))
+    os.utime(outra, (antigo, antigo))
+
+    envios = criar_armazenamento(ttl_segundos=60)
+    envios.varrer()
+    assert not orfa.exists()
+    assert outra.exists()
+
+
+def test_cota_remove_as_pastas_usadas_ha_mais_tempo(criar_armazenamento):
+    envios = criar_armazenamento(cota_bytes=1000)
+    pastas = {}
+    for sessao in ('a', 'b'):
+        pastas[sessao] = envios.criar_pasta(sessao, 400)
+        _gravar(pastas[sessao], 400)
+        assert envios.registrar_tamanho(sessao)
+    # 'a' passa a ser a usada mais recentemente
+    envios.acessar('a')
+
+    pastas['c'] = envios.criar_pasta('c', 400)
+    assert pastas['c'] is not None
+    assert envios.acessar('b') is None and not os.path.exists(pastas['b'])
+    assert envios.acessar('a') == pastas['a']
+    assert envios.bytes_em_uso() == 800
+    assert envios.obter_metricas()['removidas_por_cota'] == 1
+
+
+def test_reserva_acima_da_cota_nao_cria_pasta(criar_armazenamento):
+    envios = criar_armazenamento(cota_bytes=1000)
+    outra = envios.criar_pasta('outra', 300)
+
+    assert envios.criar_pasta('sessao', 1001) is None
+    assert envios.acessar('sessao') is None
+    # A reserva recusada não remove as pastas das outras sessões
+    assert envios.acessar('outra') == outra
+    assert envios.bytes_em_uso() == 300
+
+
+def test_reserva_trocada_pelo_tamanho_real(criar_armazenamento):
+    envios = criar_armazenamento(cota_bytes=1000)
+    pasta = envios.criar_pasta('sessao', 900)
+    assert envios.bytes_em_uso() == 900
+
+    _gravar(pasta, 250)
+    assert envios.registrar_tamanho('sessao')
+    assert envios.bytes_em_uso() == 250
+
+    envios.liberar('sessao')
+    assert envios.bytes_em_uso() == 0
+    assert not os.path.exists(pasta)
+
+
+def test_pasta_que_excede_a_cota_depois_de_gravada_e_removida(criar_armazenamento):
+    envios = criar_armazenamento(cota_bytes=1000)
+    pasta = envios.criar_pasta('sessao', 100)
+    _gravar(pasta, 1500)
+
+    assert not envios.registrar_tamanho('sessao')
+    assert not os.path.exists(pasta)
+    assert envios.acessar('sessao') is None
+    assert envios.bytes_em_uso() == 0
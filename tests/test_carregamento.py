@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+import pytest
+
+from carregamento import ler_amostra, ler_dados
+from gerador_sintetico import gravar_exportacao
+
+
+@pytest.fixture(scope='module')
+def exportacao(tmp_path_factory):
+    """Exportação sintética de 20 mil reproduções em quatro arquivos"""
+    pasta = str(tmp_path_factory.mktemp('exportacao'))
+    gravar_exportacao(pasta, 20_000, reproducoes_por_arquivo=5_000)
+    return pasta
+
+
+def test_amostra_estratificada_cobre_a_exportacao(exportacao):
+    completo = ler_dados(exportacao)
+    amostra, total_estimado = ler_amostra(exportacao, tamanho=400)
+
+    assert 350 <= len(amostra) <= 400
+    assert abs(total_estimado - len(completo)) <= 0.05 * len(completo)
+    # Registros reais da exportação, sem repetições
+    chaves = set(zip(completo['ts'], completo['ms_played']))
+    pares = list(zip(amostra['ts'], amostra['ms_played']))
+    assert len(set(pares)) == len(pares)
+    assert set(pares) <= chaves
+    # Uma posição por faixa: a amostra acompanha a distribuição no tempo
+    quantis = np.linspace(0.05, 0.95, 10)
+    posicoes = np.searchsorted(np.sort(completo['ts'].to_numpy()), np.quantile(amostra['ts'].to_numpy(), quantis))
+    assert np.abs(posicoes / len(completo) - quantis).max() <= 0.05
+
+
+def test_amostra_com_mesma_semente_e_reproduzivel(exportacao):
+    primeira, _ = ler_amostra(exportacao, tamanho=100, semente=3)
+    segunda, _ = ler_amostra(exportacao, tamanho=100, semente=3)
+    assert primeira['ts'].tolist() == segunda['ts'].tolist()
+
+
+def test_amostra_maior_que_a_exportacao_nao_repete_registros(tmp_path):
+    gravar_exportacao(str(tmp_path), 8, reproducoes_por_arquivo=5)
+    amostra, total_estimado = ler_amostra(str(tmp_path), tamanho=200)
+    assert len(amostra) == 8
+    assert total_estimado >= 8
+
+
+def test_amostra_de_pasta_vazia(tmp_path):
+    (tmp_path / 'data').mkdir()
+    assert ler_amostra(str(tmp_path)) == (None, 0)
+
+    # Só arquivos de formato desconhecido (outros JSON da exportação da conta)
+    (tmp_path / 'data' / 'Userdata.json').write_text(json.dumps({'username': 'usuario'}))
+    assert ler_amostra(str(tmp_path)) == (None, 0)
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from esbocos import (
+    ContagemMinima,
+    HyperLogLog,
+    SpaceSaving,
+    calcular_hashes,
+    resumir_exportacao,
+)
+from gerador_sintetico import gravar_exportacao
+from leitores import ler_arquivo
+
+
+# Função para gerar chaves distintas em texto
+def _chaves(inicio, quantidade):
+    return np.array([f'item {i}' for i in range(inicio, inicio + quantidade)], dtype=object)
+
+
+def test_hyperloglog_dentro_do_erro_padrao():
+    for distintos in (50, 5_000, 200_000):
+        hll = HyperLogLog()
+        hashes = calcular_hashes(_chaves(0, distintos))
+        # Repetições não mudam a estimativa
+        hll.adicionar_hashes(hashes)
+        hll.adicionar_hashes(hashes[: distintos // 2])
+        assert abs(hll.estimar() - distintos) <= 3 * hll.erro_padrao * distintos, distintos
+
+
+def test_hyperloglog_unir_equivale_a_uniao():
+    primeiro, segundo, uniao = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    hashes_primeiro = calcular_hashes(_chaves(0, 30_000))
+    hashes_segundo = calcular_hashes(_chaves(20_000, 30_000))
+    primeiro.adicionar_hashes(hashes_primeiro)
+    segundo.adicionar_hashes(hashes_segundo)
+    uniao.adicionar_hashes(np.concatenate((hashes_primeiro, hashes_segundo)))
+
+    primeiro.unir(segundo)
+    np.testing.assert_array_equal(primeiro.registradores, uniao.registradores)
+    assert abs(primeiro.estimar() - 50_000) <= 3 * primeiro.erro_padrao * 50_000
+
+
+def test_contagem_minima_nunca_subestima_e_respeita_epsilon():
+    rng = np.random.default_rng(0)
+    chaves = _chaves(0, 20_000)
+    pesos = rng.zipf(1.3, len(chaves)).clip(max=10_000)
+    hashes = calcular_hashes(chaves)
+
+    contagem = ContagemMinima(epsilon=0.001, delta=0.01)
+    # Em dois lotes, como na leitura em fluxo
+    contagem.adicionar_hashes(hashes[:10_000], pesos[:10_000])
+    contagem.adicionar_hashes(hashes[10_000:], pesos[10_000:])
+
+    assert contagem.total == pesos.sum()
+    excesso = contagem.estimar_hashes(hashes) - pesos
+    assert (excesso >= 0).all()
+    # O limite vale com probabilidade 1 - delta para cada chave
+    assert np.mean(excesso > contagem.erro_maximo) <= contagem.delta
+
+
+def test_space_saving_garante_os_mais_frequentes():
+    rng = np.random.default_rng(1)
+    reais = pd.Series(rng.zipf(1.5, 50_000)).value_counts()
+    top = SpaceSaving(capacidade=100)
+    for inicio in range(0, len(reais), 1_000):
+        lote = reais.iloc[inicio:inicio + 1_000].sample(frac=1, random_state=inicio)
+        top.adicionar(lote.index.tolist(), lote.to_numpy().tolist())
+
+    assert top.total == reais.sum()
+    for chave, contagem, erro in top.top(10):
+        assert contagem - erro <= reais[chave] <= contagem
+    # Todo item com peso acima de total / capacidade está entre os monitorados
+    assert set(reais[reais > top.erro_maximo].index) <= set(top.contagens)
+
+
+def test_resumo_da_exportacao_cobre_os_valores_exatos(tmp_path):
+    caminhos = gravar_exportacao(str(tmp_path), 30_000, reproducoes_por_arquivo=10_000)
+    df = pd.concat([ler_arquivo(caminho) for caminho in caminhos], ignore_index=True)
+    resumo = resumir_exportacao(str(tmp_path), tamanho_lote=7_000)
+
+    assert resumo.reproducoes == len(df)
+    artistas = df['master_metadata_album_artist_name'].dropna()
+    estimativa, margem = resumo.distintos_totais('artist')
+    assert abs(estimativa - artistas.nunique()) <= margem
+
+    minutos = df.groupby('master_metadata_album_artist_name')['ms_played'].sum() / 60000
+    top = resumo.top('artist', n=5)
+    assert top['nome'].tolist() == minutos.nlargest(5).index.tolist()
+    for linha in top.itertuples():
+        assert linha.minutos_min - 1e-9 <= minutos[linha.nome] <= linha.minutos_max + 1e-9
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from geografia import _IndiceForcaBruta, carregar_gazetteer, distancias_haversine
+
+
+@pytest.fixture(scope='module')
+def gazetteer():
+    return carregar_gazetteer()
+
+
+@pytest.fixture(scope='module')
+def gazetteer_forca_bruta():
+    """Gazetteer com o índice por força bruta, usado quando a SciPy não está instalada"""
+    gazetteer = carregar_gazetteer.__wrapped__()
+    gazetteer._arvore = _IndiceForcaBruta(gazetteer._vetores)
+    return gazetteer
+
+
+def test_buscar_ignora_acentos_e_aceita_pais_e_prefixo(gazetteer):
+    sao_paulo = gazetteer.buscar("São Paulo")
+    assert gazetteer.nomes[sao_paulo] == "São Paulo"
+    assert gazetteer.buscar("sao  paulo") == sao_paulo
+    assert gazetteer.buscar("Sampa") == sao_paulo
+    assert gazetteer.buscar("São Paulo, Brasil") == sao_paulo
+    assert gazetteer.nomes[gazetteer.buscar("florian")] == "Florianópolis"
+    assert gazetteer.buscar("Cidade Inexistente") is None
+    assert gazetteer.buscar("   ") is None
+
+
+def test_indices_espaciais_concordam(gazetteer, gazetteer_forca_bruta):
+    """A KD-tree e a força bruta devolvem as mesmas cidades no raio e as mesmas mais próximas"""
+    for nome in ("São Paulo", "Lisboa", "Florianópolis"):
+        origem = gazetteer.buscar(nome)
+        for raio_km in (50, 500, 3000):
+            assert sorted(gazetteer.cidades_no_raio(origem, raio_km)) == \
+                sorted(gazetteer_forca_bruta.cidades_no_raio(origem, raio_km))
+        np.testing.assert_array_equal(
+            gazetteer.mais_proximas(origem, 10), gazetteer_forca_bruta.mais_proximas(origem, 10)
+        )
+
+
+def test_cidades_no_raio_corresponde_a_haversine(gazetteer):
+    origem = gazetteer.buscar("Lisboa")
+    distancias = distancias_haversine(
+        gazetteer.latitudes[origem], gazetteer.longitudes[origem], gazetteer.latitudes, gazetteer.longitudes
+    )
+    esperadas = np.flatnonzero(distancias <= 1000)
+    assert sorted(gazetteer.cidades_no_raio(origem, 1000)) == sorted(esperadas)
+    assert gazetteer.mais_proximas(origem, 1)[0] == origem
+
+
+def test_sortear_destinos_respeita_raio_e_distancia_minima(gazetteer):
+    origem = gazetteer.buscar("São Paulo")
+    destinos = gazetteer.sortear_destinos(origem, 5, 1500, rng=np.random.default_rng(0))
+    assert len(destinos) == 5
+    assert all(30 <= distancia <= 1500 for _, distancia in destinos)
@@ -0,0 +1,138 @@
+import json
+
+import pandas as pd
+import pytest
+
+import leitores
+from carregamento import ler_dados
+from leitores import (
+    CAMPOS_UTILIZADOS,
+    LEITOR_BASICO_MUSICAS,
+    LEITOR_BASICO_PODCASTS,
+    LEITOR_ESTENDIDO,
+    campos_disponiveis,
+    detectar_formato,
+    detectar_formato_arquivo,
+    ler_arquivo,
+)
+
+REGISTROS_ESTENDIDO = [
+    {
+        'ts': '2024-03-01T10:00:00Z', 'ms_played': 180000, 'master_metadata_track_name': 'Faixa A',
+        'master_metadata_album_artist_name': 'Artista A', 'master_metadata_album_album_name': 'Álbum A',
+        'spotify_track_uri': 'spotify:track:a', 'platform': 'android', 'skipped': False,
+        'offline': False, 'conn_country': 'BR', 'ip_addr': '10.0.0.1'
+    },
+    {
+        'ts': '2024-03-01T10:03:00Z', 'ms_played': 5000, 'master_metadata_track_name': None,
+        'master_metadata_album_artist_name': None, 'master_metadata_album_album_name': None,
+        'spotify_track_uri': None, 'platform': 'android', 'skipped': True,
+        'offline': None, 'conn_country': 'BR', 'episode_name': 'Episódio'
+    }
+]
+
+REGISTROS_MUSICAS = [
+    {'endTime': '2024-03-02 08:15', 'artistName': 'Artista B', 'trackName': 'Faixa B', 'msPlayed': 200000},
+    {'endTime': '2024-03-02 08:19', 'artistName': 'Artista C', 'trackName': 'Faixa C', 'msPlayed': 30000}
+]
+
+REGISTROS_PODCASTS = [
+    {'endTime': '2024-03-03 21:00', 'podcastName': 'Podcast', 'episodeName': 'Episódio 1', 'msPlayed': 600000}
+]
+
+
+# Função para gravar uma exportação de teste
+def _gravar(pasta, arquivos):
+    """
+    Args:
+        pasta: Pasta da exportação (os arquivos vão para a subpasta 'data')
+        arquivos: Dicionário nome do arquivo -> conteúdo (lista de registros ou texto)
+
+    Returns:
+        A pasta da exportação
+    """
+    (pasta / 'data').mkdir()
+    for nome, conteudo in arquivos.items():
+        texto = conteudo if isinstance(conteudo, str) else json.dumps(conteudo, ensure_ascii=False)
+        (pasta / 'data' / nome).write_text(texto, encoding='utf-8')
+    return str(pasta)
+
+
+def test_detectar_formato_pelos_primeiros_bytes():
+    assert detectar_formato(json.dumps(REGISTROS_ESTENDIDO).encode()) is LEITOR_ESTENDIDO
+    assert detectar_formato(json.dumps(REGISTROS_MUSICAS, indent=2).encode()) is LEITOR_BASICO_MUSICAS
+    assert detectar_formato(json.dumps(REGISTROS_PODCASTS).encode()) is LEITOR_BASICO_PODCASTS
+    assert detectar_formato(b'{"username": "usuario", "country": "BR"}') is None
+    assert detectar_formato(b'[]') is None
+    # Basta o começo do arquivo, mesmo cortado no meio de um registro
+    assert detectar_formato(json.dumps(REGISTROS_ESTENDIDO).encode()[:120]) is LEITOR_ESTENDIDO
+
+
+def test_formato_basico_completa_o_esquema(tmp_path):
+    pasta = _gravar(tmp_path, {'StreamingHistory_music_0.json': REGISTROS_MUSICAS})
+    caminho = pasta + '/data/StreamingHistory_music_0.json'
+    assert detectar_formato_arquivo(caminho) is LEITOR_BASICO_MUSICAS
+
+    df = ler_arquivo(caminho)
+    assert list(df.columns) == list(CAMPOS_UTILIZADOS)
+    assert df['ts'].tolist() == [
+        pd.Timestamp('2024-03-02 08:15', tz='UTC'), pd.Timestamp('2024-03-02 08:19', tz='UTC')
+    ]
+    assert df['master_metadata_album_artist_name'].tolist() == ['Artista B', 'Artista C']
+    for campo in set(CAMPOS_UTILIZADOS) - LEITOR_BASICO_MUSICAS.preenche:
+        assert df[campo].isna().all(), campo
+
+    # As colunas ausentes continuam concatenáveis com as de texto
+    rotulos = df['master_metadata_track_name'] + ' - ' + df['master_metadata_album_album_name'].fillna('')
+    assert rotulos.tolist() == ['Faixa B - ', 'Faixa C - ']
+
+
+def test_formatos_misturados_registram_campos_disponiveis(tmp_path):
+    pasta = _gravar(tmp_path, {
+        'StreamingHistory_music_0.json': REGISTROS_MUSICAS,
+        'StreamingHistory_podcast_0.json': REGISTROS_PODCASTS,
+        'Userdata.json': '{"username": "usuario"}'
+    })
+    df = ler_dados(pasta)
+    assert len(df) == 3
+    assert campos_disponiveis(df) == LEITOR_BASICO_MUSICAS.preenche
+    assert not df['foi_pulado'].any()
+
+    pasta_estendida = tmp_path / 'estendido'
+    pasta_estendida.mkdir()
+    df = ler_dados(_gravar(pasta_estendida, {
+        'Streaming_History_Audio_2024.json': REGISTROS_ESTENDIDO,
+        'StreamingHistory_music_0.json': REGISTROS_MUSICAS
+    }))
+    assert len(df) == 4
+    assert campos_disponiveis(df) == frozenset(CAMPOS_UTILIZADOS)
+    assert df['foi_pulado'].sum() == 1
+
+
+def test_campos_disponiveis_sem_leitor():
+    """Um DataFrame que não veio de um leitor é tratado como completo"""
+    assert campos_disponiveis(pd.DataFrame()) == frozenset(CAMPOS_UTILIZADOS)
+
+
+def test_leitura_sem_msgspec_usa_json(tmp_path, monkeypatch):
+    """Sem o msgspec (ou sem usá-lo) os arquivos são lidos com o json, com o mesmo resultado"""
+    pasta = _gravar(tmp_path, {'Streaming_History_Audio_2024.json': REGISTROS_ESTENDIDO})
+    caminho = pasta + '/data/Streaming_History_Audio_2024.json'
+    esperado = ler_arquivo(caminho, usar_msgspec=False)
+
+    pd.testing.assert_frame_equal(ler_arquivo(caminho), esperado)
+
+    monkeypatch.setattr(leitores, '_obter_decodificador', lambda leitor: None)
+    assert not leitores.decodificador_tipado_disponivel()
+    pd.testing.assert_frame_equal(ler_arquivo(caminho), esperado)
+
+
+def test_registro_fora_do_esquema_tipado_usa_json(tmp_path):
+    """Um campo com tipo diferente do declarado faz o leitor voltar para o json"""
+    pytest.importorskip('msgspec')
+    registros = [dict(REGISTROS_ESTENDIDO[0], skipped='sim')]
+    pasta = _gravar(tmp_path, {'Streaming_History_Audio_2024.json': registros})
+
+    df = ler_arquivo(pasta + '/data/Streaming_History_Audio_2024.json')
+    assert df['skipped'].tolist() == ['sim']
+    assert df['master_metadata_track_name'].tolist() == ['Faixa A']
@@ -0,0 +1,71 @@
+import os
+import tracemalloc
+from unittest import mock
+
+from streamlit.testing.v1 import AppTest
+
+from armazenamento import ArmazenamentoEnvios
+from perfil import iniciar_perfil, medir_etapa
+
+CAMINHO_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'streamlit_app.py')
+
+
+def test_perfil_desligado_nao_mede():
+    """Com o modo de depuração desligado, medir_etapa entrega um dicionário sem medir nada"""
+    assert iniciar_perfil(False) is None
+    with medir_etapa('etapa') as registro:
+        registro['linhas'] = 10
+    assert not tracemalloc.is_tracing()
+
+
+def test_perfil_mede_etapas_aninhadas():
+    """As etapas aninhadas são registradas com o nível e o tracemalloc é desligado ao finalizar"""
+    perfil = iniciar_perfil(True)
+    try:
+        assert tracemalloc.is_tracing()
+        with medir_etapa('seção'):
+            with medir_etapa('figura', linhas=5):
+                dados = [0] * 100_000
+    finally:
+        perfil.finalizar()
+    del dados
+
+    assert not tracemalloc.is_tracing()
+    assert [(registro['etapa'], registro['nivel'], registro['linhas']) for registro in perfil.etapas] == [
+        ('seção', 0, None), ('figura', 1, 5)
+    ]
+    assert perfil.etapas[1]['alocado_mb'] > 0
+
+
+# Função para abrir o painel com o modo de depuração ligado
+def _abrir_painel_com_perfil():
+    app = AppTest.from_file(CAMINHO_APP, default_timeout=120)
+    app.run()
+    app.toggle(key='modo_perfil').set_value(True).run()
+    assert not tracemalloc.is_tracing()
+    return app
+
+
+def test_execucao_interrompida_encerra_perfil():
+    """Uma execução interrompida por st.stop encerra o perfil (e desliga o tracemalloc)"""
+    app = _abrir_painel_com_perfil()
+
+    # Sem espaço na cota, o carregamento da demonstração termina em st.stop
+    with mock.patch.object(ArmazenamentoEnvios, 'criar_pasta', return_value=None):
+        app.button(key='carregar_demo').click().run()
+
+    assert not app.exception
+    assert [erro.value for erro in app.error] == ["O histórico de demonstração excede o espaço disponível no servidor"]
+    assert not tracemalloc.is_tracing()
+
+
+def test_execucao_com_erro_exibe_perfil():
+    """Uma execução que termina em erro encerra o perfil e ainda exibe o painel de etapas"""
+    app = _abrir_painel_com_perfil()
+
+    with mock.patch.object(ArmazenamentoEnvios, 'criar_pasta', side_effect=OSError("disco cheio")):
+        app.button(key='carregar_demo').click().run()
+
+    assert [excecao.message for excecao in app.exception] == ["disco cheio"]
+    assert not tracemalloc.is_tracing()
+    assert [expander.label for expander in app.sidebar.expander] == ["🐞 Perfil da última execução"]